@@ -0,0 +1,230 @@
+import sys
+import os
+import csv
+import json
+import math
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from modules.io_utils import get_catalog
+    from modules.scoring import load_models, catalog_scores
+    from modules.engine import parse_profile, plan_batch
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# BATCH PLANNER (CLI)
+# CSV profil -> plan per profil (engine yang sama dengan compute_engine)
+# -> JSONL (satu plan per baris) atau tabel item (CSV / Parquet).
+# Profil diurutkan per batasan (halal/alergi/penyakit) lalu dipotong
+# menjadi chunk, sehingga filter & kandidat dihitung sekali per kelompok
+# di setiap worker. Katalog + model dimuat di proses induk sebelum fork
+# (copy-on-write); worker hasil spawn memuatnya sekali di initializer.
+# ============================================================
+ITEM_COLUMNS = [
+    "index", "ok", "error", "key", "tdee", "day", "meal", "class", "name",
+    "portion_g", "kcal", "protein_g", "fat_g", "carb_g",
+]
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+# Batas atas profil per chunk; input kecil dibagi rata ke semua worker
+MAX_CHUNK_SIZE = 64
+
+
+def _warm():
+    """Muat katalog, model, dan skor katalog (idempoten; cache per proses)."""
+    catalog = get_catalog()
+    bundle = load_models()
+    if catalog["df"] is not None:
+        catalog_scores(catalog["df"], catalog["sha1"], bundle)
+    return catalog, bundle
+
+
+def _init_worker():
+    _warm()
+
+
+def _run_chunk(rows):
+    """Worker: rows = [(index_asli, form), ...] -> (hasil, detik)."""
+    t0 = time.perf_counter()
+    out = []
+    for res in plan_batch([form for _, form in rows], train_if_missing=False):
+        res["index"] = rows[res["index"]][0]
+        out.append(res)
+    return out, time.perf_counter() - t0
+
+
+def read_profiles(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(f)]
+
+
+def _constraint_key(form):
+    """Kunci pengurutan agar profil dengan batasan sama berada di chunk yang sama."""
+    try:
+        p = parse_profile(form)
+    except Exception:
+        return (1, False, (), ())
+    return (0, p["halal"], tuple(p["allergies"]), tuple(p["diseases"]))
+
+
+def default_chunk_size(n_profiles, workers):
+    """ceil(n_profiles / workers), dibatasi MAX_CHUNK_SIZE (minimal 1)."""
+    return max(1, min(MAX_CHUNK_SIZE, math.ceil(n_profiles / max(workers, 1))))
+
+
+def make_chunks(forms, size):
+    indexed = sorted(enumerate(forms), key=lambda item: _constraint_key(item[1]))
+    return [indexed[i:i + size] for i in range(0, len(indexed), size)]
+
+
+def item_rows(res):
+    """Plan -> baris tabel panjang (satu baris per item menu)."""
+    if not res["ok"]:
+        return [{"index": res["index"], "ok": False, "error": res["error"]}]
+    rows = []
+    for day in res["plan"]:
+        for meal in day["meals"]:
+            for item in meal["items"]:
+                rows.append({
+                    "index": res["index"], "ok": True, "error": None, "key": res["key"],
+                    "tdee": res["meta"]["tdee"], "day": day["day"], "meal": meal["name"],
+                    "class": item["class"], "name": item["name"], "portion_g": item["portion_g"],
+                    "kcal": item["kcal"], "protein_g": item["protein_g"],
+                    "fat_g": item["fat_g"], "carb_g": item["carb_g"],
+                })
+    return rows
+
+
+class Writer:
+    def __init__(self, path, fmt):
+        self.path, self.fmt = path, fmt
+        self.rows = []
+        self.f = None
+        if fmt in ("jsonl", "csv"):
+            self.f = open(path, "w", newline="", encoding="utf-8")
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.f, fieldnames=ITEM_COLUMNS)
+            self.csv.writeheader()
+
+    def write(self, results):
+        if self.fmt == "jsonl":
+            for res in results:
+                self.f.write(json.dumps(res, ensure_ascii=False, separators=(",", ":")) + "\n")
+        elif self.fmt == "csv":
+            for res in results:
+                self.csv.writerows(item_rows(res))
+        else:
+            for res in results:
+                self.rows.extend(item_rows(res))
+
+    def close(self):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            columns = {c: [r.get(c) for r in self.rows] for c in ITEM_COLUMNS}
+            pq.write_table(pa.table(columns), self.path)
+        elif self.f is not None:
+            self.f.close()
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(input_path, output_path, fmt=None, workers=None, chunk_size=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(output_path)[1].lower())
+    if fmt not in ("jsonl", "csv", "parquet"):
+        print("ERROR: Format output tidak dikenali (gunakan .jsonl, .csv, .parquet atau --format).")
+        return 1
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("ERROR: Output Parquet butuh pyarrow (pip install pyarrow).")
+            return 1
+
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+    t_all = time.perf_counter()
+
+    print("[1/4] Memuat katalog & model...")
+    t0 = time.perf_counter()
+    catalog, bundle = _warm()
+    if catalog["errors"]:
+        print(f"Gagal: {catalog['errors']}")
+        return 1
+    if bundle is None:
+        print("[WARN] Model belum dilatih (jalankan train.py); memakai skor rule-based.")
+    timings["load"] = time.perf_counter() - t0
+
+    print("[2/4] Membaca profil...")
+    t0 = time.perf_counter()
+    forms = read_profiles(input_path)
+    chunk_size = int(chunk_size) if chunk_size else default_chunk_size(len(forms), workers)
+    chunks = make_chunks(forms, max(chunk_size, 1))
+    timings["read"] = time.perf_counter() - t0
+
+    print(f"[3/4] Menyusun plan: {len(forms)} profil, {len(chunks)} chunk, {workers} worker...")
+    writer = Writer(output_path, fmt)
+    n_ok = n_err = 0
+    worker_s = write_s = 0.0
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = map(_run_chunk, chunks)
+        pool = None
+    else:
+        # fork: worker mewarisi katalog/model yang sudah dimuat di atas
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker)
+        results = pool.map(_run_chunk, chunks)
+
+    try:
+        for out, seconds in results:
+            worker_s += seconds
+            n_ok += sum(1 for r in out if r["ok"])
+            n_err += sum(1 for r in out if not r["ok"])
+            tw = time.perf_counter()
+            writer.write(out)
+            write_s += time.perf_counter() - tw
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    # plan_wall termasuk penulisan hasil (di mode pool, worker tetap jalan saat induk menulis)
+    timings["plan_wall"] = time.perf_counter() - t0
+    timings["plan_worker_sum"] = worker_s
+
+    print("[4/4] Menulis output...")
+    t0 = time.perf_counter()
+    writer.close()
+    timings["write"] = write_s + time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - t_all
+
+    print("=" * 60)
+    print(f"Profil: {len(forms)} (ok: {n_ok}, gagal: {n_err}) -> {output_path} [{fmt}]")
+    for name, sec in timings.items():
+        print(f"  {name:<16}: {sec:8.3f} s")
+    if timings["plan_wall"] > 0:
+        print(f"  Throughput plan : {len(forms) / timings['plan_wall']:8.1f} profil/s")
+    print(f"  Throughput total: {len(forms) / timings['total']:8.1f} profil/s")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Susun plan untuk banyak profil dari CSV")
+    parser.add_argument("input", help="CSV profil (kolom: age, weight, height, sex, activity, goal, days, halal, allergies, diseases)")
+    parser.add_argument("output", help="File output (.jsonl, .csv, .parquet)")
+    parser.add_argument("--format", choices=["jsonl", "csv", "parquet"], default=None, help="Format output (default: dari ekstensi)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker (default: jumlah core)")
+    parser.add_argument("--chunk", type=int, default=None,
+                        help=f"Jumlah profil per tugas worker (default: profil / worker, maks. {MAX_CHUNK_SIZE})")
+    args = parser.parse_args()
+    sys.exit(main(args.input, args.output, fmt=args.format, workers=args.workers, chunk_size=args.chunk))
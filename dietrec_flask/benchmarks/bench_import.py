@@ -0,0 +1,120 @@
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+# --- 1. SETUP IMPORT MODUL ---
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ============================================================
+# BENCHMARK IMPORT (BOOT WORKER)
+# Setiap target di-import di proses Python baru dengan -X importtime.
+# Dicatat: waktu import (wall), RSS setelah import, paket berat yang ikut
+# termuat, dan paket dengan waktu import kumulatif terbesar. Target khusus
+# "boot" = import app + satu compute_engine (worker siap melayani).
+# ============================================================
+DEFAULT_TARGETS = ["app", "modules.engine", "modules.scoring", "modules.pdf_export", "boot"]
+HEAVY = ["sklearn", "xgboost", "scipy", "reportlab", "joblib", "matplotlib"]
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import importlib
+if sys.argv[1] == "boot":
+    importlib.import_module("app")
+    from modules.engine import compute_engine
+    compute_engine({})
+else:
+    importlib.import_module(sys.argv[1])
+wall = time.perf_counter() - t0
+rss_kb = None
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+except (OSError, StopIteration):
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = sorted(h for h in json.loads(sys.argv[2]) if h in sys.modules)
+print("@@" + json.dumps({"wall_s": wall, "rss_kb": rss_kb, "heavy": heavy, "modules": len(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr):
+    """Baris '-X importtime' -> {paket: cumulative_us}, hanya import tingkat atas."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cum_us, name = line.split(":", 1)[1].split("|")
+        name = name[1:]
+        if name.startswith(" "):
+            continue  # import bersarang (sudah termasuk di kumulatif induknya)
+        pkg = name.split(".")[0]
+        out[pkg] = out.get(pkg, 0) + int(cum_us)
+    return out
+
+
+def measure(target, repeat):
+    runs, top = [], {}
+    for _ in range(max(int(repeat), 1)):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE, target, json.dumps(HEAVY)],
+                              cwd=ROOT_DIR, capture_output=True, text=True)
+        line = next((l for l in proc.stdout.splitlines() if l.startswith("@@")), None)
+        if proc.returncode != 0 or line is None:
+            tail = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            return {"target": target, "error": tail}
+        runs.append(json.loads(line[2:]))
+        top = parse_importtime(proc.stderr)
+
+    walls = [r["wall_s"] * 1000 for r in runs]
+    return {
+        "target": target,
+        "wall_ms_median": statistics.median(walls),
+        "wall_ms_min": min(walls),
+        "rss_mb": statistics.median(r["rss_kb"] for r in runs) / 1024,
+        "modules": runs[-1]["modules"],
+        "heavy_loaded": runs[-1]["heavy"],
+        "top_imports_ms": {k: v / 1000 for k, v in sorted(top.items(), key=lambda kv: -kv[1])[:8]},
+    }
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(targets=None, repeat=5, out=None):
+    targets = targets or DEFAULT_TARGETS
+    results = [measure(t, repeat) for t in targets]
+
+    print("=" * 92)
+    print(f"   BENCHMARK IMPORT ({repeat} proses per target, {sys.executable})")
+    print("=" * 92)
+    print(f"{'Target':<20} | {'Wall (ms)':>10} | {'Min (ms)':>9} | {'RSS (MB)':>8} | {'Modul':>5} | Paket berat")
+    print("-" * 92)
+    for res in results:
+        if "error" in res:
+            print(f"{res['target']:<20} | ERROR: {res['error']}")
+            continue
+        print(f"{res['target']:<20} | {res['wall_ms_median']:>10.1f} | {res['wall_ms_min']:>9.1f} | "
+              f"{res['rss_mb']:>8.1f} | {res['modules']:>5} | {', '.join(res['heavy_loaded']) or '-'}")
+    print("=" * 92)
+    for res in results:
+        if "top_imports_ms" in res:
+            top = ", ".join(f"{k} {v:.0f}" for k, v in list(res["top_imports_ms"].items())[:5])
+            print(f"{res['target']:<20}   import terberat (ms): {top}")
+
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": repeat, "results": results}, f, indent=2)
+        print(f"Hasil disimpan ke {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ukur waktu import & RSS saat worker boot")
+    parser.add_argument("targets", nargs="*", help=f"Modul yang di-import (default: {' '.join(DEFAULT_TARGETS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah proses baru per target")
+    parser.add_argument("--out", default=None, help="File JSON hasil")
+    args = parser.parse_args()
+    main(targets=args.targets, repeat=args.repeat, out=args.out)
@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from modules.io_utils import get_catalog
+    from modules.scoring import apply_filters, calculate_scores, catalog_scores
+    from modules.planner import MEAL_RATIOS, build_candidate_pools, sample_meals
+    from modules.portions import MACRO_SPLIT, solve_portions, uniform_portions
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# BENCHMARK: PORSI SERAGAM vs SOLVER LEAST SQUARES
+# Menu diambil sekali (pilihan item sama untuk kedua metode), lalu
+# dibandingkan deviasi kalori per meal, deviasi komposisi makro harian
+# (seperti radar chart di halaman hasil) dan waktu eksekusi.
+# ============================================================
+def deviation(macros, portions, targets):
+    vals = macros * (portions / 100.0)[..., None]
+    meal = vals.sum(axis=2)                                    # (hari, meal, 4)
+    kcal_dev = np.abs(meal[..., 0] - targets) / targets * 100
+
+    day = meal.sum(axis=1)
+    cal = day[:, 1:] * np.array([4.0, 9.0, 4.0])              # P, L, K dalam kkal
+    share = cal / np.maximum(cal.sum(axis=1, keepdims=True), 1) * 100
+    goal = np.array([MACRO_SPLIT[k][0] for k in ("protein", "fat", "carb")]) * 100
+    macro_dev = np.abs(share - goal).mean(axis=1)
+
+    return {
+        "kcal_meal_%": float(kcal_dev.mean()),
+        "kcal_meal_p95_%": float(np.percentile(kcal_dev, 95)),
+        "makro_hari_pp": float(macro_dev.mean()),
+    }
+
+
+def timeit(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(days=30, tdee=2000.0, repeat=50, seed=42):
+    catalog = get_catalog()
+    df = catalog["df"]
+    if df is None:
+        print(f"Gagal: {catalog['errors']}")
+        return
+
+    df_filtered = apply_filters(df, catalog["mapping"], True, [], [], index=catalog["index"], version=catalog["sha1"])
+    ranked = calculate_scores(df_filtered, None, precomputed=catalog_scores(df, catalog["sha1"], None))
+    pools = build_candidate_pools(ranked)
+
+    _, valid, macros = sample_meals(pools, days, np.random.default_rng(seed))
+    targets = np.broadcast_to(tdee * np.array(list(MEAL_RATIOS.values())), valid.shape[:2])
+
+    print("=" * 72)
+    print(f"   BENCHMARK PORSI: {days} hari, TDEE {tdee:.0f} kkal, {repeat} ulangan")
+    print("=" * 72)
+    print(f"{'Metode':<10} | {'Waktu (ms)':>10} | {'Dev kkal/meal':>13} | {'p95':>7} | {'Dev makro (pp)':>14}")
+    print("-" * 72)
+
+    for name, fn in (("uniform", uniform_portions), ("lsq", solve_portions)):
+        portions = fn(macros, targets, valid)
+        ms = timeit(lambda: fn(macros, targets, valid), repeat)
+        dev = deviation(macros, portions, targets)
+        print(f"{name:<10} | {ms:>10.3f} | {dev['kcal_meal_%']:>12.2f}% | "
+              f"{dev['kcal_meal_p95_%']:>6.1f}% | {dev['makro_hari_pp']:>14.2f}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan porsi seragam vs solver least squares")
+    parser.add_argument("--days", type=int, default=30, help="Jumlah hari menu")
+    parser.add_argument("--tdee", type=float, default=2000.0, help="Target kalori harian")
+    parser.add_argument("--repeat", type=int, default=50, help="Jumlah ulangan pengukuran waktu")
+    parser.add_argument("--seed", type=int, default=42, help="Seed pemilihan menu")
+    args = parser.parse_args()
+    main(days=args.days, tdee=args.tdee, repeat=args.repeat, seed=args.seed)
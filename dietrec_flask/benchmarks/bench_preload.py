@@ -0,0 +1,158 @@
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+
+# --- 1. SETUP IMPORT MODUL ---
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+
+# ============================================================
+# BENCHMARK PRELOAD SEBELUM FORK
+# Meniru master + N worker (os.fork) dalam dua mode:
+#   - "lazy"   : setiap worker meng-import app dan memuat katalog/model
+#                sendiri (gunicorn tanpa preload_app),
+#   - "preload": master meng-import app + modules.preload.preload(),
+#                worker mewarisi semuanya (gunicorn.conf.py).
+# Per worker dicatat waktu fork -> respons pertama (/result) dan memori dari
+# /proc/<pid>/smaps_rollup: RSS, PSS dan USS (private = tidak dibagi).
+# Setiap mode berjalan di proses master baru agar tidak saling memengaruhi.
+# ============================================================
+MODES = ["lazy", "preload"]
+PROFILE = {"age": "30", "weight": "65", "height": "168", "sex": "Perempuan", "activity": "sedang",
+           "goal": "maintain", "days": "7", "halal": "ya"}
+
+
+def smaps_rollup(pid="self"):
+    """{field: kB} dari /proc/<pid>/smaps_rollup (Linux)."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return out
+
+
+def serve(app_module, requests):
+    """Request pertama (+ `requests` berikutnya) lewat test client; -> (waktu selesai, ms) request pertama."""
+    client = app_module.app.test_client()
+    client.post("/input", data=PROFILE)
+    t0 = time.perf_counter()
+    client.get("/result")
+    t_first = time.perf_counter()
+    for i in range(requests):
+        client.post("/api/recalc", json={"halal": "ya", "days": 1 + i % 7, "allergies": [], "diseases": []})
+    return t_first, (t_first - t0) * 1000
+
+
+def worker(requests, app_module, result_w, release_r):
+    t_fork = time.perf_counter()
+    if app_module is None:
+        import app as app_module
+    t_first, first_ms = serve(app_module, requests)
+    ready_ms = (t_first - t_fork) * 1000
+    os.write(result_w, (json.dumps({"ready_ms": ready_ms, "first_request_ms": first_ms}) + "\n").encode())
+    os.read(release_r, 1)  # tetap hidup sampai master selesai mengukur memori
+    os._exit(0)
+
+
+def run_master(mode, workers, requests):
+    """Dijalankan di proses baru: fork `workers` worker, kumpulkan waktu & memori."""
+    app_module, info = None, None
+    t0 = time.perf_counter()
+    if mode == "preload":
+        import app as app_module
+        from modules.preload import preload
+        info = preload(app_module.app)
+    master_ms = (time.perf_counter() - t0) * 1000
+
+    result_r, result_w = os.pipe()
+    release_r, release_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(result_r)
+            os.close(release_w)
+            worker(requests, app_module, result_w, release_r)
+        pids.append(pid)
+    os.close(result_w)
+    os.close(release_r)
+
+    reader = os.fdopen(result_r)
+    timings = [json.loads(reader.readline()) for _ in pids]
+    memory = [smaps_rollup(pid) for pid in pids]
+    os.close(release_w)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    rows = []
+    for timing, mem in zip(timings, memory):
+        uss = mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0)
+        rows.append(dict(timing, rss_mb=mem.get("Rss", 0) / 1024, pss_mb=mem.get("Pss", 0) / 1024, uss_mb=uss / 1024))
+    return {"mode": mode, "master_ms": master_ms, "master_rss_mb": smaps_rollup().get("Rss", 0) / 1024,
+            "preload": info, "workers": rows}
+
+
+def measure(mode, workers, requests):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--master", mode,
+                           "--workers", str(workers), "--requests", str(requests)],
+                          cwd=ROOT_DIR, capture_output=True, text=True)
+    line = next((l for l in proc.stdout.splitlines() if l.startswith("@@")), None)
+    if proc.returncode != 0 or line is None:
+        tail = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        return {"mode": mode, "error": tail}
+    return json.loads(line[2:])
+
+
+def _mean(rows, key):
+    return sum(r[key] for r in rows) / len(rows)
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(modes=None, workers=4, requests=20, out=None):
+    modes = modes or MODES
+    results = [measure(m, workers, requests) for m in modes]
+
+    print("=" * 96)
+    print(f"   BENCHMARK PRELOAD ({workers} worker, {requests} request tambahan per worker)")
+    print("=" * 96)
+    print(f"{'Mode':<9} | {'Master (ms)':>11} | {'Siap (ms)':>9} | {'Req-1 (ms)':>10} | "
+          f"{'RSS (MB)':>8} | {'PSS (MB)':>8} | {'USS (MB)':>8} | {'Total PSS':>9}")
+    print("-" * 96)
+    for res in results:
+        if "error" in res:
+            print(f"{res['mode']:<9} | ERROR: {res['error']}")
+            continue
+        rows = res["workers"]
+        print(f"{res['mode']:<9} | {res['master_ms']:>11.1f} | {_mean(rows, 'ready_ms'):>9.1f} | "
+              f"{_mean(rows, 'first_request_ms'):>10.1f} | {_mean(rows, 'rss_mb'):>8.1f} | "
+              f"{_mean(rows, 'pss_mb'):>8.1f} | {_mean(rows, 'uss_mb'):>8.1f} | {sum(r['pss_mb'] for r in rows):>9.1f}")
+    print("=" * 96)
+    print("Siap = fork -> respons /result pertama. USS = memori privat per worker (tidak dibagi).")
+
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "workers": workers, "requests": requests,
+                       "results": results}, f, indent=2)
+        print(f"Hasil disimpan ke {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan memori & waktu siap worker dengan/tanpa preload")
+    parser.add_argument("modes", nargs="*", help=f"Mode yang diukur (default: {' '.join(MODES)})")
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah worker yang di-fork")
+    parser.add_argument("--requests", type=int, default=20, help="Request tambahan per worker sebelum diukur")
+    parser.add_argument("--out", default=None, help="File JSON hasil")
+    parser.add_argument("--master", choices=MODES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.master:
+        print("@@" + json.dumps(run_master(args.master, args.workers, args.requests)))
+    else:
+        main(modes=args.modes, workers=args.workers, requests=args.requests, out=args.out)
@@ -0,0 +1,325 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import http.cookiejar
+import urllib.error
+import urllib.parse
+import urllib.request
+import numpy as np
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ============================================================
+# LOAD TEST HTTP (IN-PROCESS ATAU LOCALHOST)
+# Setiap virtual user punya sesi sendiri (cookie jar / test client):
+# kirim form profil ke /input, lalu berulang memilih aksi sesuai bobot
+# --mix: buka /result, ubah batasan lewat /api/recalc, atau ekspor PDF
+# (202 -> polling /export_pdf/<job_id> sampai file siap). Latensi dicatat
+# per route; laporan JSON berisi throughput, persentil dan error rate,
+# dan proses keluar dengan kode 1 jika ambang --max-* dilanggar.
+# ============================================================
+PDF_E2E = "export_pdf (selesai)"
+DEFAULT_MIX = {"result": 5, "recalc": 4, "pdf": 1}
+
+# Label sama dengan dropdown input (io_utils.ALLERGY_MAP / DISEASE_MAP)
+ALLERGIES = ["Seafood", "Kacang", "Telur", "Susu Sapi", "Gluten"]
+DISEASES = ["Diabetes Melitus", "Hipertensi", "Dislipidemia (Kolesterol Tinggi)",
+            "Asam Urat (Gout)", "Penyakit Ginjal Kronis", "Dyspepsia (Maag/GERD)"]
+ACTIVITIES = ["sangat_ringan", "ringan", "sedang", "berat", "sangat_berat"]
+
+PDF_POLL_TIMEOUT = 60.0
+
+
+def make_profiles(n, seed=42):
+    """Campuran profil realistis (deterministik per seed); field = form /input."""
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(max(int(n), 1)):
+        sex = rng.choice(["Laki-laki", "Perempuan"])
+        height = round(rng.gauss(168 if sex == "Laki-laki" else 156, 7), 1)
+        bmi = min(max(rng.gauss(24, 4), 16), 40)
+        profiles.append({
+            "age": str(rng.randint(18, 70)),
+            "sex": sex,
+            "height": str(height),
+            "weight": str(round(bmi * (height / 100) ** 2, 1)),
+            "activity": rng.choices(ACTIVITIES, weights=[2, 4, 4, 2, 1])[0],
+            "goal": rng.choices(["cut", "maintain", "bulk"], weights=[4, 4, 2])[0],
+            "halal": rng.choices(["ya", "tidak"], weights=[9, 1])[0],
+            "days": str(rng.randint(1, 7)),
+            "allergies[]": rng.sample(ALLERGIES, rng.choices([0, 1, 2], weights=[6, 3, 1])[0]),
+            "diseases[]": rng.sample(DISEASES, rng.choices([0, 1, 2], weights=[5, 4, 1])[0]),
+        })
+    return profiles
+
+
+# ============================================================
+# TRANSPORT
+# ============================================================
+class InProcessClient:
+    """Flask test client (cookie sesi disimpan otomatis per client)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, form=None, json_body=None):
+        resp = self.client.open(path, method=method, data=form, json=json_body)
+        return resp.status_code, resp.headers.get("Retry-After"), resp.get_data()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """HTTP ke server yang sedang berjalan; satu cookie jar per virtual user."""
+
+    def __init__(self, base_url, timeout=60.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, method, path, form=None, json_body=None):
+        headers, data = {}, None
+        if form is not None:
+            data = urllib.parse.urlencode(form, doseq=True).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.headers.get("Retry-After"), resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get("Retry-After"), e.read()
+
+
+# ============================================================
+# VIRTUAL USER
+# ============================================================
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}     # route -> [(detik, ok)]
+        self.active = False   # False selama warmup
+
+    def add(self, route, seconds, ok):
+        if not self.active:
+            return
+        with self.lock:
+            self.samples.setdefault(route, []).append((seconds, ok))
+
+
+def _is_error(route, status, body):
+    if status >= 400:
+        return True
+    if route == "/result":
+        return body[:6] == b"Error:"
+    if route == "/api/recalc":
+        try:
+            return not json.loads(body).get("ok")
+        except ValueError:
+            return True
+    return False
+
+
+class VirtualUser:
+    def __init__(self, client, profiles, mix, recorder, rng):
+        self.client, self.profiles, self.recorder, self.rng = client, profiles, recorder, rng
+        self.actions, self.weights = zip(*mix.items())
+        self.profile = None
+
+    def call(self, route, method, path, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            status, retry_after, body = self.client.request(method, path, **kwargs)
+        except Exception as e:
+            self.recorder.add(route, time.perf_counter() - t0, False)
+            return None, None, str(e).encode()
+        self.recorder.add(route, time.perf_counter() - t0, not _is_error(route, status, body))
+        return status, retry_after, body
+
+    def login(self):
+        self.profile = self.rng.choice(self.profiles)
+        self.call("/input", "POST", "/input", form=self.profile)
+
+    def result(self):
+        self.call("/result", "GET", "/result")
+
+    def recalc(self):
+        p = self.profile
+        payload = {
+            "halal": self.rng.choice(["ya", "ya", "tidak"]) if self.rng.random() < 0.3 else p["halal"],
+            "days": str(self.rng.randint(1, 7)),
+            "allergies": self.rng.sample(ALLERGIES, self.rng.randint(0, 2)),
+            "diseases": self.rng.sample(DISEASES, self.rng.randint(0, 2)),
+        }
+        self.call("/api/recalc", "POST", "/api/recalc", json_body=payload)
+
+    def pdf(self):
+        t0 = time.perf_counter()
+        status, retry_after, body = self.call("/export_pdf", "GET", "/export_pdf")
+        deadline = t0 + PDF_POLL_TIMEOUT
+        while status == 202 and time.perf_counter() < deadline:
+            poll = json.loads(body)["poll"]
+            time.sleep(min(float(retry_after or 1), 0.25))
+            status, retry_after, body = self.call("/export_pdf/<job_id>", "GET", poll)
+        ok = status == 200 and body[:4] == b"%PDF"
+        self.recorder.add(PDF_E2E, time.perf_counter() - t0, ok)
+
+    def run(self, stop, relogin_p):
+        self.login()
+        while not stop.is_set():
+            if self.rng.random() < relogin_p:
+                self.login()
+            action = self.rng.choices(self.actions, weights=self.weights)[0]
+            getattr(self, action)()
+
+
+# ============================================================
+# LAPORAN
+# ============================================================
+def summarize(samples, elapsed):
+    routes = {}
+    total = errors = 0
+    for route, rows in samples.items():
+        lat = np.array([s for s, _ in rows]) * 1000
+        n_err = sum(1 for _, ok in rows if not ok)
+        routes[route] = {
+            "count": len(rows), "errors": n_err, "error_rate": n_err / len(rows),
+            "rps": len(rows) / elapsed,
+            "p50_ms": float(np.percentile(lat, 50)), "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)), "mean_ms": float(lat.mean()), "max_ms": float(lat.max()),
+        }
+        if route != PDF_E2E:
+            total += len(rows)
+            errors += n_err
+    return {"duration_s": elapsed, "requests": total, "rps": total / elapsed if elapsed else 0.0,
+            "error_rate": errors / total if total else 0.0, "routes": routes}
+
+
+def check_thresholds(report, max_p95, max_error_rate):
+    failures = []
+    for route, limit in max_p95.items():
+        stats = report["routes"].get(route)
+        if stats is not None and stats["p95_ms"] > limit:
+            failures.append(f"{route}: p95 {stats['p95_ms']:.1f} ms > {limit:.1f} ms")
+    if max_error_rate is not None and report["error_rate"] > max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.4f} > {max_error_rate:.4f}")
+    return failures
+
+
+def print_report(report):
+    print("=" * 96)
+    print(f"   LOAD TEST: {report['requests']} request dalam {report['duration_s']:.1f} s "
+          f"({report['rps']:.1f} req/s, error {report['error_rate'] * 100:.2f}%)")
+    print("=" * 96)
+    print(f"{'Route':<24} | {'Jumlah':>7} | {'req/s':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'Error':>7}")
+    print("-" * 96)
+    for route, s in sorted(report["routes"].items()):
+        print(f"{route:<24} | {s['count']:>7} | {s['rps']:>7.1f} | {s['p50_ms']:>8.1f} | "
+              f"{s['p95_ms']:>8.1f} | {s['p99_ms']:>8.1f} | {s['error_rate'] * 100:>6.2f}%")
+    print("=" * 96)
+
+
+def _parse_pairs(text, cast=float):
+    """"a=1,b=2" -> {"a": 1.0, "b": 2.0}."""
+    out = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            key, _, val = part.partition("=")
+            out[key.strip()] = cast(val)
+    return out
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(url=None, concurrency=4, duration=30.0, warmup=5.0, mix=None, n_profiles=200,
+         relogin=0.1, seed=42, out=None, max_p95=None, max_error_rate=None):
+    mix = mix or DEFAULT_MIX
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        print(f"ERROR: Aksi tidak dikenal di --mix: {sorted(unknown)} (pilihan: {list(DEFAULT_MIX)})")
+        return 2
+
+    if url:
+        make_client = lambda: HttpClient(url)
+        target = url
+    else:
+        try:
+            from app import app
+            from modules.scoring import load_models
+        except ImportError as e:
+            print(f"Error Import: {e}")
+            return 1
+        if load_models() is None:
+            print("[WARN] Model belum dilatih: request pertama akan memicu pelatihan latar belakang.")
+        make_client = lambda: InProcessClient(app)
+        target = "in-process"
+
+    profiles = make_profiles(n_profiles, seed)
+    recorder = Recorder()
+    stop = threading.Event()
+    users = [VirtualUser(make_client(), profiles, mix, recorder, random.Random(seed + i))
+             for i in range(max(int(concurrency), 1))]
+    threads = [threading.Thread(target=u.run, args=(stop, relogin), daemon=True) for u in users]
+
+    print(f"Target {target}: {len(users)} user, warmup {warmup:.0f} s, durasi {duration:.0f} s, mix {mix}")
+    for t in threads:
+        t.start()
+    time.sleep(max(warmup, 0.0))
+    recorder.active = True
+    t0 = time.perf_counter()
+    time.sleep(max(duration, 0.0))
+    recorder.active = False
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in threads:
+        t.join(timeout=PDF_POLL_TIMEOUT)
+
+    report = summarize(recorder.samples, elapsed)
+    report.update(target=target, concurrency=len(users), mix=mix, profiles=n_profiles, seed=seed)
+    print_report(report)
+
+    failures = check_thresholds(report, max_p95 or {}, max_error_rate)
+    report["failures"] = failures
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {out}")
+    else:
+        print(json.dumps(report))
+
+    for msg in failures:
+        print(f"[FAIL] {msg}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /result, /api/recalc dan /export_pdf")
+    parser.add_argument("--url", default=None, help="Base URL server (mis. http://127.0.0.1:5000); default: in-process")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jumlah virtual user paralel")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durasi pengukuran (detik)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Durasi warmup yang tidak dicatat (detik)")
+    parser.add_argument("--mix", default=None, help="Bobot aksi, mis. result=5,recalc=4,pdf=1")
+    parser.add_argument("--profiles", type=int, default=200, help="Jumlah profil unik yang diputar")
+    parser.add_argument("--relogin", type=float, default=0.1, help="Peluang user berganti profil tiap aksi")
+    parser.add_argument("--seed", type=int, default=42, help="Seed profil & pilihan aksi")
+    parser.add_argument("--out", default=None, help="File JSON laporan (default: cetak ke stdout)")
+    parser.add_argument("--max-p95", default=None, help="Ambang p95 per route (ms), mis. /result=200,/api/recalc=150")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Ambang error rate total (0-1)")
+    args = parser.parse_args()
+    sys.exit(main(url=args.url, concurrency=args.concurrency, duration=args.duration, warmup=args.warmup,
+                  mix=_parse_pairs(args.mix) if args.mix else None, n_profiles=args.profiles,
+                  relogin=args.relogin, seed=args.seed, out=args.out,
+                  max_p95=_parse_pairs(args.max_p95), max_error_rate=args.max_error_rate))
@@ -0,0 +1,265 @@
+import sys
+import os
+import gc
+import json
+import time
+import platform
+import argparse
+import datetime
+import subprocess
+import numpy as np
+import pandas as pd
+
+# --- 1. SETUP IMPORT MODUL ---
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+try:
+    from modules import io_utils
+    from modules.io_utils import ALLERGY_MAP, DISEASE_MAP, load_tkpi, extract_dropdown_options, _parse_tkpi
+    from modules.constraints import build_constraint_index
+    from modules.scoring import apply_filters, calculate_scores, catalog_scores, load_models
+    from modules.planner import optimize_meal_plan
+    from modules.engine import compute_engine, parse_profile, rank_candidates, _nutrition_meta, _ENGINE_CACHE
+    from modules.pdf_export import build_pdf
+    from synthetic import ensure_catalog
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# BENCHMARK SELURUH TAHAP PIPELINE
+# Setiap tahap diukur pada katalog asli (x1) dan katalog sintetis
+# (x10/x100/x1000, lihat synthetic.py). Hasil ditulis sebagai JSON
+# (satu entri per tahap/skala/parameter) agar bisa dibandingkan antar
+# commit dengan --compare.
+# ============================================================
+DEFAULT_SCALES = [1, 10, 100, 1000]
+PLAN_DAYS = [1, 7, 30, 90]
+PDF_DAYS = [7, 30]
+TDEE = 2000.0
+PROFILE = {"age": 30, "weight": 65, "height": 168, "sex": "Perempuan", "activity": "sedang",
+           "goal": "maintain", "days": 7, "halal": "ya", "allergies": "", "diseases": ""}
+
+# 0-5 batasan: bergantian alergi / penyakit
+ALLERGY_LABELS = ["Seafood", "Kacang", "Susu Sapi"]
+DISEASE_LABELS = ["Diabetes Melitus", "Hipertensi", "Dislipidemia (Kolesterol Tinggi)"]
+
+
+def constraints(k):
+    allergies = ALLERGY_LABELS[:(k + 1) // 2]
+    diseases = DISEASE_LABELS[:k // 2]
+    return allergies, diseases
+
+
+def measure(fn, repeat, budget):
+    """
+    Jalankan `fn` hingga `repeat` kali atau sampai `budget` detik habis
+    (minimal sekali). Mengembalikan (statistik ms, hasil terakhir).
+    """
+    times, result = [], None
+    t_start = time.perf_counter()
+    for _ in range(max(int(repeat), 1)):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+        if time.perf_counter() - t_start > budget:
+            break
+    arr = np.array(times)
+    stats = {"n": len(arr), "min_ms": float(arr.min()), "median_ms": float(np.median(arr)),
+             "mean_ms": float(arr.mean()), "max_ms": float(arr.max())}
+    return stats, result
+
+
+class Runner:
+    def __init__(self, repeat, budget):
+        self.repeat, self.budget = repeat, budget
+        self.results = []
+
+    def run(self, stage, scale, rows, fn, repeat=None, **params):
+        gc.collect()
+        stats, result = measure(fn, repeat or self.repeat, self.budget)
+        self.results.append({"stage": stage, "scale": scale, "rows": rows, "params": params, **stats})
+        label = stage + "".join(f" {k}={v}" for k, v in params.items())
+        print(f"  x{scale:<5} {label:<38} {stats['median_ms']:>11.3f} ms  (min {stats['min_ms']:.3f}, n={stats['n']})")
+        return result
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+# ============================================================
+# TAHAP-TAHAP
+# ============================================================
+def bench_scale(r, scale, path, bundle, seed):
+    # Load: parsing CSV (+ auto-tagging) lalu indeks batasan. x1 = salinan CSV dari TKPI asli
+    df, mapping, errs = r.run("load_parse", scale, None, lambda: _parse_tkpi(path))
+    if errs:
+        print(f"  [SKIP] Gagal parsing {path}: {errs}")
+        return
+    unmapped = sorted(k for k, col in mapping.items() if col is None)
+    if unmapped:
+        # Kolom batasan tidak dikenali = filter tidak menyaring apa pun; waktu tidak bermakna
+        print(f"  [SKIP] Kolom batasan tidak dikenali di {path}: {unmapped} (buat ulang katalog sintetis)")
+        return
+    rows = len(df)
+    r.results[-1]["rows"] = rows
+    version = f"bench-x{scale}-s{seed}"
+    index = r.run("constraint_index", scale, rows,
+                  lambda: build_constraint_index(df, mapping, ALLERGY_MAP.values(), DISEASE_MAP.values(), version))
+
+    r.run("extract_dropdown_options", scale, rows, lambda: extract_dropdown_options(df, mapping))
+
+    for k in range(6):
+        allergies, diseases = constraints(k)
+        r.run("apply_filters", scale, rows,
+              lambda: apply_filters(df, mapping, True, allergies, diseases, index=index, version=version),
+              constraints=k)
+
+    df_filtered = apply_filters(df, mapping, True, [], [], index=index, version=version)
+    r.run("calculate_scores", scale, rows, lambda: calculate_scores(df_filtered, bundle), mode="inference")
+
+    catalog = {"df": df, "mapping": mapping, "errors": [], "index": index,
+               "sha1": version}
+    scores = catalog_scores(df, catalog["sha1"], bundle)
+    ranked = r.run("calculate_scores", scale, rows,
+                   lambda: calculate_scores(df_filtered, bundle, precomputed=scores), mode="precomputed")
+
+    for days in PLAN_DAYS:
+        r.run("optimize_meal_plan", scale, rows,
+              lambda: optimize_meal_plan(ranked, TDEE, days, rng=np.random.default_rng(seed)), days=days)
+
+    # Jalur engine tanpa cache hasil (gizi -> filter -> skor -> plan) pada katalog ini
+    profile = parse_profile(PROFILE)
+
+    def engine_pipeline():
+        _, tdee_val = _nutrition_meta(profile)
+        df_ranked = rank_candidates(catalog, bundle, profile["halal"], profile["allergies"],
+                                    profile["diseases"], train_if_missing=False)
+        return optimize_meal_plan(df_ranked, tdee_val, profile["days"], rng=np.random.default_rng(seed))
+
+    r.run("engine_pipeline", scale, rows, engine_pipeline, days=profile["days"])
+
+
+def bench_app_level(r, bundle):
+    """Tahap yang memakai katalog asli proses (load_tkpi, compute_engine, PDF)."""
+    def load_cold():
+        io_utils._CATALOG = None   # paksa muat ulang (snapshot / parsing)
+        return load_tkpi()
+
+    df, _, _ = r.run("load_tkpi", 1, None, load_cold, mode="cold")
+    r.results[-1]["rows"] = len(df) if df is not None else None
+    r.run("load_tkpi", 1, r.results[-1]["rows"], load_tkpi, mode="warm")
+
+    if bundle is None:
+        # compute_engine akan memulai pelatihan latar belakang dan mengacaukan pengukuran
+        print("  [SKIP] compute_engine: model belum dilatih (jalankan train.py)")
+    else:
+        def cold():
+            _ENGINE_CACHE.clear()
+            return compute_engine(PROFILE)
+
+        r.run("compute_engine", 1, len(df), cold, mode="cold")
+        r.run("compute_engine", 1, len(df), lambda: compute_engine(PROFILE), mode="cached")
+
+    catalog = io_utils.get_catalog()
+    for days in PDF_DAYS:
+        profile = parse_profile(dict(PROFILE, days=days))
+        meta, tdee_val = _nutrition_meta(profile)
+        df_ranked = rank_candidates(catalog, bundle, True, [], [], train_if_missing=False)
+        plan = optimize_meal_plan(df_ranked, tdee_val, days, rng=np.random.default_rng(0))
+        r.run("build_pdf", 1, None, lambda: build_pdf(plan, meta), days=days)
+
+
+# ============================================================
+# PERBANDINGAN ANTAR COMMIT
+# ============================================================
+def _result_key(res):
+    return (res["stage"], res["scale"], json.dumps(res["params"], sort_keys=True))
+
+
+def compare(old_path, results):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    baseline = {_result_key(res): res for res in old["results"]}
+
+    print("=" * 84)
+    print(f"   PERBANDINGAN vs {old_path} (commit {old['env'].get('commit')})")
+    print("=" * 84)
+    print(f"{'Tahap':<48} | {'Lama (ms)':>10} | {'Baru (ms)':>10} | {'Rasio':>6}")
+    print("-" * 84)
+    for res in results:
+        base = baseline.get(_result_key(res))
+        if base is None:
+            continue
+        label = f"x{res['scale']} {res['stage']}" + "".join(f" {k}={v}" for k, v in res["params"].items())
+        ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] > 0 else float("nan")
+        print(f"{label:<48} | {base['median_ms']:>10.3f} | {res['median_ms']:>10.3f} | {ratio:>5.2f}x")
+    print("=" * 84)
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(scales=None, repeat=5, budget=5.0, out=None, data_dir=None, seed=42, compare_with=None):
+    scales = scales or DEFAULT_SCALES
+    data_dir = data_dir or os.path.join(BENCH_DIR, ".data")
+    bundle = load_models()
+    r = Runner(repeat, budget)
+    env = environment()
+    env.update(scoring="ensemble" if bundle is not None else "rule-based", seed=seed,
+               repeat=repeat, budget_s=budget)
+
+    print("=" * 84)
+    print(f"   BENCHMARK PIPELINE (commit {env['commit']}, skala {scales}, scoring {env['scoring']})")
+    print("=" * 84)
+
+    bench_app_level(r, bundle)
+    for scale in scales:
+        print(f"[x{scale}] Menyiapkan katalog...")
+        path = ensure_catalog(data_dir, scale, seed)
+        bench_scale(r, scale, path, bundle, seed)
+
+    out = out or os.path.join(data_dir, f"bench-{env['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"env": env, "results": r.results}, f, indent=2)
+    print(f"Hasil disimpan ke {out}")
+
+    if compare_with:
+        compare(compare_with, r.results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tahap pipeline pada katalog berskala")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Skala katalog dipisah koma")
+    parser.add_argument("--repeat", type=int, default=5, help="Ulangan maksimum per tahap")
+    parser.add_argument("--budget", type=float, default=5.0, help="Batas waktu (detik) per tahap; minimal 1 ulangan")
+    parser.add_argument("--out", default=None, help="File JSON hasil (default: benchmarks/.data/bench-<commit>.json)")
+    parser.add_argument("--data-dir", default=None, help="Folder katalog sintetis")
+    parser.add_argument("--seed", type=int, default=42, help="Seed katalog sintetis & planner")
+    parser.add_argument("--compare", default=None, help="JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args()
+    main(scales=[int(s) for s in args.scales.split(",") if s.strip()], repeat=args.repeat,
+         budget=args.budget, out=args.out, data_dir=args.data_dir, seed=args.seed,
+         compare_with=args.compare)
@@ -0,0 +1,151 @@
+import sys
+import os
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from modules.io_utils import DATA_DIR
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# KATALOG SINTETIS (TKPI x SKALA)
+# Baris TKPI asli diulang `scale` kali. Salinan pertama identik dengan
+# sumber; salinan berikutnya mendapat kode & nama varian, nilai gizi yang
+# digeser +-15%, serta teks HALAL/ALERGI/PENYAKIT yang diambil dari
+# distribusi teks asli (sebagian digabung "a; b; c" seperti di TKPI).
+# Kolom & format tetap format mentah TKPI, jadi file hasilnya bisa
+# diparsing oleh jalur load yang sama dengan dataset asli; hanya kolom
+# "ALLERGI" ditulis sebagai "ALERGI" agar dikenali `_parse_tkpi` (tanpa itu
+# filter alergi di benchmark tidak menyaring apa pun).
+# ============================================================
+SOURCE_FILE = DATA_DIR / "TKPI-2020.xlsx"
+
+# Kolom numerik yang digeser (nama kolom mentah TKPI)
+JITTER_COLS = ["ENERGI (Kal)", "PROTEIN (g)", "LEMAK (g)", "KH (g)"]
+JITTER = 0.15
+
+# Peluang teks batasan salinan diganti sampel baru, dan jumlah frasa per sel
+TEXT_COLS = ["HALAL", "PENYAKIT", "ALLERGI"]
+# Nama kolom mentah -> nama yang dipetakan `_parse_tkpi`
+RENAME_COLS = {"ALLERGI": "ALERGI"}
+# Naikkan jika format CSV berubah: file lama di cache tidak dipakai lagi
+CATALOG_VERSION = 2
+RESAMPLE_P = 0.5
+MAX_PHRASES = 3
+
+VARIANTS = ["olahan", "lokal", "impor", "organik", "var unggul", "rebus", "kukus", "instan"]
+
+
+def load_source(path=SOURCE_FILE) -> pd.DataFrame:
+    """Dataset TKPI mentah (sebelum standarisasi kolom)."""
+    path = Path(path)
+    if str(path).endswith(".csv"):
+        return pd.read_csv(path, sep=None, engine="python")
+    return pd.read_excel(path)
+
+
+def _phrases(col: pd.Series) -> np.ndarray:
+    """Frasa unik dari sel teks, mis. "Obesitas; Hipertensi" -> ["Obesitas", "Hipertensi"]."""
+    parts = col.dropna().astype(str).str.split(";").explode().str.strip()
+    return parts[parts != ""].unique()
+
+
+def _sample_text(col: pd.Series, n: int, rng: np.random.Generator) -> np.ndarray:
+    """n sel baru: sampel nilai asli (menjaga distribusi), sebagian digabung dari 1-3 frasa."""
+    values = col.dropna().astype(str).to_numpy()
+    phrases = _phrases(col)
+    out = rng.choice(values, size=n).astype(object)
+
+    combine = rng.random(n) < 0.3
+    k = rng.integers(1, MAX_PHRASES + 1, size=n)
+    for i in np.flatnonzero(combine):
+        out[i] = "; ".join(rng.choice(phrases, size=k[i], replace=False))
+    return out
+
+
+def scale_catalog(df: pd.DataFrame, scale: int, seed: int = 42) -> pd.DataFrame:
+    """Perbesar katalog menjadi len(df) * scale baris (deterministik per seed)."""
+    scale = max(int(scale), 1)
+    rng = np.random.default_rng(seed)
+    n = len(df)
+
+    out = df.iloc[np.tile(np.arange(n), scale)].reset_index(drop=True)
+    if scale == 1:
+        return out.rename(columns=RENAME_COLS)
+
+    copy_no = np.repeat(np.arange(scale), n)
+    synth = copy_no > 0
+    m = int(synth.sum())
+
+    if "KODE" in out.columns:
+        out.loc[synth, "KODE"] = out.loc[synth, "KODE"].astype(str) + "-" + copy_no[synth].astype(str)
+    name_col = next((c for c in out.columns if "NAMA" in str(c).upper()), None)
+    if name_col is not None:
+        variant = rng.choice(VARIANTS, size=m)
+        out.loc[synth, name_col] = (out.loc[synth, name_col].astype(str) + " " + variant
+                                    + " " + copy_no[synth].astype(str))
+
+    for col in JITTER_COLS:
+        if col in out.columns:
+            vals = out[col].astype(str).str.replace(",", ".", regex=False)
+            vals = pd.to_numeric(vals, errors="coerce").astype(float)
+            factor = rng.uniform(1 - JITTER, 1 + JITTER, size=m)
+            vals[synth] = (vals[synth] * factor).round(1)
+            out[col] = vals
+
+    for col in TEXT_COLS:
+        if col in df.columns:
+            resample = np.zeros(len(out), dtype=bool)
+            resample[synth] = rng.random(m) < RESAMPLE_P
+            out.loc[resample, col] = _sample_text(df[col], int(resample.sum()), rng)
+
+    return out.rename(columns=RENAME_COLS)
+
+
+def write_catalog(df: pd.DataFrame, path) -> Path:
+    """Tulis katalog sintetis sebagai CSV (format yang diterima `_parse_tkpi`)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def synthetic_path(out_dir, scale: int, seed: int = 42) -> Path:
+    return Path(out_dir) / f"TKPI-x{int(scale)}-s{int(seed)}-v{CATALOG_VERSION}.csv"
+
+
+def ensure_catalog(out_dir, scale: int, seed: int = 42, source: pd.DataFrame | None = None) -> Path:
+    """Path CSV sintetis untuk (skala, seed); dibuat jika belum ada."""
+    path = synthetic_path(out_dir, scale, seed)
+    if not path.exists():
+        base = source if source is not None else load_source()
+        write_catalog(scale_catalog(base, scale, seed), path)
+    return path
+
+
+# ============================================================
+# MAIN PROGRAM
+# ============================================================
+def main(scales, out_dir, seed=42):
+    source = load_source()
+    for scale in scales:
+        path = ensure_catalog(out_dir, scale, seed, source=source)
+        print(f"x{scale:<5} -> {path} ({len(source) * scale} baris, {path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buat katalog TKPI sintetis berskala")
+    parser.add_argument("--scales", default="10,100,1000", help="Daftar skala dipisah koma")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data"),
+                        help="Folder output CSV")
+    parser.add_argument("--seed", type=int, default=42, help="Seed generator")
+    args = parser.parse_args()
+    main([int(s) for s in args.scales.split(",") if s.strip()], args.out, seed=args.seed)
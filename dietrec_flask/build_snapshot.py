@@ -0,0 +1,36 @@
+import sys
+import os
+import time
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from modules.io_utils import build_snapshot, get_catalog
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# MAIN PROGRAM
+# Membangun snapshot columnar dari TKPI-2020.xlsx (ingest step).
+# Server juga membangunnya otomatis saat snapshot tidak ada / basi.
+# ============================================================
+def main():
+    t0 = time.perf_counter()
+    snap_dir, errs = build_snapshot()
+    if errs:
+        print(f"Gagal: {errs}")
+        return
+    t_build = time.perf_counter() - t0
+    print(f"Snapshot ditulis ke {snap_dir} ({t_build * 1000:.1f} ms, termasuk parsing Excel)")
+
+    t0 = time.perf_counter()
+    entry = get_catalog()
+    t_load = time.perf_counter() - t0
+    print(f"Muat ulang dari snapshot: {t_load * 1000:.1f} ms ({len(entry['df'])} baris)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,20 @@
 import sys
 import os
+import argparse
 import pandas as pd
 import numpy as np
 import joblib
 
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-# >>> TAMBAHAN UNTUK CROSS VALIDATION <<<
-from sklearn.model_selection import KFold
-
 
 # --- 1. SETUP IMPORT MODUL ---
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from modules.io_utils import load_tkpi
+    from modules.features import macro_arrays, rule_features
+    from modules.cv import run_cv
 except ImportError as e:
     print(f"Error Import: {e}")
     exit(1)
@@ -27,29 +27,16 @@ def calculate_all_features(df, target_kcal=2000):
     Skor ini digunakan sebagai target evaluasi surrogate model.
     """
     df_calc = df.copy()
-    eps = 1e-9
 
     cols = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
-    for c in cols:
-        if c not in df_calc.columns:
-            df_calc[c] = 0.0
-        df_calc[c] = pd.to_numeric(df_calc[c], errors='coerce').fillna(0.0)
-
-    # Target distribusi makro (heuristic)
-    t_K = (0.5 * target_kcal) / 4
-    t_P = (0.2 * target_kcal) / 4
-    t_L = (0.3 * target_kcal) / 9
-
-    # Deviasi relatif
-    dev_E = (df_calc["ENERGI"] - target_kcal).abs() / (target_kcal + eps)
-    dev_P = (df_calc["PROTEIN"] - t_P).abs() / (t_P + eps)
-    dev_L = (df_calc["LEMAK"] - t_L).abs() / (t_L + eps)
-    dev_K = (df_calc["KARBO"] - t_K).abs() / (t_K + eps)
-
-    # Skor rule-based
-    df_calc["S_ENERGY"] = 0.4 * dev_E
-    df_calc["S_MACRO"] = (0.3 * dev_P) + (0.2 * dev_L) + (0.1 * dev_K)
-    df_calc["S_RULE"] = df_calc["S_ENERGY"] + df_calc["S_MACRO"]
+    e, p, l, k = macro_arrays(df_calc)
+    for c, arr in zip(cols, (e, p, l, k)):
+        df_calc[c] = arr
+
+    # Skor rule-based (vektor, lihat modules/features.py)
+    feats = rule_features(e, p, l, k, target_kcal)
+    for name in ("S_ENERGY", "S_MACRO", "S_RULE"):
+        df_calc[name] = feats[name]
 
     return df_calc
 
@@ -76,7 +63,7 @@ def smart_predict(model, df_full):
 # ============================================================
 # MAIN PROGRAM
 # ============================================================
-def main():
+def main(n_jobs=-1):
     print("=" * 60)
     print("   SKRIPSI: EVALUASI PERFORMA MODEL (MAE, RMSE, R2 + CV)")
     print("=" * 60)
@@ -154,11 +141,6 @@ def main():
     # ============================================================
     print("\n[5/5] Menjalankan 5-Fold Cross Validation (Ensemble)...")
 
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
-
-    cv_r2_scores = []
-    cv_rmse_scores = []
-
     # Gunakan fitur lengkap sesuai rule-based scoring
     X_full = df_complete[[
         "ENERGI", "PROTEIN", "LEMAK", "KARBO",
@@ -167,37 +149,24 @@ def main():
 
     y_full = y_true.reset_index(drop=True)
 
-    fold = 1
-    for train_idx, test_idx in kf.split(X_full):
-        X_train, X_test = X_full.iloc[train_idx], X_full.iloc[test_idx]
-        y_train, y_test = y_full.iloc[train_idx], y_full.iloc[test_idx]
-
-        # Train ulang model tiap fold
-        rf_fold = rf_model.__class__(**rf_model.get_params())
-        xgb_fold = xgb_model.__class__(**xgb_model.get_params())
-
-        rf_fold.fit(X_train, y_train)
-        xgb_fold.fit(X_train, y_train)
+    # Setiap fold melatih RF & XGB sekali, paralel antar fold
+    cv = run_cv({"rf": rf_model, "xgb": xgb_model}, X_full, y_full,
+                n_splits=5, n_jobs=n_jobs, random_state=42)
 
-        # Ensemble prediction fold
-        pred_rf_fold = rf_fold.predict(X_test)
-        pred_xgb_fold = xgb_fold.predict(X_test)
-
-        pred_ens_fold = 0.5 * pred_rf_fold + 0.5 * pred_xgb_fold
-
-        # Hitung metrik fold
-        r2_fold = r2_score(y_test, pred_ens_fold)
-        rmse_fold = np.sqrt(mean_squared_error(y_test, pred_ens_fold))
-
-        cv_r2_scores.append(r2_fold)
-        cv_rmse_scores.append(rmse_fold)
-
-        print(f"Fold-{fold} | R² = {r2_fold:.5f} | RMSE = {rmse_fold:.5f}")
-        fold += 1
+    for f in cv["folds"]:
+        ens = f["metrics"]["ensemble"]
+        fit_s = sum(t["fit_s"] for t in f["timing"].values())
+        pred_s = sum(t["predict_s"] for t in f["timing"].values())
+        print(f"Fold-{f['fold']} | R² = {ens['r2']:.5f} | RMSE = {ens['rmse']:.5f} | MAE = {ens['mae']:.5f}"
+              f" | fit {fit_s:.2f}s | predict {pred_s * 1000:.1f}ms")
 
     print("\n--- Rata-rata Cross Validation ---")
-    print("Mean R²   :", np.mean(cv_r2_scores).round(5))
-    print("Mean RMSE :", np.mean(cv_rmse_scores).round(5))
+    print(f"{'MODEL':<15} | {'MAE':<12} | {'RMSE':<12} | {'R2 Score':<12}")
+    print("-" * 85)
+    for name, label in (("rf", "Random Forest"), ("xgb", "XGBoost"), ("ensemble", "Ensemble")):
+        m = cv["mean"][name]
+        print(f"{label:<15} | {m['mae']:.5f}     | {m['rmse']:.5f}     | {m['r2']:.5f}")
+    print(f"\nWaktu total CV: {cv['wall_s']:.2f}s (n_jobs={n_jobs})")
     print("=" * 85)
 
 
@@ -205,4 +174,7 @@ def main():
 # RUN SCRIPT
 # ============================================================
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Evaluasi performa model (MAE, RMSE, R2 + CV)")
+    parser.add_argument("--jobs", type=int, default=-1, help="Jumlah proses paralel untuk CV (-1 = semua core)")
+    args = parser.parse_args()
+    main(n_jobs=args.jobs)
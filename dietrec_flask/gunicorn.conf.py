@@ -0,0 +1,28 @@
+# FILE: gunicorn.conf.py
+# Jalankan: gunicorn -c gunicorn.conf.py app:app
+import os
+
+# ==============================================================================
+# KONFIGURASI GUNICORN (MULTI-WORKER, PRELOAD SEBELUM FORK)
+# preload_app=True: app di-import sekali di master. Hook when_ready lalu
+# memanggil modules.preload.preload() (katalog, indeks, model, skor, template,
+# ReportLab + gc.freeze) sebelum worker pertama di-fork, sehingga semua
+# worker berbagi halaman memori yang sama (copy-on-write) dan worker baru
+# (restart / max_requests) langsung siap tanpa parsing atau unpickle.
+# ==============================================================================
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+
+def when_ready(server):
+    """Master siap, worker belum di-fork: bangun state bersama lalu bekukan GC."""
+    from app import app
+    from modules.preload import preload
+
+    info = preload(app)
+    server.log.info("Preload selesai: %s", info)
@@ -1,4 +1,4 @@
 # [Ref: Bab 3.4.3 Struktur Sistem]
 # Mengintegrasikan modul io, perhitungan, scoring, dan planner.
 
-__all__ = ["io_utils", "calc_utils", "scoring", "planner"]
\ No newline at end of file
+__all__ = ["io_utils", "calc_utils", "scoring", "planner", "snapshot", "constraints", "registry", "features", "cv", "tree_engine", "portions", "cache", "engine", "pdf_export", "metrics", "profiling", "training", "preload", "workers"]
\ No newline at end of file
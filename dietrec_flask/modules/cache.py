@@ -0,0 +1,102 @@
+# FILE: modules/cache.py
+from __future__ import annotations
+from typing import Any, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+# ==============================================================================
+# CACHE LRU + TTL (THREAD-SAFE)
+# Ukuran dibatasi (entri tertua yang paling lama tidak dipakai dibuang) dan
+# setiap entri kedaluwarsa setelah `ttl` detik. Aman dipakai bersama oleh
+# thread request Flask.
+# ==============================================================================
+
+class LRUCache:
+    def __init__(self, maxsize: int = 256, ttl: float | None = 900.0):
+        self.maxsize = max(int(maxsize), 0)
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _discard(self, value: Any) -> None:
+        """Dipanggil (dengan lock dipegang) untuk setiap nilai yang dibuang dari cache."""
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        # Cek kedaluwarsa, pembuangan dan lookup dalam satu critical section
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] is not None and entry[0] <= now):
+                if entry is not None:
+                    del self._data[key]
+                    self._discard(entry[1])
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._discard(self._data.popitem(last=False)[1][1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._stats()
+
+
+class ByteLRUCache(LRUCache):
+    """
+    Varian LRUCache yang dibatasi total ukuran nilai (bytes), bukan jumlah
+    entri. Nilai yang lebih besar dari `max_bytes` tidak disimpan.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, ttl: float | None = None):
+        super().__init__(maxsize=1, ttl=ttl)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.total_bytes = 0
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._discard(old[1])
+            self._data[key] = (expires, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._discard(self._data.popitem(last=False)[1][1])
+
+    def _discard(self, value: bytes) -> None:
+        self.total_bytes -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def _stats(self) -> dict:
+        return dict(super()._stats(), maxsize=None, bytes=self.total_bytes, max_bytes=self.max_bytes)
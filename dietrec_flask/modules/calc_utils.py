@@ -1,5 +1,7 @@
 from __future__ import annotations
 from typing import Tuple
+import numpy as np
+import pandas as pd
 
 # ==============================================================================
 # MODUL PERHITUNGAN GIZI PERSONAL
@@ -88,4 +90,73 @@ def bmi_and_category(weight_kg: float, height_cm: float) -> Tuple[float, str]:
     else:
         cat = "Obese"
         
-    return r_bmi, cat
\ No newline at end of file
+    return r_bmi, cat
+
+
+# ==============================================================================
+# VERSI ARRAY (KOHORT)
+# Padanan vektor dari fungsi di atas untuk banyak user sekaligus (numpy array
+# atau kolom DataFrame). Hasil identik dengan versi skalar, termasuk aturan
+# string jenis kelamin/aktivitas/tujuan dan pembulatan BMI ala round(x, 1).
+# ==============================================================================
+
+def _norm_str(values, default: str = "") -> pd.Series:
+    """Kolom teks -> Series huruf kecil; None/NaN/"" diganti `default` (seperti `x or default`)."""
+    s = pd.Series(np.asarray(values, dtype=object).ravel(), dtype=object)
+    s = s.where(s.notna() & (s != ""), default)
+    return s.astype(str).str.lower()
+
+def mifflin_st_jeor_array(sex, weight_kg, height_cm, age_years) -> np.ndarray:
+    """BMR Mifflin-St Jeor per baris (lihat `mifflin_st_jeor`)."""
+    sex_norm = _norm_str(sex).str.strip()
+    male = (sex_norm.str.startswith("l") | (sex_norm == "pria") | (sex_norm == "male")).to_numpy()
+
+    w = np.asarray(weight_kg, dtype=float)
+    h = np.asarray(height_cm, dtype=float)
+    a = np.asarray(age_years, dtype=float)
+    base = (10 * w) + (6.25 * h) - (5 * a)
+    return np.where(male, base + 5, base - 161)
+
+def tdee_array(bmr, activity) -> np.ndarray:
+    """TDEE = BMR x PAL per baris; aktivitas tidak dikenal -> 1.55."""
+    key = _norm_str(activity, "sedang").str.replace(" ", "_", regex=False)
+    pal = key.map(PAL_MAP).fillna(1.55).to_numpy(dtype=float)
+    return np.asarray(bmr, dtype=float) * pal
+
+def tdee_with_goal_array(bmr, activity, goal) -> np.ndarray:
+    """Penyesuaian TDEE per tujuan diet (lihat `tdee_with_goal`)."""
+    base_tdee = tdee_array(bmr, activity)
+    g = _norm_str(goal, "maintain")
+
+    cut = (g.str.contains("turun", regex=False) | g.str.contains("cut", regex=False)).to_numpy()
+    bulk = (g.str.contains("naik", regex=False) | g.str.contains("bulk", regex=False)).to_numpy()
+    return np.where(cut, base_tdee * 0.85, np.where(bulk, base_tdee * 1.15, base_tdee))
+
+def round1(x) -> np.ndarray:
+    """
+    Persis `round(v, 1)` Python untuk setiap elemen (dipakai juga planner).
+
+    np.round (x*10 lalu rint) hanya bisa berbeda dari round() Python di dekat
+    titik tengah .x5, jadi nilai di sekitar titik tengah dibulatkan ulang
+    dengan round() (pembulatan desimal eksak, half-even).
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.array(np.round(x, 1))
+    with np.errstate(invalid="ignore"):
+        near = np.abs(x * 10 - np.floor(x * 10) - 0.5) < 1e-6
+    if near.any():
+        out[near] = [round(v, 1) for v in x[near].tolist()]
+    return out
+
+def bmi_and_category_array(weight_kg, height_cm) -> Tuple[np.ndarray, np.ndarray]:
+    """BMI (dibulatkan 1 desimal) dan kategori Asia Pasifik per baris."""
+    h_m = np.asarray(height_cm, dtype=float) / 100.0
+    bmi = np.asarray(weight_kg, dtype=float) / (h_m * h_m + 1e-9)
+    r_bmi = round1(bmi)
+
+    cat = np.select(
+        [r_bmi < 18.5, r_bmi <= 22.9, r_bmi <= 24.9],
+        ["Underweight", "Normal", "Overweight"],
+        default="Obese",
+    ).astype(object)
+    return r_bmi, cat
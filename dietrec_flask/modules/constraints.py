@@ -0,0 +1,105 @@
+# FILE: modules/constraints.py
+from __future__ import annotations
+from typing import Dict, List, Any, Iterable
+import pandas as pd
+import numpy as np
+
+# ==============================================================================
+# INDEKS BATASAN (HALAL / ALERGI / PENYAKIT)
+# Dibangun sekali saat katalog dimuat. Setiap makanan mendapat:
+#   - flag halal (bool),
+#   - bitset uint64: satu bit per label alergi/penyakit yang dikenal
+#     (bit menyala = teks kolom mengandung label tsb -> makanan harus dibuang).
+# Filtering per request cukup satu operasi mask bitwise di numpy.
+# ==============================================================================
+MAX_LABELS = 64
+
+def build_constraint_index(
+    df: pd.DataFrame,
+    mapping: Dict[str, str],
+    allergy_labels: Iterable[str],
+    disease_labels: Iterable[str],
+    version: str | None = None
+) -> Dict[str, Any]:
+    """
+    Membangun indeks batasan per makanan.
+
+    Aturan pencocokan identik dengan filter lama: substring case-insensitive
+    terhadap `str(cell)` (NaN menjadi "nan"). `version` = versi katalog asal
+    (sha1 file); indeks hanya dipakai ulang untuk versi yang sama.
+    """
+    n = len(df)
+    bits = np.zeros(n, dtype=np.uint64)
+    label_bits: Dict[str, Dict[str, int]] = {"allergy": {}, "penyakit": {}}
+    texts: Dict[str, pd.Series] = {}
+
+    col_h = mapping.get("halal")
+    if col_h and col_h in df.columns:
+        halal = df[col_h].astype(str).str.contains("halal", case=False, na=False).to_numpy()
+    else:
+        halal = np.ones(n, dtype=bool)
+
+    next_bit = 0
+    for kind, labels in (("allergy", allergy_labels), ("penyakit", disease_labels)):
+        col = mapping.get(kind)
+        if not col or col not in df.columns:
+            continue
+
+        lower = df[col].astype(str).str.lower()
+        texts[kind] = lower
+
+        for label in sorted({str(l).lower() for l in labels}):
+            if next_bit >= MAX_LABELS:
+                break  # Label sisanya ditangani jalur fallback di filter_indices
+            hit = lower.str.contains(label, regex=False).to_numpy()
+            bits[hit] |= np.uint64(1) << np.uint64(next_bit)
+            label_bits[kind][label] = next_bit
+            next_bit += 1
+
+    for arr in (bits, halal):
+        arr.flags.writeable = False
+
+    return {
+        "version": version,
+        "rows": n,
+        "halal": halal,
+        "has_halal": bool(col_h and col_h in df.columns),
+        "bits": bits,
+        "label_bits": label_bits,
+        "texts": texts,
+    }
+
+def filter_indices(
+    index: Dict[str, Any],
+    halal_pref: bool,
+    allergies: List[str],
+    diseases: List[str]
+) -> np.ndarray:
+    """
+    Mengembalikan posisi baris (np.ndarray int) yang lolos semua batasan.
+
+    Label yang tidak ada di indeks (input bebas dari API) dicocokkan langsung
+    ke teks kolom yang sudah di-lowercase, dengan aturan yang sama.
+    """
+    mask = np.ones(index["rows"], dtype=bool)
+
+    if halal_pref and index["has_halal"]:
+        mask &= index["halal"]
+
+    required = 0
+    for kind, selected in (("allergy", allergies), ("penyakit", diseases)):
+        if not selected or kind not in index["texts"]:
+            continue
+        known = index["label_bits"][kind]
+        for label in selected:
+            key = str(label).lower()
+            bit = known.get(key)
+            if bit is not None:
+                required |= 1 << bit
+            else:
+                mask &= ~index["texts"][kind].str.contains(key, regex=False).to_numpy()
+
+    if required:
+        mask &= (index["bits"] & np.uint64(required)) == 0
+
+    return np.flatnonzero(mask)
@@ -0,0 +1,315 @@
+# FILE: modules/engine.py
+from __future__ import annotations
+from typing import Dict, Any, Iterator, List, Tuple
+import hashlib
+import json
+import traceback
+import numpy as np
+
+from modules.io_utils import get_catalog
+from modules.calc_utils import (mifflin_st_jeor, tdee_with_goal, bmi_and_category,
+                                mifflin_st_jeor_array, tdee_with_goal_array, bmi_and_category_array)
+from modules.scoring import apply_filters, calculate_scores, catalog_scores, load_models, train_models, RULE_BASED_VERSION
+from modules.planner import build_candidate_pools, optimize_meal_plan, optimize_meal_plans
+from modules.registry import start_background_training
+from modules.cache import LRUCache
+from modules.metrics import span, annotate
+
+# ==============================================================================
+# CORE LOGIC (BACKEND ENGINE)
+# Hasil compute_engine di-memo per profil ternormalisasi + versi katalog +
+# versi model. RNG planner di-seed dari hash profil, sehingga /result,
+# /export_pdf dan /api/recalc untuk profil yang sama selalu memberi plan
+# yang identik (dan biasanya langsung dari cache).
+# ==============================================================================
+ENGINE_CACHE_SIZE = 256
+ENGINE_CACHE_TTL = 900  # detik
+
+_ENGINE_CACHE = LRUCache(maxsize=ENGINE_CACHE_SIZE, ttl=ENGINE_CACHE_TTL)
+
+# Jumlah profil per panggilan solver porsi dalam plan_batch
+BATCH_CHUNK = 32
+
+# Rentang jumlah hari plan; memori dan waktu planner sebanding dengan hari
+MIN_DAYS = 1
+MAX_DAYS = 90
+
+NO_CANDIDATES_ERROR = "Tidak ada menu yang lolos filter (Cek batasan Alergi/Penyakit)."
+
+
+def _norm_list(val) -> List[str]:
+    """Input list/CSV menjadi list unik terurut (urutan tidak memengaruhi filter)."""
+    if isinstance(val, list):
+        items = [str(x).strip() for x in val]
+    elif isinstance(val, str):
+        items = [x.strip() for x in val.split(",")]
+    else:
+        items = []
+    return sorted(set(x for x in items if x))
+
+
+def parse_profile(form_data: dict) -> Dict[str, Any]:
+    """
+    Parsing input form menjadi profil kanonik. Nilai yang tidak valid
+    memunculkan ValueError/TypeError seperti parsing sebelumnya; jumlah hari
+    harus dalam [MIN_DAYS, MAX_DAYS].
+    """
+    days = int(form_data.get("days", 3))
+    if not MIN_DAYS <= days <= MAX_DAYS:
+        raise ValueError(f"jumlah hari harus {MIN_DAYS}-{MAX_DAYS} (diterima {days})")
+    return {
+        "age": int(form_data.get("age", 25)),
+        "weight": float(form_data.get("weight", 60)),
+        "height": float(form_data.get("height", 170)),
+        "days": days,
+        "sex": str(form_data.get("sex", "Laki-laki")).strip(),
+        "activity": str(form_data.get("activity", "sedang")).strip(),
+        "goal": str(form_data.get("goal", "maintain")).strip(),
+        "halal": str(form_data.get("halal", "ya")).lower() == "ya",
+        "allergies": _norm_list(form_data.get("allergies")),
+        "diseases": _norm_list(form_data.get("diseases")),
+    }
+
+
+def requested_days(forms: List[dict]) -> int:
+    """Total hari yang diminta `forms`; baris tidak valid (dilaporkan per baris oleh plan_batch) tidak dihitung."""
+    total = 0
+    for form in forms:
+        try:
+            total += parse_profile(form)["days"]
+        except Exception:
+            continue
+    return total
+
+
+def profile_hash(profile: Dict[str, Any]) -> str:
+    """SHA-256 dari JSON kanonik profil (key terurut, tanpa spasi)."""
+    blob = json.dumps(profile, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _ENGINE_CACHE.stats()
+
+
+def _nutrition_meta(profile: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """Perhitungan Gizi (Bab 2.5): meta profil + TDEE target."""
+    bmr = mifflin_st_jeor(profile["sex"], profile["weight"], profile["height"], profile["age"])
+    tdee_val = tdee_with_goal(bmr, profile["activity"], profile["goal"])
+    bmi, bmi_cat = bmi_and_category(profile["weight"], profile["height"])
+    return _build_meta(profile, bmr, tdee_val, bmi, bmi_cat), tdee_val
+
+
+def _nutrition_metas(profiles: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], float]]:
+    """Versi kohort `_nutrition_meta`: gizi seluruh profil dihitung dalam satu pass array."""
+    cols = {k: [p[k] for p in profiles] for k in ("sex", "weight", "height", "age", "activity", "goal")}
+    bmr = mifflin_st_jeor_array(cols["sex"], cols["weight"], cols["height"], cols["age"])
+    tdee_val = tdee_with_goal_array(bmr, cols["activity"], cols["goal"])
+    bmi, bmi_cat = bmi_and_category_array(cols["weight"], cols["height"])
+    return [(_build_meta(p, *vals), vals[1])
+            for p, vals in zip(profiles, zip(bmr.tolist(), tdee_val.tolist(), bmi.tolist(), bmi_cat))]
+
+
+def _build_meta(profile: Dict[str, Any], bmr: float, tdee_val: float, bmi: float, bmi_cat: str) -> Dict[str, Any]:
+    return {
+        "age": profile["age"], "sex": profile["sex"],
+        "weight": profile["weight"], "height": profile["height"],
+        "bmr": round(bmr, 0), "tdee": round(tdee_val, 0),
+        "bmi": bmi, "bmi_cat": bmi_cat,
+        "activity": profile["activity"], "goal": profile["goal"], "days": profile["days"],
+        "halal": "Ya" if profile["halal"] else "Tidak",
+        "allergies": profile["allergies"], "diseases": profile["diseases"]
+    }
+
+
+def _model_version(bundle) -> str:
+    return RULE_BASED_VERSION if bundle is None else bundle["version"]
+
+
+def _plan_key(p_hash: str, catalog: Dict[str, Any], bundle) -> str:
+    return hashlib.sha256(f"{p_hash}:{catalog['sha1']}:{_model_version(bundle)}".encode()).hexdigest()
+
+
+def _profile_rng(p_hash: str) -> np.random.Generator:
+    """RNG planner deterministik per profil."""
+    return np.random.default_rng(int(p_hash[:16], 16))
+
+
+def rank_candidates(catalog: Dict[str, Any], bundle, halal: bool,
+                    allergies: List[str], diseases: List[str], train_if_missing: bool = True):
+    """
+    LAPISAN 1 + 2: filter rule-based lalu urutkan dengan skor ensemble
+    (atau rule-based jika model belum ada). Hasil kosong jika tidak ada
+    menu yang lolos filter. `train_if_missing=False` mencegah pelatihan
+    latar belakang (mis. di worker batch).
+    """
+    df, mapping = catalog["df"], catalog["mapping"]
+    with span("apply_filters"):
+        df_filtered = apply_filters(df, mapping, halal, allergies, diseases,
+                                    index=catalog["index"], version=catalog["sha1"])
+    if df_filtered.empty:
+        return df_filtered
+
+    if bundle is None and train_if_missing:
+        # Pelatihan tidak boleh memblokir request: jalankan di latar belakang
+        # dan layani dulu dengan skor rule-based (pseudo-label)
+        if start_background_training(train_models, df):
+            print("[INFO] Model belum ditemukan. Melatih model di latar belakang...")
+
+    # Skor seluruh katalog dihitung sekali per versi katalog+model, lalu diiris
+    with span("calculate_scores"):
+        scores = catalog_scores(df, catalog["sha1"], bundle)
+        return calculate_scores(df_filtered, bundle, precomputed=scores)
+
+
+def _resolve(form_data: dict) -> Tuple[Dict[str, Any], str, Dict[str, Any], Any, str]:
+    """Profil kanonik, hash profil, katalog, bundle model dan key cache plan."""
+    with span("parse_input"):
+        profile = parse_profile(form_data)
+        p_hash = profile_hash(profile)
+    annotate(days=profile["days"])
+
+    with span("load_tkpi"):
+        catalog = get_catalog()
+    with span("load_models"):
+        bundle = load_models()
+    return profile, p_hash, catalog, bundle, _plan_key(p_hash, catalog, bundle)
+
+
+def lookup_cached(form_data: dict) -> Tuple[str, Tuple[Dict[str, Any], Dict[str, Any]] | None]:
+    """
+    Key plan + entri cache (res, meta) tanpa menjalankan pipeline, untuk
+    pemanggil yang menjalankan compute_engine di proses lain (modules.workers).
+    Input tidak valid memunculkan ValueError/TypeError.
+    """
+    key = _resolve(form_data)[-1]
+    cached = _ENGINE_CACHE.get(key)
+    if cached is not None:
+        annotate(cache="hit", candidates=cached[1]["count_candidates"])
+        return key, (cached[0], dict(cached[1]))
+    return key, None
+
+
+def store_cached(key: str, res: Dict[str, Any], meta: Dict[str, Any]) -> None:
+    _ENGINE_CACHE.put(key, (res, dict(meta)))
+
+
+def compute_engine(form_data: dict) -> Tuple[Dict[str, Any] | None, Dict[str, Any], List[str]]:
+    """
+    Menjalankan pipeline lengkap (gizi -> filter -> scoring -> planning).
+    Mengembalikan (res, meta, errors); res = {"ranked", "plan", "key"}.
+    `res` dipakai bersama antar request dari cache: perlakukan sebagai read-only.
+    """
+    try:
+        # 1. Parsing Input User
+        profile, p_hash, catalog, bundle, key = _resolve(form_data)
+
+        cached = _ENGINE_CACHE.get(key)
+        if cached is not None:
+            res, meta = cached
+            annotate(cache="hit", candidates=meta["count_candidates"])
+            return res, dict(meta), []
+        annotate(cache="miss")
+
+        # 2. Perhitungan Gizi (Bab 2.5)
+        with span("nutrition"):
+            meta, tdee_val = _nutrition_meta(profile)
+
+        # 3. Load Dataset & Filtering + Scoring (Bab 3, Hybrid System)
+        if catalog["errors"]: return None, meta, catalog["errors"]
+
+        df_ranked = rank_candidates(catalog, bundle, profile["halal"], profile["allergies"], profile["diseases"])
+        meta["count_candidates"] = len(df_ranked)
+        annotate(candidates=len(df_ranked))
+        if df_ranked.empty:
+            return None, meta, [NO_CANDIDATES_ERROR]
+        meta["scoring"] = "ensemble" if bundle is not None else "rule-based"
+
+        # LAPISAN 3: Meal Planning (RNG deterministik per profil)
+        with span("optimize_meal_plan"):
+            plan = optimize_meal_plan(df_ranked, tdee_val, profile["days"], rng=_profile_rng(p_hash))
+
+        res = {"ranked": df_ranked, "plan": plan, "key": key}
+        _ENGINE_CACHE.put(key, (res, meta))
+        return res, dict(meta), []
+
+    except Exception as e:
+        traceback.print_exc()
+        return None, {}, [f"System Error: {str(e)}"]
+
+
+# ==============================================================================
+# BATCH (KOHORT)
+# Profil dikelompokkan per batasan identik (halal, alergi, penyakit): filter,
+# scoring dan kandidat per kelas dihitung sekali per kelompok; gizi (versi
+# array) dan porsi dihitung per chunk profil. Plan identik dengan
+# compute_engine untuk profil yang sama (seed RNG sama). Hasil batch tidak
+# dimasukkan ke cache interaktif agar tidak mengusir entri pengguna web.
+# ==============================================================================
+def plan_batch(forms: List[dict], train_if_missing: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Menghasilkan satu dict per profil segera setelah selesai:
+    {"index", "ok": True, "key", "meta", "plan"} atau {"index", "ok": False, "error"}.
+    Profil tidak valid (termasuk jumlah hari di luar MIN_DAYS-MAX_DAYS)
+    menjadi baris error tanpa menggagalkan profil lain.
+    Urutan keluaran mengikuti kelompok; gunakan "index" untuk memetakan ke input.
+    """
+    groups: Dict[Tuple, List[Tuple[int, Dict[str, Any]]]] = {}
+    for i, form in enumerate(forms):
+        try:
+            if not isinstance(form, dict):
+                raise TypeError("profil harus berupa objek")
+            profile = parse_profile(form)
+        except Exception as e:
+            yield {"index": i, "ok": False, "error": f"Input tidak valid: {e}"}
+            continue
+        constraint = (profile["halal"], tuple(profile["allergies"]), tuple(profile["diseases"]))
+        groups.setdefault(constraint, []).append((i, profile))
+
+    if not groups:
+        return
+
+    catalog = get_catalog()
+    bundle = load_models()
+    if catalog["errors"]:
+        for members in groups.values():
+            for i, _ in members:
+                yield {"index": i, "ok": False, "error": "; ".join(catalog["errors"])}
+        return
+    scoring = "ensemble" if bundle is not None else "rule-based"
+
+    for (halal, allergies, diseases), members in groups.items():
+        try:
+            df_ranked = rank_candidates(catalog, bundle, halal, list(allergies), list(diseases),
+                                        train_if_missing=train_if_missing)
+            pools = build_candidate_pools(df_ranked) if not df_ranked.empty else None
+        except Exception as e:
+            traceback.print_exc()
+            for i, _ in members:
+                yield {"index": i, "ok": False, "error": f"System Error: {e}"}
+            continue
+
+        if pools is None:
+            for i, _ in members:
+                yield {"index": i, "ok": False, "error": NO_CANDIDATES_ERROR}
+            continue
+
+        # Porsi seluruh anggota chunk diselesaikan dalam satu panggilan solver
+        for start in range(0, len(members), BATCH_CHUNK):
+            chunk = members[start:start + BATCH_CHUNK]
+            try:
+                hashes = [profile_hash(p) for _, p in chunk]
+                metas = _nutrition_metas([p for _, p in chunk])
+                plans = optimize_meal_plans(df_ranked, [t for _, t in metas], [p["days"] for _, p in chunk],
+                                            [_profile_rng(h) for h in hashes], pools=pools)
+            except Exception as e:
+                traceback.print_exc()
+                for i, _ in chunk:
+                    yield {"index": i, "ok": False, "error": f"System Error: {e}"}
+                continue
+
+            for (i, _), p_hash, (meta, _), plan in zip(chunk, hashes, metas, plans):
+                meta["count_candidates"] = len(df_ranked)
+                meta["scoring"] = scoring
+                yield {"index": i, "ok": True, "key": _plan_key(p_hash, catalog, bundle),
+                       "meta": meta, "plan": plan}
@@ -0,0 +1,70 @@
+# FILE: modules/features.py
+from __future__ import annotations
+from typing import Dict, Tuple
+import pandas as pd
+import numpy as np
+
+# ==============================================================================
+# FITUR RULE-BASED (VEKTOR)
+# Satu sumber untuk pseudo-label pelatihan (scoring.train_models) dan fitur
+# S_ENERGY / S_MACRO / S_RULE evaluasi (evaluate_models.py).
+# Semua fungsi menerima array numpy (atau Series) dan `target_kcal` skalar
+# maupun array per baris (broadcasting numpy).
+# ==============================================================================
+MACRO_COLS = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+def macro_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Kolom ENERGI/PROTEIN/LEMAK/KARBO sebagai float64 (kolom hilang / non-numerik = 0)."""
+    out = []
+    for c in MACRO_COLS:
+        if c in df.columns:
+            out.append(pd.to_numeric(df[c], errors="coerce").fillna(0.0).to_numpy(dtype=float))
+        else:
+            out.append(np.zeros(len(df)))
+    return tuple(out)
+
+def pseudo_scores(energi, protein, lemak, target_kcal=2000) -> np.ndarray:
+    """
+    Skor deviasi nutrisi (pseudo-label) 0-100, identik dengan
+    `scoring._calculate_pseudo_label` per baris.
+    """
+    e = np.asarray(energi, dtype=float)
+    p = np.asarray(protein, dtype=float)
+    l = np.asarray(lemak, dtype=float)
+
+    # Target energi per meal (1/3 TDEE)
+    meal_target = np.asarray(target_kcal, dtype=float) * 0.33
+    score = 100 * np.exp(-0.005 * np.abs(e - meal_target))
+
+    # Bonus keseimbangan makro sederhana
+    score = score + 5 * (p > 10) + 5 * (l < 20)
+
+    return np.clip(score, 0, 100)
+
+def rule_features(energi, protein, lemak, karbo, target_kcal=2000) -> Dict[str, np.ndarray]:
+    """
+    Skor deviasi relatif terhadap target energi dan distribusi makro
+    (Karbo 50%, Protein 20%, Lemak 30%). Mengembalikan S_ENERGY, S_MACRO, S_RULE.
+    """
+    eps = 1e-9
+    e = np.asarray(energi, dtype=float)
+    p = np.asarray(protein, dtype=float)
+    l = np.asarray(lemak, dtype=float)
+    k = np.asarray(karbo, dtype=float)
+    target = np.asarray(target_kcal, dtype=float)
+
+    # Target distribusi makro (heuristic)
+    t_K = (0.5 * target) / 4
+    t_P = (0.2 * target) / 4
+    t_L = (0.3 * target) / 9
+
+    # Deviasi relatif
+    dev_E = np.abs(e - target) / (target + eps)
+    dev_P = np.abs(p - t_P) / (t_P + eps)
+    dev_L = np.abs(l - t_L) / (t_L + eps)
+    dev_K = np.abs(k - t_K) / (t_K + eps)
+
+    s_energy = 0.4 * dev_E
+    s_macro = (0.3 * dev_P) + (0.2 * dev_L) + (0.1 * dev_K)
+
+    return {"S_ENERGY": s_energy, "S_MACRO": s_macro, "S_RULE": s_energy + s_macro}
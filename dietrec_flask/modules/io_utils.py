@@ -1,12 +1,22 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Any
 import pandas as pd
 import numpy as np
+import hashlib
+import threading
 import re
 
+from modules.snapshot import read_snapshot, write_snapshot
+from modules.constraints import build_constraint_index
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
+SNAPSHOT_DIR = DATA_DIR / "TKPI-2020.snapshot"
+
+# Versi parser untuk snapshot: hash sumber modul ini (parsing kolom, pembersihan
+# nama, klasifikasi CLASS_45). Kode berubah -> snapshot lama otomatis basi.
+PARSER_VERSION = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:16]
 
 # Kamus Pemetaan Penyakit (Scientific Standard)
 DISEASE_MAP = {
@@ -35,17 +45,121 @@ ALLERGY_MAP = {
     "kacang": "Kacang", "gluten": "Gluten", "tepung": "Gluten"
 }
 
-def load_tkpi() -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
+# ==============================================================================
+# CACHE KATALOG (SATU SALINAN PER PROSES)
+# Parsing Excel adalah langkah termahal di jalur request. Katalog hasil parsing
+# disimpan sekali per proses dan hanya dimuat ulang jika file sumber berubah.
+# ==============================================================================
+_CATALOG_LOCK = threading.Lock()
+_CATALOG: Dict[str, Any] | None = None
+
+def _find_source() -> Path | None:
     csv_path = DATA_DIR / "TKPI-2020.xlsx - Total.csv"
     xlsx_path = DATA_DIR / "TKPI-2020.xlsx"
-    
-    path = None
-    if csv_path.exists(): path = csv_path
-    elif xlsx_path.exists(): path = xlsx_path
-    
+
+    if csv_path.exists(): return csv_path
+    if xlsx_path.exists(): return xlsx_path
+    return None
+
+def _file_signature(path: Path) -> Tuple[str, int, int]:
+    """Tanda tangan murah (path, mtime, ukuran) untuk deteksi perubahan file."""
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def get_catalog() -> Dict[str, Any]:
+    """
+    Accessor thread-safe untuk katalog TKPI.
+
+    Mengembalikan entri katalog (dict) yang tidak pernah diubah setelah dibuat:
+    {"df", "mapping", "errors", "index", "path", "signature", "sha1"}.
+    "index" adalah indeks batasan halal/alergi/penyakit (lihat modules.constraints).
+    Jika mtime/ukuran file sumber berubah, hash isi file dicek ulang; parsing
+    hanya dilakukan jika isinya benar-benar berbeda, lalu entri baru
+    ditukar secara atomik. Request yang sedang berjalan tetap memakai entri lama.
+    """
+    global _CATALOG
+
+    path = _find_source()
     if not path:
-        return None, {}, [f"Dataset tidak ditemukan di {DATA_DIR}"]
+        return {"df": None, "mapping": {}, "errors": [f"Dataset tidak ditemukan di {DATA_DIR}"],
+                "index": None, "path": None, "signature": None, "sha1": None}
 
+    try:
+        signature = _file_signature(path)
+    except OSError as e:
+        return {"df": None, "mapping": {}, "errors": [f"Error load data: {str(e)}"],
+                "index": None, "path": None, "signature": None, "sha1": None}
+
+    current = _CATALOG
+    if current is not None and current["signature"] == signature:
+        return current
+
+    with _CATALOG_LOCK:
+        # Cek ulang: thread lain mungkin sudah memuat ulang selama kita menunggu lock
+        current = _CATALOG
+        if current is not None and current["signature"] == signature:
+            return current
+
+        sha1 = _file_sha1(path)
+        if current is not None and current["sha1"] == sha1 and not current["errors"]:
+            # Hanya metadata file yang berubah (mis. di-touch), isi tetap sama
+            entry = dict(current, signature=signature)
+        else:
+            df, mapping, errs = _load_from_snapshot_or_source(path, sha1)
+            index = None if errs else build_constraint_index(
+                df, mapping, ALLERGY_MAP.values(), DISEASE_MAP.values(), version=sha1
+            )
+            entry = {"df": df, "mapping": mapping, "errors": errs, "index": index,
+                     "path": path, "signature": signature, "sha1": sha1}
+
+        _CATALOG = entry
+        return entry
+
+def _load_from_snapshot_or_source(path: Path, sha1: str) -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
+    """Memakai snapshot columnar jika masih cocok dengan sumber; jika tidak, parsing ulang lalu tulis snapshot."""
+    snap = read_snapshot(SNAPSHOT_DIR, sha1, PARSER_VERSION)
+    if snap is not None:
+        df, mapping = snap
+        return df, mapping, []
+
+    df, mapping, errs = _parse_tkpi(path)
+    if not errs:
+        try:
+            write_snapshot(df, mapping, SNAPSHOT_DIR, path.name, sha1, PARSER_VERSION)
+        except OSError as e:
+            # Snapshot hanya optimasi; kegagalan menulis tidak boleh menggagalkan request
+            print(f"[WARN] Gagal menulis snapshot katalog: {e}")
+    return df, mapping, errs
+
+def build_snapshot() -> Tuple[Path | None, List[str]]:
+    """Langkah ingest eksplisit: parsing file sumber dan tulis ulang snapshot."""
+    path = _find_source()
+    if not path:
+        return None, [f"Dataset tidak ditemukan di {DATA_DIR}"]
+
+    df, mapping, errs = _parse_tkpi(path)
+    if errs:
+        return None, errs
+    return write_snapshot(df, mapping, SNAPSHOT_DIR, path.name, _file_sha1(path), PARSER_VERSION), []
+
+def load_tkpi() -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
+    """
+    Memuat dataset TKPI (dengan cache per proses, lihat `get_catalog`).
+
+    DataFrame yang dikembalikan dipakai bersama antar request,
+    sehingga pemanggil tidak boleh mengubahnya secara in-place.
+    """
+    entry = get_catalog()
+    return entry["df"], entry["mapping"], list(entry["errors"])
+
+def _parse_tkpi(path: Path) -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
     try:
         if str(path).endswith(".csv"):
             df = pd.read_csv(path, sep=None, engine='python')
@@ -114,7 +228,7 @@ def load_tkpi() -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
 
         # Auto-Tagging Kategori
         if "CLASS_45" not in df.columns:
-            df["CLASS_45"] = df.apply(_classify_food, axis=1)
+            df["CLASS_45"] = classify_foods(df)
 
         mapping = {
             "halal": "HALAL" if "HALAL" in df.columns else None,
@@ -127,27 +241,62 @@ def load_tkpi() -> Tuple[pd.DataFrame | None, Dict[str, str], List[str]]:
     except Exception as e:
         return None, {}, [f"Error load data: {str(e)}"]
 
+# Kata kunci kategori, urutan = prioritas (blacklist -> staple -> vegetable -> fruit -> protein)
+BLACKLIST_STAPLE = ["gula", "minyak", "tepung bumbu", "kerupuk", "sambal", "kecap", "bumbu"]
+CLASS_KEYWORDS = [
+    ("staple", ["beras", "nasi", "jagung", "ubi", "singkong", "kentang", "roti", "mie", "bihun", "havermut", "oat", "biskuit", "talas", "sagu", "ketan"]),
+    ("vegetable", ["bayam", "kangkung", "sawi", "wortel", "buncis", "kacang panjang", "daun", "tomat", "timun", "labu", "terong", "kol", "brokoli", "sayur", "pare", "selada", "jamur", "petai", "oyong", "tauge", "kecambah", "rebung"]),
+    ("fruit", ["apel", "jeruk", "pisang", "mangga", "pepaya", "semangka", "melon", "nanas", "anggur", "salak", "rambutan", "lengkeng", "durian", "buah", "jambu", "alpukat", "belimbing", "strawberry", "pir", "kurma"]),
+    ("protein", ["ayam", "daging", "sapi", "kambing", "ikan", "telur", "bebek", "udang", "cumi", "kerang", "kepiting", "tahu", "tempe", "kedelai", "kacang", "oncom", "susu", "keju", "yogurt", "sarden", "kornet", "bakso", "sosis", "abon", "hati", "ampela", "tongkol", "mujair", "lele"]),
+]
+
+def _alternation(keywords: List[str]) -> re.Pattern:
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+_BLACKLIST_RE = _alternation(BLACKLIST_STAPLE)
+_CLASS_RES = [(label, _alternation(kws)) for label, kws in CLASS_KEYWORDS]
+
+def classify_foods(df: pd.DataFrame) -> pd.Series:
+    """
+    Auto-tagging kategori 4 Sehat 5 Sempurna untuk seluruh baris sekaligus.
+
+    Setiap kelompok kata kunci dikompilasi menjadi satu regex alternation dan
+    dicocokkan ke teks "NAMA GOLONGAN" per kelompok (bukan per kata kunci).
+    Prioritas kategori sama persis dengan `_classify_food`: kelompok pertama
+    yang cocok menang (blacklist -> staple -> vegetable -> fruit -> protein).
+    """
+    nama = df["NAMA"].astype(str) if "NAMA" in df.columns else pd.Series("", index=df.index)
+    gol = df["GOLONGAN"].astype(str) if "GOLONGAN" in df.columns else pd.Series("", index=df.index)
+    txt = (nama + " " + gol).str.lower()
+
+    texts = txt.to_numpy(dtype=object)
+    out = np.full(len(texts), "other", dtype=object)
+
+    # Baris yang sudah mendapat kategori tidak dicek lagi oleh pola berikutnya
+    pending = np.arange(len(texts))
+    for label, pattern in [("other", _BLACKLIST_RE)] + _CLASS_RES:
+        if not len(pending):
+            break
+        search = pattern.search
+        hit = np.fromiter((search(t) is not None for t in texts[pending]), dtype=bool, count=len(pending))
+        out[pending[hit]] = label
+        pending = pending[~hit]
+
+    return pd.Series(out, index=df.index, dtype=object)
+
 def _classify_food(row):
+    """Versi per-baris (referensi) dari `classify_foods`."""
     nama = str(row.get("NAMA", "")).lower()
     gol = str(row.get("GOLONGAN", "")).lower()
     txt = f"{nama} {gol}"
 
-    blacklist_staple = ["gula", "minyak", "tepung bumbu", "kerupuk", "sambal", "kecap", "bumbu"]
-    if any(b in txt for b in blacklist_staple):
+    if any(b in txt for b in BLACKLIST_STAPLE):
         return "other"
 
-    if any(k in txt for k in ["beras", "nasi", "jagung", "ubi", "singkong", "kentang", "roti", "mie", "bihun", "havermut", "oat", "biskuit", "talas", "sagu", "ketan"]):
-        return "staple"
-    
-    if any(k in txt for k in ["bayam", "kangkung", "sawi", "wortel", "buncis", "kacang panjang", "daun", "tomat", "timun", "labu", "terong", "kol", "brokoli", "sayur", "pare", "selada", "jamur", "petai", "oyong", "tauge", "kecambah", "rebung"]):
-        return "vegetable"
-    
-    if any(k in txt for k in ["apel", "jeruk", "pisang", "mangga", "pepaya", "semangka", "melon", "nanas", "anggur", "salak", "rambutan", "lengkeng", "durian", "buah", "jambu", "alpukat", "belimbing", "strawberry", "pir", "kurma"]):
-        return "fruit"
-    
-    if any(k in txt for k in ["ayam", "daging", "sapi", "kambing", "ikan", "telur", "bebek", "udang", "cumi", "kerang", "kepiting", "tahu", "tempe", "kedelai", "kacang", "oncom", "susu", "keju", "yogurt", "sarden", "kornet", "bakso", "sosis", "abon", "hati", "ampela", "tongkol", "mujair", "lele"]):
-        return "protein"
-    
+    for label, keywords in CLASS_KEYWORDS:
+        if any(k in txt for k in keywords):
+            return label
+
     return "other"
 
 def extract_dropdown_options(df: pd.DataFrame, mapping: Dict[str, str]) -> Tuple[List[str], List[str]]:
@@ -0,0 +1,220 @@
+# FILE: modules/metrics.py
+from __future__ import annotations
+from typing import Dict, Any, List, Tuple, Iterator
+from bisect import bisect_left
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+# ==============================================================================
+# METRIK LATENSI PIPELINE (HISTOGRAM IN-PROCESS + /metrics)
+# `span("tahap")` mengukur satu tahap (parsing, load_tkpi, apply_filters, ...)
+# dan mencatatnya ke record request aktif (contextvar). Saat request selesai,
+# record dimasukkan ke histogram berlabel route lalu (opsional) dicetak
+# sebagai satu baris JSON. Biaya per span hanya dua perf_counter() dan satu
+# append; teks Prometheus baru disusun saat /metrics di-scrape.
+# Span di luar request (mis. render PDF di thread pool) langsung masuk
+# histogram dengan route "-".
+# ==============================================================================
+TIMING_LOG = os.environ.get("DIETREC_TIMING_LOG", "").lower() in ("1", "true", "ya")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CANDIDATE_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+DAYS_BUCKETS = (1, 3, 7, 14, 30, 60, 90)
+
+NO_ROUTE = "-"
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus, satu seri per kombinasi label."""
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name, self.doc, self.labels = name, doc, labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}   # label -> [count per bucket..., +Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._series.get(label_values)
+            if row is None:
+                row = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[idx] += 1
+            row[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], List[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for label_values, row in sorted(self.snapshot().items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {_fmt(row[-1])}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+STAGE_SECONDS = Histogram("dietrec_stage_seconds", "Durasi per tahap pipeline (detik).",
+                          ("stage", "route"), LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("dietrec_request_seconds", "Durasi total request (detik).",
+                            ("route", "method", "status"), LATENCY_BUCKETS)
+CANDIDATES = Histogram("dietrec_candidates", "Jumlah menu kandidat setelah filter per request.",
+                       ("route",), CANDIDATE_BUCKETS)
+PLAN_DAYS = Histogram("dietrec_plan_days", "Jumlah hari plan yang disusun per request.",
+                      ("route",), DAYS_BUCKETS)
+HISTOGRAMS = [REQUEST_SECONDS, STAGE_SECONDS, CANDIDATES, PLAN_DAYS]
+
+
+# ==============================================================================
+# RECORD PER REQUEST
+# ==============================================================================
+_RECORD: contextvars.ContextVar[Dict[str, Any] | None] = contextvars.ContextVar("dietrec_timing", default=None)
+
+
+def start_record(route: str, method: str = "") -> contextvars.Token:
+    record = {"route": route, "method": method, "start": time.perf_counter(), "spans": [], "attrs": {}}
+    return _RECORD.set(record)
+
+
+def current_record() -> Dict[str, Any] | None:
+    return _RECORD.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Ukur satu tahap; masuk ke record request aktif atau langsung ke histogram."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        record = _RECORD.get()
+        if record is None:
+            STAGE_SECONDS.observe(elapsed, stage, NO_ROUTE)
+        else:
+            record["spans"].append((stage, elapsed))
+
+
+def annotate(**attrs: Any) -> None:
+    """Atribut tambahan untuk record aktif (mis. candidates, days, cache)."""
+    record = _RECORD.get()
+    if record is not None:
+        record["attrs"].update(attrs)
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, Any]]:
+    """
+    Record terpisah yang tidak masuk histogram, untuk kode yang berjalan di
+    proses lain (pool modules.workers): span/atribut dikirim balik ke proses
+    induk lalu digabung dengan `merge`.
+    """
+    token = _RECORD.set({"route": NO_ROUTE, "method": "", "start": time.perf_counter(), "spans": [], "attrs": {}})
+    try:
+        yield _RECORD.get()
+    finally:
+        _RECORD.reset(token)
+
+
+def merge(spans: List[Tuple[str, float]], attrs: Dict[str, Any]) -> None:
+    """Gabungkan hasil `collect` ke record aktif (atau langsung ke histogram)."""
+    record = _RECORD.get()
+    if record is None:
+        for stage, elapsed in spans:
+            STAGE_SECONDS.observe(elapsed, stage, NO_ROUTE)
+    else:
+        record["spans"].extend(spans)
+        record["attrs"].update(attrs)
+
+
+def finish_record(token: contextvars.Token, status: int | str = "") -> Dict[str, Any] | None:
+    """Tutup record: isi histogram, cetak log JSON (jika aktif), reset contextvar."""
+    record = _RECORD.get()
+    try:
+        _RECORD.reset(token)
+    except ValueError:
+        # Respons streaming bisa ditutup di context lain
+        _RECORD.set(None)
+    if record is None:
+        return None
+
+    total = time.perf_counter() - record["start"]
+    route = record["route"]
+    REQUEST_SECONDS.observe(total, route, record["method"], str(status))
+    for stage, elapsed in record["spans"]:
+        STAGE_SECONDS.observe(elapsed, stage, route)
+    spans: Dict[str, float] = {}
+    for stage, elapsed in record["spans"]:
+        spans[stage] = spans.get(stage, 0.0) + elapsed   # tahap berulang dijumlahkan
+    attrs = record["attrs"]
+    if "candidates" in attrs:
+        CANDIDATES.observe(attrs["candidates"], route)
+    if "days" in attrs:
+        PLAN_DAYS.observe(attrs["days"], route)
+
+    out = {
+        "route": route, "method": record["method"], "status": status,
+        "total_ms": round(total * 1000, 3),
+        "spans": {stage: round(elapsed * 1000, 3) for stage, elapsed in spans.items()},
+        **attrs,
+    }
+    if TIMING_LOG:
+        print(f"[TIMING] {json.dumps(out, ensure_ascii=False, separators=(',', ':'))}", file=sys.stderr, flush=True)
+    return out
+
+
+def render_metrics(gauges: Dict[str, Tuple[str, float]] | None = None,
+                   counters: Dict[str, Tuple[str, float]] | None = None) -> str:
+    """
+    Teks eksposisi Prometheus. `gauges` / `counters` = {nama: (keterangan, nilai)}
+    tambahan; counter (nilai kumulatif sejak start) diberi akhiran `_total`.
+    """
+    lines: List[str] = []
+    for name, (doc, value) in (gauges or {}).items():
+        lines += [f"# HELP {name} {doc}", f"# TYPE {name} gauge", f"{name} {_fmt(value)}"]
+    for name, (doc, value) in (counters or {}).items():
+        lines += [f"# HELP {name}_total {doc}", f"# TYPE {name}_total counter", f"{name}_total {_fmt(value)}"]
+    for hist in HISTOGRAMS:
+        lines += hist.render()
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app) -> None:
+    """Pasang record per request ke aplikasi Flask (route = pola URL, mis. /export_pdf/<job_id>)."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timing():
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g._timing_token = start_record(rule, request.method)
+
+    @app.after_request
+    def _status_timing(response):
+        g._timing_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_timing(exc):
+        token = g.pop("_timing_token", None)
+        if token is not None:
+            finish_record(token, 500 if exc is not None else g.pop("_timing_status", ""))
@@ -0,0 +1,257 @@
+# FILE: modules/pdf_export.py
+from __future__ import annotations
+from typing import Dict, Any, List, Tuple
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import datetime
+import io
+import os
+import threading
+import traceback
+
+from modules.cache import ByteLRUCache
+from modules.metrics import span
+from modules.profiling import active_tag, profile_block
+
+# ==============================================================================
+# EKSPOR PDF (ASINKRON + CACHE)
+# Render ReportLab berjalan di pool worker terbatas (PDF_WORKERS), bukan di
+# thread request. Hasil disimpan per key plan di cache LRU berbatas ukuran
+# total (PDF_CACHE_MB), sehingga unduhan ulang plan yang sama langsung dilayani.
+# ReportLab baru di-import saat PDF pertama kali dibuat.
+# ==============================================================================
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", 2))
+PDF_CACHE_BYTES = int(float(os.environ.get("PDF_CACHE_MB", 64)) * (1 << 20))
+PDF_MAX_ERRORS = 256
+
+_PDF_CACHE = ByteLRUCache(max_bytes=PDF_CACHE_BYTES)
+_JOBS: Dict[str, Future] = {}
+_ERRORS: Dict[str, str] = {}
+_JOBS_LOCK = threading.RLock()  # add_done_callback bisa langsung memanggil _on_done
+_EXECUTOR: Executor | None = None
+
+
+def build_pdf(plan: List[Dict[str, Any]], meta: Dict[str, Any]) -> bytes:
+    """
+    Laporan PDF dengan Profil Lengkap (Sesuai Input User) & Clean Name.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                            rightMargin=40, leftMargin=40,
+                            topMargin=40, bottomMargin=40)
+
+    styles = getSampleStyleSheet()
+    # Custom Styles
+    style_title = ParagraphStyle('CustomTitle', parent=styles['Title'], fontSize=20, textColor=colors.HexColor('#14532d'), spaceAfter=10)
+    style_h2 = ParagraphStyle('CustomH2', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#15803d'), spaceBefore=15, spaceAfter=8)
+    style_normal = styles['Normal']
+    style_small = ParagraphStyle('Small', parent=styles['Normal'], fontSize=9)
+    style_label = ParagraphStyle('Label', parent=styles['Normal'], fontSize=9, fontName='Helvetica-Bold')
+
+    story = []
+
+    # --- HELPER: MAPPING TEKS AGAR SESUAI INPUT FORM ---
+    def get_activity_text(key):
+        m = {
+            "sangat_ringan": "Sangat Ringan (Jarang olahraga/Duduk kerja)",
+            "ringan": "Ringan (Olahraga 1-3x seminggu)",
+            "sedang": "Sedang (Olahraga 3-5x seminggu)",
+            "berat": "Berat (Olahraga 6-7x seminggu)",
+            "sangat_berat": "Sangat Berat (Atlet/Pekerja fisik berat)"
+        }
+        k = str(key).lower().replace(" ", "_")
+        return m.get(k, key)
+
+    def get_goal_text(key):
+        k = str(key).lower()
+        if "cut" in k or "turun" in k: return "Turun Berat (Defisit kalori aman)"
+        if "bulk" in k or "naik" in k: return "Tambah Berat (Surplus untuk otot)"
+        return "Pertahankan (Jaga berat stabil)"
+
+    def clean_name(txt):
+        bad_words = [", mentah", " mentah", ", segar", " segar", ", kering", " kering", "Daging, ", "Ikan, ", "Ayam, "]
+        cleaned = str(txt)
+        for w in bad_words:
+            cleaned = cleaned.replace(w, "").replace(w.lower(), "").replace(w.upper(), "")
+        return cleaned.strip()
+
+    # --- HEADER ---
+    story.append(Paragraph("Laporan Rencana Diet Personal", style_title))
+    story.append(Paragraph(f"Dibuat oleh NutriPlan • {datetime.datetime.now().strftime('%d %B %Y')}", style_normal))
+    story.append(Spacer(1, 15))
+
+    # --- SECTION 1: PROFIL PENGGUNA LENGKAP ---
+    # Kita gunakan Tabel dengan Paragraph agar teks panjang bisa wrapping
+    
+    # Siapkan Data
+    act_txt = get_activity_text(meta['activity'])
+    goal_txt = get_goal_text(meta['goal'])
+    al_txt = ", ".join(meta['allergies']) if meta['allergies'] else "-"
+    dis_txt = ", ".join(meta['diseases']) if meta['diseases'] else "-"
+    
+    # Struktur Tabel Profil
+    profile_data = [
+        [Paragraph("<b>INFORMASI DASAR</b>", style_normal), ""],
+        [Paragraph("Usia:", style_label), Paragraph(f"{meta['age']} Tahun", style_normal)],
+        [Paragraph("Jenis Kelamin:", style_label), Paragraph(f"{meta['sex']}", style_normal)],
+        [Paragraph("Berat Badan:", style_label), Paragraph(f"{meta['weight']} kg", style_normal)],
+        [Paragraph("Tinggi Badan:", style_label), Paragraph(f"{meta['height']} cm", style_normal)],
+        
+        [Paragraph("<b>GAYA HIDUP & TUJUAN</b>", style_normal), ""],
+        [Paragraph("Aktivitas:", style_label), Paragraph(act_txt, style_normal)], # Text wrapping here
+        [Paragraph("Target:", style_label), Paragraph(goal_txt, style_normal)],
+        [Paragraph("Durasi Rencana:", style_label), Paragraph(f"{meta['days']} Hari", style_normal)],
+        [Paragraph("BMI / Kategori:", style_label), Paragraph(f"{meta['bmi']} ({meta['bmi_cat']})", style_normal)],
+        [Paragraph("TDEE (Kebutuhan):", style_label), Paragraph(f"<b>{meta['tdee']} kkal</b>", style_normal)],
+
+        [Paragraph("<b>PREFERENSI MAKANAN</b>", style_normal), ""],
+        [Paragraph("Prioritas Halal:", style_label), Paragraph(f"{meta['halal']}", style_normal)],
+        [Paragraph("Alergi/Pantangan:", style_label), Paragraph(al_txt, style_normal)],
+        [Paragraph("Kondisi Kesehatan:", style_label), Paragraph(dis_txt, style_normal)],
+    ]
+
+    # Buat Tabel
+    t_prof = Table(profile_data, colWidths=[120, 330])
+    t_prof.setStyle(TableStyle([
+        ('SPAN', (0,0), (1,0)), # Header Info Dasar
+        ('SPAN', (0,5), (1,5)), # Header Gaya Hidup
+        ('SPAN', (0,11), (1,11)), # Header Preferensi
+        
+        ('BACKGROUND', (0,0), (1,0), colors.HexColor('#dcfce7')), # Hijau Muda Header
+        ('BACKGROUND', (0,5), (1,5), colors.HexColor('#dcfce7')),
+        ('BACKGROUND', (0,11), (1,11), colors.HexColor('#dcfce7')),
+        
+        ('TEXTCOLOR', (0,0), (1,0), colors.HexColor('#14532d')), # Teks Hijau Tua Header
+        ('TEXTCOLOR', (0,5), (1,5), colors.HexColor('#14532d')),
+        ('TEXTCOLOR', (0,11), (1,11), colors.HexColor('#14532d')),
+
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+        ('GRID', (0,0), (-1,-1), 0.25, colors.lightgrey),
+        ('PADDING', (0,0), (-1,-1), 6),
+    ]))
+    
+    story.append(t_prof)
+    story.append(Spacer(1, 25))
+
+    # --- SECTION 2: MEAL PLAN ---
+    for day in plan:
+        total_cal = int(sum(m['total']['kcal'] for m in day['meals']))
+        story.append(Paragraph(f"HARI KE-{day['day']} — Total: {total_cal} kkal", style_h2))
+        
+        for meal in day['meals']:
+            story.append(Paragraph(f"<b>{meal['name']}</b> (Est. {int(meal['total']['kcal'])} kkal)", style_normal))
+            story.append(Spacer(1, 4))
+            
+            menu_data = [["Kategori", "Nama Menu", "Porsi", "Energi", "P", "L", "K"]]
+            for item in meal['items']:
+                display_name = clean_name(item.get('name',''))
+                menu_data.append([
+                    str(item.get('class','')).capitalize(),
+                    Paragraph(display_name, styles['BodyText']), 
+                    f"{item.get('portion_g',0)}g",
+                    f"{int(item.get('kcal',0))}",
+                    f"{item.get('protein_g',0)}",
+                    f"{item.get('fat_g',0)}",
+                    f"{item.get('carb_g',0)}"
+                ])
+            
+            t_menu = Table(menu_data, colWidths=[60, 180, 50, 40, 30, 30, 30])
+            t_menu.setStyle(TableStyle([
+                ('BACKGROUND', (0,0), (-1,0), colors.whitesmoke),
+                ('GRID', (0,0), (-1,-1), 0.25, colors.lightgrey),
+                ('FONTSIZE', (0,0), (-1,-1), 8),
+                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                ('ALIGN', (2,0), (-1,-1), 'RIGHT'),
+            ]))
+            story.append(t_menu)
+            story.append(Spacer(1, 12))
+        
+        story.append(PageBreak())
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+# ==============================================================================
+# JOB & CACHE
+# ==============================================================================
+def pdf_key(plan_key: str) -> str:
+    """Key PDF = key plan + tanggal (header PDF memuat tanggal pembuatan)."""
+    return f"{plan_key}-{datetime.date.today().isoformat()}"
+
+
+def _executor() -> Executor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=max(PDF_WORKERS, 1), thread_name_prefix="pdf")
+    return _EXECUTOR
+
+
+def set_executor(executor: Executor | None) -> None:
+    """Ganti pool render (mis. pool proses modules.workers); None = thread pool bawaan."""
+    global _EXECUTOR
+    _EXECUTOR = executor
+
+
+def _render(plan: List[Dict[str, Any]], meta: Dict[str, Any], profile_tag: str | None = None) -> bytes:
+    """Render di pool; ikut diprofil jika request yang menjadwalkannya sedang diprofil."""
+    with span("build_pdf"), profile_block(profile_tag and f"{profile_tag}-build_pdf"):
+        return build_pdf(plan, meta)
+
+
+def _on_done(key: str, fut: Future) -> None:
+    with _JOBS_LOCK:
+        _JOBS.pop(key, None)
+        try:
+            _PDF_CACHE.put(key, fut.result())
+        except Exception as e:
+            traceback.print_exception(e)
+            while len(_ERRORS) >= PDF_MAX_ERRORS:
+                _ERRORS.pop(next(iter(_ERRORS)))
+            _ERRORS[key] = str(e)
+
+
+def get_pdf(key: str) -> Tuple[str, bytes | str | None]:
+    """
+    Status PDF untuk `key`: ("ready", bytes), ("pending", None),
+    ("error", pesan) atau ("missing", None).
+    """
+    data = _PDF_CACHE.get(key)
+    if data is not None:
+        return "ready", data
+    with _JOBS_LOCK:
+        if key in _JOBS:
+            return "pending", None
+        if key in _ERRORS:
+            return "error", _ERRORS[key]
+    # Job bisa saja selesai di antara dua pengecekan di atas
+    data = _PDF_CACHE.get(key)
+    return ("ready", data) if data is not None else ("missing", None)
+
+
+def submit_pdf(key: str, plan: List[Dict[str, Any]], meta: Dict[str, Any]) -> Tuple[str, bytes | str | None]:
+    """
+    Mengembalikan PDF dari cache jika ada; jika belum, menjadwalkan render
+    (satu job per key, permintaan berikutnya ikut menunggu job yang sama).
+    """
+    status, data = get_pdf(key)
+    if status in ("ready", "pending"):
+        return status, data
+
+    with _JOBS_LOCK:
+        if key not in _JOBS:
+            _ERRORS.pop(key, None)
+            fut = _executor().submit(_render, plan, dict(meta), active_tag())
+            _JOBS[key] = fut
+            fut.add_done_callback(lambda f, k=key: _on_done(k, f))
+    return get_pdf(key)
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _JOBS_LOCK:
+        pending = len(_JOBS)
+    return dict(_PDF_CACHE.stats(), pending=pending, workers=PDF_WORKERS)
@@ -4,121 +4,206 @@ from typing import List, Dict, Any
 import pandas as pd
 import numpy as np
 
+from modules.calc_utils import round1
+from modules.portions import solve_portions, uniform_portions
+
 # ==============================================================================
 # MODUL PERENCANA MENU (PLANNER)
 # Referensi: Bab 3.3.2 Alur Proses & Bab 2.6 Evaluasi Nutrisi
 # ==============================================================================
 
+# Komposisi piring per waktu makan (4 Sehat 5 Sempurna)
+CLASS_SLOTS = ["staple", "protein", "vegetable", "fruit"]
+
+# Rasio Kalori per Waktu Makan (Pagi 30%, Siang 40%, Malam 30%)
+MEAL_RATIOS = {
+    "Sarapan": 0.30,
+    "Makan Siang": 0.40,
+    "Makan Malam": 0.30
+}
+
+# Buah hanya di Siang/Malam
+FRUIT_MEALS = ["Makan Siang", "Makan Malam"]
+
+# Kandidat per kelas: Top-50 terbaik, sampling acak dari 10 teratas
+POOL_SIZE = 50
+TOP_N = 10
+
+MACRO_COLS = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+# Metode porsi: "lsq" = solver per item (modules.portions), "uniform" = skala lama
+PORTION_METHODS = {"lsq": solve_portions, "uniform": uniform_portions}
+
+
+def build_candidate_pools(df_ranked: pd.DataFrame, top_n: int = TOP_N) -> Dict[str, Any]:
+    """
+    Menyiapkan kandidat per kelas sebagai array numpy.
+
+    Asumsi: df_ranked sudah diurutkan S_FINAL (terbaik di atas), sehingga
+    kandidat = `top_n` baris pertama dari Top-50 setiap kelas.
+    Hasil: {"names", "classes", "macros" (n, 4: E/P/L/K per 100g),
+    "offset" & "size" per slot kelas}.
+    """
+    classes = df_ranked["CLASS_45"].astype(str).to_numpy() if "CLASS_45" in df_ranked.columns \
+        else np.full(len(df_ranked), "other", dtype=object)
+    names = df_ranked["NAMA"].astype(str).to_numpy() if "NAMA" in df_ranked.columns \
+        else np.full(len(df_ranked), "Unknown", dtype=object)
+    macros = np.column_stack([
+        df_ranked[c].to_numpy(dtype=float) if c in df_ranked.columns else np.zeros(len(df_ranked))
+        for c in MACRO_COLS
+    ]) if len(df_ranked) else np.zeros((0, len(MACRO_COLS)))
+
+    rows, offset, size = [], [], []
+    for cls in CLASS_SLOTS:
+        pos = np.flatnonzero(classes == cls)[:min(POOL_SIZE, top_n)]
+        offset.append(sum(size))
+        size.append(len(pos))
+        rows.append(pos)
+    rows = np.concatenate(rows).astype(int)
+
+    return {
+        "names": names[rows],
+        "classes": classes[rows],
+        "macros": macros[rows],
+        "offset": np.asarray(offset),
+        "size": np.asarray(size),
+    }
+
+
 def optimize_meal_plan(
     df_ranked: pd.DataFrame,
     tdee_target: float,
-    days: int
+    days: int,
+    rng: np.random.Generator | None = None,
+    pools: Dict[str, Any] | None = None,
+    portion_method: str = "lsq"
 ) -> List[Dict[str, Any]]:
     """
     Menyusun Rencana Menu Harian dengan pendekatan Top-N Randomization.
     Tujuannya agar menu bervariasi namun tetap bernutrisi tinggi.
+
+    Seluruh pilihan untuk semua hari x waktu makan diambil dengan satu
+    panggilan RNG, lalu porsi dan total dihitung dengan operasi array.
+    `pools` (hasil `build_candidate_pools`) boleh diberikan agar bisa dipakai
+    ulang antar user dengan batasan yang sama. `portion_method` memilih cara
+    menghitung gram per item (lihat PORTION_METHODS).
     """
-    plan = []
-    
-    # 1. Filter kandidat berdasarkan kelas (4 Sehat 5 Sempurna)
-    # Kita ambil Top-50 terbaik dulu agar ada variasi saat sampling
-    # Asumsi: Data sudah diurutkan S_FINAL ascending (semakin kecil semakin baik)
-    staples = df_ranked[df_ranked["CLASS_45"] == "staple"].head(50)
-    proteins = df_ranked[df_ranked["CLASS_45"] == "protein"].head(50)
-    veggies = df_ranked[df_ranked["CLASS_45"] == "vegetable"].head(50)
-    fruits = df_ranked[df_ranked["CLASS_45"] == "fruit"].head(50)
-    
-    # Rasio Kalori per Waktu Makan (Pagi 30%, Siang 40%, Malam 30%)
-    meal_ratios = {
-        "Sarapan": 0.30,
-        "Makan Siang": 0.40,
-        "Makan Malam": 0.30
-    }
+    rng = rng if rng is not None else np.random.default_rng()
+    return optimize_meal_plans(df_ranked, [tdee_target], [days], [rng], pools, portion_method)[0]
 
-    # Helper: Ambil 1 item acak dari top-N
-    def get_random_top_n(df_source, n=10):
-        if df_source.empty: return {}
-        # Ambil sampel acak dari n teratas
-        subset = df_source.head(n)
-        return subset.sample(n=1).iloc[0].to_dict()
 
-    for d in range(1, days + 1):
+def optimize_meal_plans(
+    df_ranked: pd.DataFrame,
+    tdee_targets: List[float],
+    days: List[int],
+    rngs: List[np.random.Generator],
+    pools: Dict[str, Any] | None = None,
+    portion_method: str = "lsq"
+) -> List[List[Dict[str, Any]]]:
+    """
+    Versi batch `optimize_meal_plan` untuk banyak user dengan kandidat yang
+    sama: pilihan tiap user diambil dari RNG masing-masing (hasil identik
+    dengan pemanggilan satu per satu), lalu porsi semua user dihitung dalam
+    satu panggilan solver.
+    """
+    pools = pools if pools is not None else build_candidate_pools(df_ranked)
+    meal_names = list(MEAL_RATIOS.keys())
+    ratios = np.array([MEAL_RATIOS[n] for n in meal_names])
+
+    # 1. PILIH KOMPOSISI per user, lalu digabung sepanjang sumbu hari
+    n_days = [max(int(d), 0) for d in days]
+    samples = [sample_meals(pools, n, rng) for n, rng in zip(n_days, rngs)]
+    if not sum(n_days):
+        return [[] for _ in n_days]
+    pick, valid, macros = (np.concatenate(parts) for parts in zip(*samples))
+    targets = np.concatenate([np.broadcast_to(t * ratios, (n, len(ratios))) for t, n in zip(tdee_targets, n_days)])
+
+    # 2. HITUNG PORSI: gram per item dalam batas 30-400 g
+    portions = PORTION_METHODS[portion_method](macros, targets, valid)
+
+    # Nutrisi real berdasarkan porsi, total per waktu makan & per hari
+    item_vals = macros * (portions / 100.0)[..., None]
+    meal_totals = item_vals.sum(axis=2)
+    day_totals = meal_totals.sum(axis=1)
+
+    plans, start = [], 0
+    for n in n_days:
+        sl = slice(start, start + n)
+        plans.append(_format_plan(pools, pick[sl], valid[sl], portions[sl], item_vals[sl],
+                                  meal_totals[sl], day_totals[sl], meal_names))
+        start += n
+    return plans
+
+
+def sample_meals(pools: Dict[str, Any], n_days: int, rng: np.random.Generator):
+    """
+    Mengambil item untuk semua hari x waktu makan x slot kelas.
+    Hasil: (pick, valid, macros) dengan bentuk (hari, meal, slot[, 4]).
+    """
+    meal_names = list(MEAL_RATIOS.keys())
+    n_meals, n_slots = len(meal_names), len(CLASS_SLOTS)
+
+    # 1. PILIH KOMPOSISI (VARIASI): satu panggilan RNG untuk semua pilihan
+    size = pools["size"]
+    u = rng.random((n_days, n_meals, n_slots))
+    pick = pools["offset"] + np.minimum((u * size).astype(int), np.maximum(size - 1, 0))
+
+    # Slot valid: kelas punya kandidat, dan buah hanya di Siang/Malam
+    valid = np.broadcast_to(size > 0, (n_days, n_meals, n_slots)).copy()
+    fruit_slot = CLASS_SLOTS.index("fruit")
+    for m, name in enumerate(meal_names):
+        if name not in FRUIT_MEALS:
+            valid[:, m, fruit_slot] = False
+
+    if len(pools["macros"]):
+        macros = pools["macros"][np.where(valid, pick, 0)]
+    else:
+        macros = np.zeros((n_days, n_meals, n_slots, len(MACRO_COLS)))
+    macros = np.where(valid[..., None], macros, 0.0)
+
+    return pick, valid, macros
+
+
+def _format_plan(pools, pick, valid, portions, item_vals, meal_totals, day_totals, meal_names):
+    """Mengubah hasil array menjadi struktur plan (list of dict) untuk template/PDF."""
+    keys = ["kcal", "protein_g", "fat_g", "carb_g"]
+
+    # Gather vektor: hanya slot valid, urutan (hari, meal, slot); dict baru
+    # dibangun di akhir dari kolom-kolom yang sudah berupa list Python.
+    flat = valid.reshape(-1)
+    idx = pick.reshape(-1)[flat]
+    vals = item_vals.reshape(-1, len(keys))[flat]
+    # round(x) == rint (keduanya half-even, hasil int)
+    grams = np.rint(portions.reshape(-1)[flat]).astype(int).tolist()
+    kcal = np.rint(vals[:, 0]).astype(int).tolist()
+    protein, fat, carb = (round1(vals[:, j]).tolist() for j in (1, 2, 3))
+    items = [
+        {"name": n, "class": c, "portion_g": g, "kcal": e, "protein_g": p, "fat_g": l, "carb_g": k}
+        for n, c, g, e, p, l, k in zip(pools["names"][idx].tolist(), pools["classes"][idx].tolist(),
+                                        grams, kcal, protein, fat, carb)
+    ]
+
+    # Batas item per (hari, meal) dari jumlah slot valid
+    ends = np.cumsum(valid.sum(axis=2).reshape(-1)).tolist()
+    meal_l, day_l = meal_totals.tolist(), round1(day_totals).tolist()
+
+    plan, start, cell = [], 0, 0
+    for d in range(len(day_l)):
         day_meals = []
-        daily_total = {"kcal": 0, "protein_g": 0, "fat_g": 0, "carb_g": 0}
-        
-        for meal_name, ratio in meal_ratios.items():
-            target_kcal = tdee_target * ratio
-            
-            # 2. PILIH KOMPOSISI (VARIASI)
-            # Menggunakan Random Sampling dari Top-Tier items
-            s_item = get_random_top_n(staples)
-            p_item = get_random_top_n(proteins)
-            v_item = get_random_top_n(veggies)
-            
-            # Buat list items dasar
-            raw_items = [x for x in [s_item, p_item, v_item] if x]
-            
-            # Tambahkan buah hanya di Siang/Malam (opsional)
-            if meal_name in ["Makan Siang", "Makan Malam"]:
-                f_item = get_random_top_n(fruits)
-                if f_item: raw_items.append(f_item)
-            
-            # 3. HITUNG PORSI (SCALING)
-            current_meal_total = {"kcal": 0, "protein_g": 0, "fat_g": 0, "carb_g": 0}
-            meal_items_formatted = []
-            
-            # Hitung total kalori 'base' (per 100g)
-            base_total_kcal = sum([float(x.get("ENERGI", 0)) for x in raw_items])
-            
-            # Scaling factor: Target / Base
-            # Jika base 0, hindari div by zero
-            scaling_factor = (target_kcal / base_total_kcal) if base_total_kcal > 0 else 1.0
-
-            for item in raw_items:
-                # Batasi porsi agar masuk akal (Min 30g, Max 400g)
-                # Agar user tidak disuruh makan 1kg nasi cuma demi ngejar kalori
-                porsi_gram = max(30, min(100 * scaling_factor, 400))
-                
-                # Hitung nutrisi real berdasarkan porsi
-                ratio_real = porsi_gram / 100.0
-                
-                it_kcal = float(item.get("ENERGI", 0)) * ratio_real
-                it_p = float(item.get("PROTEIN", 0)) * ratio_real
-                it_l = float(item.get("LEMAK", 0)) * ratio_real
-                it_k = float(item.get("KARBO", 0)) * ratio_real
-                
-                # Akumulasi ke Meal Total
-                current_meal_total["kcal"] += it_kcal
-                current_meal_total["protein_g"] += it_p
-                current_meal_total["fat_g"] += it_l
-                current_meal_total["carb_g"] += it_k
-                
-                meal_items_formatted.append({
-                    "name": str(item.get("NAMA", "Unknown")),
-                    "class": str(item.get("CLASS_45", "other")),
-                    "portion_g": round(porsi_gram),
-                    "kcal": round(it_kcal),
-                    "protein_g": round(it_p, 1),
-                    "fat_g": round(it_l, 1),
-                    "carb_g": round(it_k, 1)
-                })
-            
-            # Masukkan ke rekap harian
+        for m, meal_name in enumerate(meal_names):
+            end = ends[cell]
             # PENTING: Gunakan key 'total', bukan 'agg'
             day_meals.append({
                 "name": meal_name,
-                "items": meal_items_formatted,
-                "total": current_meal_total 
+                "items": items[start:end],
+                "total": dict(zip(keys, meal_l[d][m]))
             })
-            
-            # Tambah ke total harian
-            for k in daily_total:
-                daily_total[k] += current_meal_total.get(k, 0)
+            start, cell = end, cell + 1
 
         plan.append({
-            "day": d,
+            "day": d + 1,
             "meals": day_meals,
-            "daily_total": {k: round(v, 1) for k, v in daily_total.items()}
+            "daily_total": dict(zip(keys, day_l[d]))
         })
-        
-    return plan
\ No newline at end of file
+
+    return plan
@@ -0,0 +1,206 @@
+# FILE: modules/portions.py
+from __future__ import annotations
+import itertools
+import numpy as np
+
+# ==============================================================================
+# SOLVER PORSI (BOUNDED LEAST SQUARES, BATCH)
+# Untuk setiap waktu makan, gram per item x_i ∈ [30, 400] dipilih agar
+# total kalori mendekati target meal dan makro mendekati Karbo 50% /
+# Protein 20% / Lemak 30% (dalam kkal). Semua meal diselesaikan sekaligus
+# dengan eliminasi Gauss berbatch: iterasi active-set (bebas / batas bawah /
+# batas atas) sampai KKT terpenuhi; meal yang belum selesai mencoba semua
+# 3^4 = 81 pola dan memilih solusi layak dengan objektif terkecil.
+# ==============================================================================
+PORTION_MIN = 30.0
+PORTION_MAX = 400.0
+
+# Bobot residual relatif: kalori diutamakan, makro sebagai penyeimbang
+W_KCAL = 4.0
+W_MACRO = 0.5
+# Ridge kecil ke porsi seragam: menjaga sistem selalu definit positif dan
+# memecah seri (mis. dua item dengan profil makro yang sama)
+RIDGE = 0.05
+
+# Target gram makro per kkal meal: (rasio kkal, kkal per gram)
+MACRO_SPLIT = {"protein": (0.20, 4.0), "fat": (0.30, 9.0), "carb": (0.50, 4.0)}
+
+# Toleransi batas [30, 400] g (satuan 100 g) saat memeriksa kelayakan
+FEAS_TOL = 1e-9
+# Iterasi active-set sebelum jatuh ke enumerasi semua pola
+ACTIVE_SET_ITERS = 8
+# Meal per potongan enumerasi active-set (x 81 pola per meal)
+SOLVE_CHUNK_MEALS = 512
+
+
+def uniform_portions(macros: np.ndarray, targets: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Porsi lama: satu porsi sama untuk semua item dalam meal,
+    clamp(100 * target / total_kkal_per_100g, 30, 400). Hasil dalam gram.
+    """
+    base_kcal = np.where(valid, macros[..., 0], 0.0).sum(axis=-1)
+    scaling = np.where(base_kcal > 0, targets / np.where(base_kcal > 0, base_kcal, 1.0), 1.0)
+    portion = np.clip(100 * scaling, PORTION_MIN, PORTION_MAX)
+    return np.where(valid, portion[..., None], 0.0)
+
+
+def _patterns(n_slots: int) -> np.ndarray:
+    """Semua pola active-set: 0 = bebas, 1 = batas bawah, 2 = batas atas."""
+    return np.array(list(itertools.product((0, 1, 2), repeat=n_slots)), dtype=np.int8)
+
+
+def _solve_spd(M: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """
+    Eliminasi Gauss tanpa pivot untuk banyak sistem SPD kecil sekaligus.
+
+    Tata letak "batch di sumbu terakhir": M (n, n, N), rhs (n, N). Setiap
+    operasi bekerja pada vektor kontigu sepanjang N, jauh lebih cepat
+    daripada np.linalg.solve yang memanggil LAPACK per sistem 4x4.
+    """
+    M = M.copy()
+    r = rhs.copy()
+    n = M.shape[0]
+    for k in range(n):
+        for i in range(k + 1, n):
+            f = M[i, k] / M[k, k]
+            M[i, k:] -= f * M[k, k:]
+            r[i] -= f * r[k]
+    x = np.empty_like(r)
+    for k in range(n - 1, -1, -1):
+        acc = r[k].copy()
+        for j in range(k + 1, n):
+            acc -= M[k, j] * x[j]
+        x[k] = acc / M[k, k]
+    return x
+
+
+def _solve_fixed(H: np.ndarray, g: np.ndarray, fixed: np.ndarray, fixed_val: np.ndarray) -> np.ndarray:
+    """
+    Selesaikan H x = g dengan sebagian variabel terpaku, batch di sumbu terakhir:
+    H (slot, slot, N), g / fixed / fixed_val (slot, N) -> x (slot, N).
+
+    Variabel terpaku dipindah ke ruas kanan, baris/kolomnya diganti identitas
+    sehingga sistem tetap simetris definit positif.
+    """
+    free = ~fixed
+    M = H * (free[:, None] & free[None, :])
+    for i in range(H.shape[0]):
+        M[i, i] += fixed[i]
+    rhs = np.where(fixed, fixed_val, g - np.einsum("ijn,jn->in", H, fixed_val))
+    return _solve_spd(M, rhs)
+
+
+def _enumerate_active_sets(H: np.ndarray, g: np.ndarray, v: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """
+    Cadangan: untuk setiap meal (H, g, slot valid `v`) coba semua pola
+    active-set dan pilih solusi layak dengan objektif terkecil, (meal, slot).
+    """
+    n_meals, n_slots = v.shape
+    pat = _patterns(n_slots)                                    # (P, slot)
+    n_pat = len(pat)
+    fixed = ((pat[None] > 0) | ~v[:, None, :]).reshape(-1, n_slots).T
+    fixed_val = (np.where(pat == 2, hi, lo)[None] * v[:, None, :]).reshape(-1, n_slots).T * fixed
+
+    Hrep = np.repeat(H.reshape(n_meals, -1), n_pat, axis=0).T.reshape(n_slots, n_slots, -1)
+    grep = np.repeat(g, n_pat, axis=0).T
+    x = _solve_fixed(Hrep, grep, fixed, fixed_val)
+
+    feasible = (fixed | ((x >= lo - FEAS_TOL) & (x <= hi + FEAS_TOL))).all(axis=0)
+    Hx = np.einsum("ijn,jn->in", Hrep, x)
+    obj = (x * (0.5 * Hx - grep)).sum(axis=0)                   # 0.5·xᵀHx - gᵀx
+    obj = np.where(feasible, obj, np.inf).reshape(n_meals, n_pat)
+    best = np.arange(n_meals) * n_pat + np.argmin(obj, axis=1)
+    return x[:, best].T
+
+
+def _active_set_iterations(H: np.ndarray, g: np.ndarray, v: np.ndarray, lo: float, hi: float):
+    """
+    Active-set berbatch: mulai dari solusi bebas, variabel yang keluar batas
+    dipaku ke batas tersebut dan variabel terpaku yang gradiennya menunjuk ke
+    dalam dilepas lagi, sampai kondisi KKT terpenuhi (paling banyak
+    ACTIVE_SET_ITERS kali). H definit positif, jadi titik KKT = optimum unik.
+    -> (x (meal, slot), selesai (meal,)).
+    """
+    n_meals, n_slots = v.shape
+    Ht = np.ascontiguousarray(H.transpose(1, 2, 0))            # (slot, slot, meal)
+    gt = np.ascontiguousarray(g.T)
+    valid = v.T
+    state = np.zeros((n_slots, n_meals), dtype=np.int8)         # 0 bebas, 1 bawah, 2 atas
+    x = np.zeros((n_slots, n_meals))
+    done = np.zeros(n_meals, dtype=bool)
+    rows = np.arange(n_meals)
+
+    for _ in range(ACTIVE_SET_ITERS):
+        st, vv = state[:, rows], valid[:, rows]
+        fixed = (st > 0) | ~vv
+        xr = _solve_fixed(Ht[..., rows], gt[:, rows], fixed, np.where(st == 2, hi, lo) * fixed * vv)
+        grad = np.einsum("ijn,jn->in", Ht[..., rows], xr) - gt[:, rows]
+
+        below = ~fixed & (xr < lo - FEAS_TOL)
+        above = ~fixed & (xr > hi + FEAS_TOL)
+        release = vv & (((st == 1) & (grad < -FEAS_TOL)) | ((st == 2) & (grad > FEAS_TOL)))
+        ok = ~(below | above | release).any(axis=0)
+
+        x[:, rows] = xr
+        done[rows[ok]] = True
+        st = np.where(below, 1, np.where(above, 2, np.where(release, 0, st)))
+        state[:, rows] = st
+        rows = rows[~ok]
+        if not rows.size:
+            break
+
+    return x.T, done
+
+
+def solve_portions(macros: np.ndarray, targets: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Porsi optimal per item (gram) untuk banyak meal sekaligus.
+
+    macros : (..., n_slots, 4) ENERGI/PROTEIN/LEMAK/KARBO per 100 g
+    targets: (...)             target kkal tiap meal
+    valid  : (..., n_slots)    slot berisi item; slot kosong dipaku 0 g
+
+    Meminimalkan ||W(A·x - 1)||² + RIDGE²·||x - x_uniform||² dengan x dalam
+    satuan 100 g, di mana baris A = [kkal, protein, lemak, karbo] relatif
+    terhadap targetnya. Masalahnya konveks, sehingga solusi terbaik di antara
+    pola active-set yang layak adalah optimum global.
+    """
+    macros = np.asarray(macros, dtype=float)
+    valid = np.asarray(valid, dtype=bool)
+    batch_shape, n_slots = valid.shape[:-1], valid.shape[-1]
+
+    m = macros.reshape(-1, n_slots, 4)
+    v = valid.reshape(-1, n_slots)
+    t = np.broadcast_to(np.asarray(targets, dtype=float), batch_shape).reshape(-1)
+    n_meals = len(t)
+    if n_meals == 0 or n_slots == 0:
+        return np.zeros(valid.shape)
+
+    # Matriks residual A (meal, 4 residual, slot) dan target b = 1
+    t_safe = np.where(t > 0, t, 1.0)
+    goal = np.stack([t_safe] + [t_safe * r / kcal_g for r, kcal_g in MACRO_SPLIT.values()], axis=1)
+    weights = np.array([W_KCAL, W_MACRO, W_MACRO, W_MACRO])
+    A = np.where(v[:, None, :], np.swapaxes(m, 1, 2), 0.0) * (weights / goal)[..., None]
+    b = np.broadcast_to(weights, (n_meals, 4))
+
+    lo, hi = PORTION_MIN / 100, PORTION_MAX / 100
+    x0 = uniform_portions(m, t, v) / 100
+
+    # Persamaan normal: H x = g
+    eye = np.eye(n_slots)
+    H = np.einsum("mri,mrj->mij", A, A) + RIDGE ** 2 * eye
+    g = np.einsum("mri,mr->mi", A, b) + RIDGE ** 2 * x0
+
+    # Active-set berbatch (biasanya selesai dalam 2-3 iterasi); meal yang
+    # belum memenuhi KKT dienumerasi, per potongan SOLVE_CHUNK_MEALS meal agar
+    # memori tetap O(potongan x 81) berapa pun jumlah meal.
+    x, done = _active_set_iterations(H, g, v, lo, hi)
+    todo = np.flatnonzero(~done)
+    for start in range(0, len(todo), SOLVE_CHUNK_MEALS):
+        rows = todo[start:start + SOLVE_CHUNK_MEALS]
+        x[rows] = _enumerate_active_sets(H[rows], g[rows], v[rows], lo, hi)
+
+    x = np.clip(x, lo, hi) * v
+    # Meal tanpa target kalori: kembali ke porsi seragam
+    x = np.where((t > 0)[:, None], x, x0)
+    return (100 * x).reshape(valid.shape)
@@ -0,0 +1,111 @@
+# FILE: modules/preload.py
+from __future__ import annotations
+from typing import Dict, Any
+import gc
+import os
+import time
+
+import numpy as np
+
+from modules.io_utils import get_catalog
+from modules.scoring import catalog_scores, load_models
+
+# ==============================================================================
+# PRELOAD SEBELUM FORK (DEPLOYMENT MULTI-WORKER)
+# Dipanggil sekali di proses master (mis. hook `when_ready` gunicorn dengan
+# preload_app=True) sebelum worker di-fork: katalog + indeks batasan, bundle
+# model (engine array) dan skor katalog dibangun sekali lalu diwarisi semua
+# worker lewat copy-on-write. Array numpy ditandai read-only agar tidak ada
+# yang menulis ke halaman bersama, dan gc.freeze() memindahkan semua objek
+# ke generasi permanen sehingga siklus GC di worker tidak menyentuh (dan
+# menyalin) halaman milik master. Cache per proses (io_utils._CATALOG,
+# registry._BUNDLE, scoring._SCORE_CACHE) sudah terisi, jadi request pertama
+# di worker baru tidak perlu parsing/unpickle lagi.
+# ==============================================================================
+PRELOAD_PDF = os.environ.get("DIETREC_PRELOAD_PDF", "1").lower() in ("1", "true", "ya")
+
+
+def _readonly(obj: Any) -> int:
+    """Tandai semua np.ndarray di dalam dict/list/tuple read-only; -> jumlah array."""
+    if isinstance(obj, np.ndarray):
+        obj.flags.writeable = False
+        return 1
+    if isinstance(obj, dict):
+        return sum(_readonly(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_readonly(v) for v in obj)
+    return 0
+
+
+def _readonly_frame(df) -> int:
+    """
+    Blok numerik DataFrame katalog dijadikan read-only (katalog tidak pernah
+    diubah in-place; lihat io_utils.get_catalog). Blok object (teks) tetap.
+    """
+    blocks = getattr(getattr(df, "_mgr", None), "blocks", ())
+    count = 0
+    for blk in blocks:
+        values = getattr(blk, "values", None)
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            count += _readonly(values)
+    return count
+
+
+def _warm_templates(app) -> int:
+    env = app.jinja_env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def _import_reportlab() -> bool:
+    """Import modul ReportLab yang dipakai build_pdf (dibagi bersama semua worker)."""
+    try:
+        import reportlab.platypus  # noqa: F401
+        import reportlab.lib.styles  # noqa: F401
+        import reportlab.lib.pagesizes  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def preload(app=None, pdf: bool = PRELOAD_PDF, freeze: bool = True) -> Dict[str, Any]:
+    """
+    Bangun semua state bersama di proses saat ini (master) lalu bekukan GC.
+
+    `app` (opsional) = aplikasi Flask; template Jinja-nya ikut dikompilasi.
+    Tidak memulai thread maupun pelatihan model: jika model belum dilatih,
+    worker memakai skor rule-based sampai pelatihan (di worker) selesai.
+    Mengembalikan ringkasan untuk log.
+    """
+    t0 = time.perf_counter()
+    info: Dict[str, Any] = {"rows": 0, "scoring": None, "readonly_arrays": 0,
+                            "templates": 0, "reportlab": False}
+
+    catalog = get_catalog()
+    bundle = load_models()
+    if catalog["errors"]:
+        print(f"[WARN] Preload katalog gagal: {catalog['errors']}")
+    else:
+        df = catalog["df"]
+        catalog_scores(df, catalog["sha1"], bundle)
+        info["rows"] = len(df)
+        info["readonly_arrays"] += _readonly_frame(df) + _readonly(catalog["index"])
+    if bundle is None:
+        print("[WARN] Model belum dilatih; worker memakai skor rule-based.")
+    else:
+        info["readonly_arrays"] += _readonly(bundle["engine"])
+    info["scoring"] = "ensemble" if bundle is not None else "rule-based"
+
+    if app is not None:
+        info["templates"] = _warm_templates(app)
+    if pdf:
+        info["reportlab"] = _import_reportlab()
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    info["frozen_objects"] = gc.get_freeze_count()
+    info["seconds"] = round(time.perf_counter() - t0, 3)
+    return info
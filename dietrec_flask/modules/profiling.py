@@ -0,0 +1,217 @@
+# FILE: modules/profiling.py
+from __future__ import annotations
+from typing import Iterator, List, Tuple
+from collections import Counter, deque
+from contextlib import contextmanager
+import contextvars
+import cProfile
+import datetime
+import hmac
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+
+# ==============================================================================
+# PROFILING ON-DEMAND (PER REQUEST)
+# Aktif untuk route tertentu jika DIETREC_PROFILE=1 (semua request) atau
+# request membawa ?_profile=<DIETREC_PROFILE_TOKEN> (admin). Dua mode:
+#   - "cprofile": file .prof (pstats/snakeviz) + ringkasan .txt,
+#   - "sample"  : sampler sys._current_frames() -> collapsed stacks
+#                 (.folded, format flamegraph.pl / speedscope).
+# Jumlah profil dibatasi DIETREC_PROFILE_PER_MIN per menit agar overhead
+# tetap terkendali. Render PDF di pool ikut diprofil jika request yang
+# menjadwalkannya sedang diprofil (lihat `active_tag`/`profile_block`).
+# ==============================================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE_ALL = os.environ.get("DIETREC_PROFILE", "").lower() in ("1", "true", "ya")
+PROFILE_TOKEN = os.environ.get("DIETREC_PROFILE_TOKEN", "")
+PROFILE_MODE = os.environ.get("DIETREC_PROFILE_MODE", "cprofile").lower()
+PROFILE_DIR = os.environ.get("DIETREC_PROFILE_DIR", os.path.join(BASE_DIR, "instance", "profiles"))
+PROFILE_PER_MIN = int(os.environ.get("DIETREC_PROFILE_PER_MIN", 6))
+PROFILE_MIN_MS = float(os.environ.get("DIETREC_PROFILE_MIN_MS", 0))   # simpan hanya jika lebih lambat
+SAMPLE_INTERVAL = float(os.environ.get("DIETREC_PROFILE_INTERVAL_MS", 2)) / 1000
+
+PROFILED_ROUTES = ("/result", "/api/recalc", "/export_pdf")
+QUERY_FLAG = "_profile"
+MODES = ("cprofile", "sample")
+
+_RATE_LOCK = threading.Lock()
+_STARTED: deque = deque()
+_SEQ = itertools.count(1)
+_ACTIVE: contextvars.ContextVar[str | None] = contextvars.ContextVar("dietrec_profile", default=None)
+
+
+def _allow() -> bool:
+    """Batas laju: maksimal PROFILE_PER_MIN profil dalam 60 detik terakhir."""
+    now = time.monotonic()
+    with _RATE_LOCK:
+        while _STARTED and now - _STARTED[0] > 60:
+            _STARTED.popleft()
+        if len(_STARTED) >= PROFILE_PER_MIN:
+            return False
+        _STARTED.append(now)
+        return True
+
+
+def requested(query_value: str | None) -> bool:
+    """Profil diminta lewat env (semua request) atau token admin yang cocok."""
+    if PROFILE_ALL:
+        return True
+    if not PROFILE_TOKEN or not query_value:
+        return False
+    return hmac.compare_digest(query_value.encode(), PROFILE_TOKEN.encode())
+
+
+def active_tag() -> str | None:
+    """Tag profil request aktif (diteruskan ke job latar belakang, mis. PDF)."""
+    return _ACTIVE.get()
+
+
+# ==============================================================================
+# PROFILER
+# ==============================================================================
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sampler berbasis sys._current_frames() untuk satu thread target."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id, self.interval = thread_id, max(interval, 0.0005)
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class RequestProfiler:
+    def __init__(self, tag: str, mode: str = PROFILE_MODE):
+        self.tag = tag
+        self.mode = mode if mode in MODES else "cprofile"
+        self._prof = None
+        self._t0 = 0.0
+
+    def start(self) -> "RequestProfiler":
+        self._t0 = time.perf_counter()
+        if self.mode == "sample":
+            self._prof = StackSampler(threading.get_ident())
+            self._prof.start()
+        else:
+            self._prof = cProfile.Profile()
+            try:
+                self._prof.enable()
+            except ValueError:
+                # Python 3.12+: hanya satu cProfile aktif per proses -> pakai sampler
+                self.mode = "sample"
+                return self.start()
+        return self
+
+    def stop(self) -> Tuple[float, List[str]]:
+        """Hentikan profiler; tulis file jika durasi >= PROFILE_MIN_MS. -> (ms, path file)."""
+        if self.mode == "sample":
+            self._prof.stop()
+        else:
+            self._prof.disable()
+        elapsed_ms = (time.perf_counter() - self._t0) * 1000
+        if elapsed_ms < PROFILE_MIN_MS:
+            return elapsed_ms, []
+        try:
+            return elapsed_ms, self._write(elapsed_ms)
+        except OSError as e:
+            print(f"[WARN] Gagal menulis profil {self.tag}: {e}")
+            return elapsed_ms, []
+
+    def _write(self, elapsed_ms: float) -> List[str]:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(PROFILE_DIR, f"{stamp}_{self.tag}_{elapsed_ms:.0f}ms")
+
+        if self.mode == "sample":
+            path = base + ".folded"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._prof.collapsed())
+            return [path]
+
+        self._prof.dump_stats(base + ".prof")
+        buf = io.StringIO()
+        pstats.Stats(self._prof, stream=buf).sort_stats("cumulative").print_stats(40)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+        return [base + ".prof", base + ".txt"]
+
+
+def _slug(route: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in route.strip("/")) or "root"
+
+
+@contextmanager
+def profile_block(tag: str | None) -> Iterator[None]:
+    """
+    Profil satu blok kode dengan tag tertentu (no-op jika tag None). Kuota
+    tidak dicek lagi: tag hanya ada jika request asalnya sudah lolos kuota.
+    """
+    if tag is None:
+        yield
+        return
+    prof = RequestProfiler(tag).start()
+    try:
+        yield
+    finally:
+        prof.stop()
+
+
+# ==============================================================================
+# INTEGRASI FLASK
+# ==============================================================================
+def init_app(app, routes: Tuple[str, ...] = PROFILED_ROUTES) -> None:
+    """Bungkus request ke `routes` dengan profiler jika diminta dan kuota tersedia."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        if rule not in routes or not requested(request.args.get(QUERY_FLAG)) or not _allow():
+            return
+        tag = f"{_slug(rule)}-{os.getpid()}-{next(_SEQ)}"
+        g._profile = (RequestProfiler(tag).start(), _ACTIVE.set(tag))
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        state = g.pop("_profile", None)
+        if state is None:
+            return
+        prof, token = state
+        try:
+            _ACTIVE.reset(token)
+        except ValueError:
+            _ACTIVE.set(None)
+        elapsed_ms, paths = prof.stop()
+        if paths:
+            print(f"[PROFILE] {request.path} {elapsed_ms:.1f} ms -> {', '.join(paths)}")
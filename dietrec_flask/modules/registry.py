@@ -0,0 +1,320 @@
+# FILE: modules/registry.py
+from __future__ import annotations
+from typing import Dict, Any, Tuple, Callable
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from modules.tree_engine import compile_ensemble, load_engine, save_engine
+
+# ==============================================================================
+# MODEL REGISTRY (RF + XGB)
+# Bundle model dimuat sekali per proses. Setiap akses hanya melakukan stat()
+# pada file artefak; jika mtime/ukuran berubah, checksum SHA-256 dihitung ulang
+# dan bundle baru dimuat lalu ditukar secara atomik. Request yang sedang
+# berjalan tetap memegang referensi ke bundle lama sampai selesai.
+#
+# Publikasi: artefak baru ditulis dengan nama berversi (rf_model.<versi>.pkl,
+# xgb_model.<versi>.pkl) lalu `manifest.json` ditulis PALING AKHIR (os.replace).
+# Registry hanya mengikuti manifest, sehingga RF dan XGB selalu berpindah
+# bersamaan dan tidak ada proses yang memuat pasangan RF baru + XGB lama.
+# Tanpa manifest (artefak lama), file rf_model.pkl / xgb_model.pkl dipakai.
+# ==============================================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+MODEL_FILES = {"rf": "rf_model.pkl", "xgb": "xgb_model.pkl"}
+MANIFEST_FILE = "manifest.json"
+ENGINE_FILE = "ensemble_engine.npz"
+
+_BUNDLE_LOCK = threading.Lock()
+_BUNDLE: Dict[str, Any] | None = None
+# Objek RF/XGB yang di-unpickle belakangan untuk batch besar: (versi, models)
+_LIBRARY_LOCK = threading.Lock()
+_LIBRARY: Tuple[str, Dict[str, Any] | None] | None = None
+
+
+def _stat_sig(names) -> Tuple | None:
+    sig = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(MODEL_DIR, name))
+        except OSError:
+            return None
+        sig.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def _signature() -> Tuple | None:
+    """(nama, mtime, ukuran) manifest, atau kedua artefak lama; None jika belum ada."""
+    return _stat_sig([MANIFEST_FILE]) or _stat_sig(MODEL_FILES.values())
+
+
+def read_manifest() -> Dict[str, str] | None:
+    """{"rf": nama file, "xgb": nama file} dari manifest; None jika belum ada."""
+    try:
+        with open(os.path.join(MODEL_DIR, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    return {key: manifest["files"][key] for key in MODEL_FILES}
+
+
+def model_files() -> Dict[str, str]:
+    """Nama file artefak aktif (menurut manifest, atau nama lama)."""
+    return read_manifest() or dict(MODEL_FILES)
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def model_checksums(files: Dict[str, str] | None = None) -> Dict[str, str]:
+    """Checksum SHA-256 artefak `files` (default: artefak aktif; file harus ada)."""
+    files = files or model_files()
+    return {key: _sha256(os.path.join(MODEL_DIR, name)) for key, name in files.items()}
+
+
+def versioned_name(key: str, version: str) -> str:
+    """rf_model.pkl + versi -> rf_model.<versi>.pkl (file tidak pernah ditimpa)."""
+    stem, ext = os.path.splitext(MODEL_FILES[key])
+    return f"{stem}.{version}{ext}"
+
+
+def new_version() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def publish_manifest(files: Dict[str, str]) -> None:
+    """
+    Aktifkan artefak `files` (sudah ditulis lengkap) dengan menulis manifest
+    secara atomik. Artefak berversi lama dihapus, kecuali versi sebelumnya
+    (proses lain mungkin baru saja membaca manifest lama).
+    """
+    try:
+        previous = read_manifest()
+    except (OSError, ValueError, KeyError):
+        previous = None
+    path = os.path.join(MODEL_DIR, MANIFEST_FILE)
+    tmp = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"files": files, "published_at": time.time()}, f, indent=2)
+    os.replace(tmp, path)
+
+    live = set(files.values()) | set((previous or {}).values())
+    for name in MODEL_FILES.values():
+        stem, ext = os.path.splitext(name)
+        for f in glob.glob(os.path.join(MODEL_DIR, f"{stem}.*{ext}")):
+            if os.path.basename(f) not in live:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+
+
+def _load_models(files: Dict[str, str], checksums: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Engine array (modules.tree_engine) dipakai langsung jika dikompilasi dari
+    artefak yang sama; tanpa unpickle, sklearn/xgboost tidak perlu dimuat.
+    Jika belum ada / basi, model di-unpickle lalu engine dikompilasi ulang.
+    """
+    engine_path = os.path.join(MODEL_DIR, ENGINE_FILE)
+    engine = load_engine(engine_path)
+    if engine is not None and engine["source"] == checksums:
+        return {"engine": engine}
+
+    import joblib  # unpickle RF/XGB (memuat sklearn/xgboost) hanya jika engine basi
+
+    models = {key: joblib.load(os.path.join(MODEL_DIR, name)) for key, name in files.items()}
+    models["engine"] = compile_ensemble(models["rf"], models["xgb"], source=checksums)
+    try:
+        save_engine(models["engine"], engine_path)
+    except OSError as e:
+        print(f"[WARN] Gagal menyimpan engine model: {e}")
+    return models
+
+
+def get_bundle() -> Dict[str, Any] | None:
+    """
+    Mengembalikan bundle model aktif, atau None jika artefak belum tersedia.
+
+    Bundle: {"engine", "files", "version", "checksums", "signature", "loaded_at"} plus
+    {"rf", "xgb"} (objek library) jika engine harus dikompilasi ulang.
+    "version" diturunkan dari checksum isi file, sehingga file yang hanya
+    di-touch tidak dianggap model baru.
+    """
+    global _BUNDLE
+
+    sig = _signature()
+    current = _BUNDLE
+    if sig is None or (current is not None and current["signature"] == sig):
+        return current
+
+    with _BUNDLE_LOCK:
+        current = _BUNDLE
+        if current is not None and current["signature"] == sig:
+            return current
+
+        try:
+            # Manifest dibaca sekali: nama file dan checksum berasal dari versi yang sama
+            files = model_files()
+            checksums = model_checksums(files)
+            if current is not None and current["checksums"] == checksums:
+                _BUNDLE = dict(current, signature=sig)
+                return _BUNDLE
+
+            models = _load_models(files, checksums)
+        except Exception as e:
+            # Artefak sedang ditulis / rusak: tetap layani dengan bundle lama
+            print(f"[WARN] Gagal memuat model ({e}); memakai bundle sebelumnya.")
+            return current
+
+        version = hashlib.sha256("".join(checksums[k] for k in sorted(checksums)).encode()).hexdigest()[:16]
+        _BUNDLE = dict(models, files=files, version=version, checksums=checksums, signature=sig,
+                       loaded_at=time.time())
+        return _BUNDLE
+
+
+def library_models(bundle: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    {"rf", "xgb"} (objek sklearn/xgboost) untuk `bundle`, di-unpickle sekali
+    per versi saat pertama diminta. None jika tidak tersedia (library tidak
+    terpasang, artefak sudah dihapus); pemanggil lalu memakai engine array.
+    """
+    global _LIBRARY
+
+    if "rf" in bundle:
+        return {"rf": bundle["rf"], "xgb": bundle["xgb"]}
+    cached = _LIBRARY
+    if cached is not None and cached[0] == bundle["version"]:
+        return cached[1]
+
+    with _LIBRARY_LOCK:
+        cached = _LIBRARY
+        if cached is not None and cached[0] == bundle["version"]:
+            return cached[1]
+        try:
+            import joblib
+
+            models = {key: joblib.load(os.path.join(MODEL_DIR, name)) for key, name in bundle["files"].items()}
+            if model_checksums(bundle["files"]) != bundle["checksums"]:
+                models = None  # Artefak sudah diganti versi lain sejak bundle dimuat
+        except Exception as e:
+            print(f"[WARN] Model library tidak tersedia ({e}); batch besar memakai engine array.")
+            models = None
+        _LIBRARY = (bundle["version"], models)
+        return models
+
+
+def bundle_info() -> Dict[str, Any] | None:
+    """Metadata bundle aktif (tanpa objek model), untuk logging/diagnostik."""
+    bundle = get_bundle()
+    if bundle is None:
+        return None
+    return {"version": bundle["version"], "checksums": dict(bundle["checksums"]), "loaded_at": bundle["loaded_at"]}
+
+
+# ==============================================================================
+# BACKGROUND TRAINER (SINGLE-FLIGHT)
+# Pelatihan tidak pernah berjalan di jalur request. Paling banyak satu job
+# per proses (thread) dan per direktori model (lock file), sehingga beberapa
+# worker yang start bersamaan tidak melatih model yang sama berkali-kali.
+# Kegagalan dicatat di file penanda; selama TRAIN_FAILURE_BACKOFF_SEC tidak
+# ada pelatihan baru (kegagalan permanen tidak diulang di setiap request).
+# ==============================================================================
+TRAIN_LOCK_FILE = os.path.join(MODEL_DIR, ".training.lock")
+TRAIN_LOCK_STALE_SEC = 3600
+TRAIN_FAILED_FILE = os.path.join(MODEL_DIR, ".training.failed")
+TRAIN_FAILURE_BACKOFF_SEC = int(os.environ.get("DIETREC_TRAIN_BACKOFF_SEC", 600))
+
+_TRAIN_LOCK = threading.Lock()
+_TRAIN_THREAD: threading.Thread | None = None
+
+
+def _acquire_train_lock() -> bool:
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(TRAIN_LOCK_FILE) > TRAIN_LOCK_STALE_SEC:
+            os.remove(TRAIN_LOCK_FILE)  # Sisa proses yang mati di tengah pelatihan
+    except OSError:
+        pass
+
+    try:
+        fd = os.open(TRAIN_LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def _record_failure(error: Exception) -> None:
+    try:
+        with open(TRAIN_FAILED_FILE, "w", encoding="utf-8") as f:
+            f.write(f"{time.time()}\t{os.getpid()}\t{error}\n")
+    except OSError:
+        pass
+
+
+def last_training_failure() -> float | None:
+    """Waktu (epoch) kegagalan pelatihan terakhir, atau None."""
+    try:
+        return os.path.getmtime(TRAIN_FAILED_FILE)
+    except OSError:
+        return None
+
+
+def _run_training(train_fn: Callable, args: tuple) -> None:
+    try:
+        train_fn(*args)
+        get_bundle()  # Langsung muat artefak baru di proses ini
+        try:
+            os.remove(TRAIN_FAILED_FILE)
+        except OSError:
+            pass
+        print("[INFO] Pelatihan latar belakang selesai, model aktif.")
+    except Exception as e:
+        _record_failure(e)
+        print(f"[ERROR] Pelatihan latar belakang gagal: {e} "
+              f"(tidak diulang selama {TRAIN_FAILURE_BACKOFF_SEC} detik)")
+    finally:
+        try:
+            os.remove(TRAIN_LOCK_FILE)
+        except OSError:
+            pass
+
+
+def start_background_training(train_fn: Callable, *args) -> bool:
+    """
+    Menjalankan `train_fn(*args)` di thread latar belakang jika belum ada
+    pelatihan yang berjalan dan tidak ada kegagalan dalam masa backoff.
+    Mengembalikan True jika job baru dimulai.
+    """
+    global _TRAIN_THREAD
+
+    with _TRAIN_LOCK:
+        if _TRAIN_THREAD is not None and _TRAIN_THREAD.is_alive():
+            return False
+        failed_at = last_training_failure()
+        if failed_at is not None and time.time() - failed_at < TRAIN_FAILURE_BACKOFF_SEC:
+            return False
+        if not _acquire_train_lock():
+            return False
+
+        _TRAIN_THREAD = threading.Thread(
+            target=_run_training, args=(train_fn, args), name="model-trainer", daemon=True
+        )
+        _TRAIN_THREAD.start()
+        return True
+
+
+def training_in_progress() -> bool:
+    thread = _TRAIN_THREAD
+    return (thread is not None and thread.is_alive()) or os.path.exists(TRAIN_LOCK_FILE)
@@ -1,27 +1,18 @@
 import pandas as pd
 import numpy as np
-import joblib
 import os
+import threading
 
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-
-from sklearn.model_selection import train_test_split, KFold, cross_val_score
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-
-# ==============================================================================
-# KONFIGURASI MODEL
-# ==============================================================================
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_DIR = os.path.join(BASE_DIR, "models")
-
-if not os.path.exists(MODEL_DIR):
-    os.makedirs(MODEL_DIR)
+from modules.io_utils import ALLERGY_MAP, DISEASE_MAP
+from modules.constraints import build_constraint_index, filter_indices
+from modules.registry import get_bundle, library_models
+from modules.tree_engine import SMALL_BATCH_ROWS, predict_ensemble
+from modules.features import macro_arrays, pseudo_scores
 
 # ==============================================================================
 # 1. SAFETY LAYER (RULE-BASED FILTERING)
 # ==============================================================================
-def apply_filters(df, mapping, halal_pref, allergies, diseases):
+def apply_filters(df, mapping, halal_pref, allergies, diseases, index=None, version=None):
     """
     LAPISAN 1: SAFETY LAYER (Rule-Based Filtering)
 
@@ -31,38 +22,17 @@ def apply_filters(df, mapping, halal_pref, allergies, diseases):
     - Penyakit
 
     Sifat: Hard Constraint (menu yang tidak lolos langsung dibuang).
+
+    `index` adalah indeks batasan dari katalog (modules.constraints) dan
+    `version` versi katalog `df` (sha1, seperti catalog_scores). Indeks hanya
+    dipakai jika dibangun untuk versi yang sama; selain itu (termasuk tanpa
+    `version`) indeks dibangun dari `df` saat itu juga.
     """
-    out = df.copy()
-
-    def _row_has_label(cell_val, keywords):
-        val_lower = str(cell_val).lower()
-        return any(k.lower() in val_lower for k in keywords)
-
-    # 1. Filter Halal
-    if halal_pref and mapping.get("halal"):
-        out = out[out[mapping["halal"]].astype(str).str.contains(
-            "halal", case=False, na=False
-        )]
-
-    # 2. Filter Alergi
-    if allergies and mapping.get("allergy"):
-        col_a = mapping["allergy"]
-        for allergy in allergies:
-            mask = out[col_a].astype(str).apply(
-                lambda x: _row_has_label(x, [allergy])
-            )
-            out = out[~mask]
-
-    # 3. Filter Penyakit
-    if diseases and mapping.get("penyakit"):
-        col_p = mapping["penyakit"]
-        for d in diseases:
-            mask = out[col_p].astype(str).apply(
-                lambda x: _row_has_label(x, [d])
-            )
-            out = out[~mask]
-
-    return out
+    if index is None or version is None or index.get("version") != version or index["rows"] != len(df):
+        index = build_constraint_index(df, mapping, ALLERGY_MAP.values(), DISEASE_MAP.values(), version=version)
+
+    rows = filter_indices(index, halal_pref, allergies, diseases)
+    return df.iloc[rows]
 
 
 # ==============================================================================
@@ -94,152 +64,143 @@ def _calculate_pseudo_label(row, target_calories=2000):
     return max(0, min(100, score))
 
 
+def rule_based_scores(df, target_calories=2000):
+    """
+    Versi vektor dari `_calculate_pseudo_label` untuk seluruh baris.
+
+    Dipakai sebagai skor deterministik selama model belum tersedia.
+    """
+    e, p, l, _ = macro_arrays(df)
+    return pseudo_scores(e, p, l, target_calories)
+
+
 # ==============================================================================
 # 3. TRAINING + 5-FOLD CROSS VALIDATION
 # ==============================================================================
-def train_models(df):
+def train_models(df, cv_jobs=1):
     """
-    Melatih model Random Forest dan XGBoost.
+    Melatih model Random Forest dan XGBoost (lihat modules.training).
 
-    Evaluasi dilakukan dengan:
-    - Train-test split (80:20)
-    - 5-Fold Cross Validation
-
-    Target regresi: pseudo-label deviasi nutrisi.
+    sklearn/xgboost baru di-import saat fungsi ini dipanggil, sehingga
+    proses serving yang hanya melakukan inferensi tidak ikut memuatnya.
     """
-    df = df.copy()
-
-    # Generate pseudo-label
-    df["pseudo_score"] = df.apply(
-        lambda r: _calculate_pseudo_label(r, 2000), axis=1
-    )
-
-    # Input features hanya 4 makronutrien utama
-    feature_cols = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
-
-    for col in feature_cols:
-        if col not in df.columns:
-            df[col] = 0
-
-    X = df[feature_cols].fillna(0)
-    y = df["pseudo_score"]
-
-    # ============================
-    # Train-Test Split (80:20)
-    # ============================
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-
-    # ============================
-    # Model Definitions
-    # ============================
-    rf = RandomForestRegressor(
-        n_estimators=100,
-        random_state=42
-    )
-
-    xgb = XGBRegressor(
-        n_estimators=100,
-        learning_rate=0.1,
-        random_state=42
-    )
-
-    # ============================
-    # Training
-    # ============================
-    rf.fit(X_train, y_train)
-    xgb.fit(X_train, y_train)
-
-    # ============================
-    # Test Evaluation
-    # ============================
-    pred_rf = rf.predict(X_test)
-    pred_xgb = xgb.predict(X_test)
-
-    # Ensemble output
-    pred_ensemble = 0.5 * pred_rf + 0.5 * pred_xgb
-
-    mae = mean_absolute_error(y_test, pred_ensemble)
-    rmse = np.sqrt(mean_squared_error(y_test, pred_ensemble))
-    r2 = r2_score(y_test, pred_ensemble)
-
-    print("\n=== TEST SET PERFORMANCE ===")
-    print("MAE  :", round(mae, 5))
-    print("RMSE :", round(rmse, 5))
-    print("R²   :", round(r2, 5))
-
-    # ============================
-    # 5-Fold Cross Validation
-    # ============================
-    print("\n=== 5-FOLD CROSS VALIDATION ===")
-
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
-
-    r2_scores = cross_val_score(
-        rf, X, y, cv=kf, scoring="r2"
-    )
-
-    rmse_scores = cross_val_score(
-        rf, X, y, cv=kf,
-        scoring="neg_root_mean_squared_error"
-    )
-
-    print("RF Mean R²  :", round(np.mean(r2_scores), 5))
-    print("RF Mean RMSE:", round(-np.mean(rmse_scores), 5))
-
-    # ============================
-    # Save Models
-    # ============================
-    joblib.dump(rf, os.path.join(MODEL_DIR, "rf_model.pkl"))
-    joblib.dump(xgb, os.path.join(MODEL_DIR, "xgb_model.pkl"))
-
-    print("\nModel berhasil dilatih dan disimpan.")
-    return rf, xgb
+    from modules.training import train_models as _train_models
+    return _train_models(df, cv_jobs=cv_jobs)
 
 
 # ==============================================================================
 # 4. LOAD MODEL
 # ==============================================================================
 def load_models():
-    """Memuat model Random Forest dan XGBoost dari disk."""
-    rf_path = os.path.join(MODEL_DIR, "rf_model.pkl")
-    xgb_path = os.path.join(MODEL_DIR, "xgb_model.pkl")
-
-    if os.path.exists(rf_path) and os.path.exists(xgb_path):
-        rf = joblib.load(rf_path)
-        xgb = joblib.load(xgb_path)
-        return {"rf": rf, "xgb": xgb}
+    """
+    Memuat model Random Forest dan XGBoost.
 
-    return None
+    Delegasi ke model registry: unpickle hanya terjadi sekali per proses
+    (dan lagi saat artefak di disk berubah).
+    """
+    return get_bundle()
 
 
 # ==============================================================================
 # 5. SCORING MENU (ENSEMBLE INFERENCE)
 # ==============================================================================
-def calculate_scores(df_filtered, bundle):
+FEATURE_COLS = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+# S_FINAL hanya bergantung pada 4 makronutrien (bukan pada user), jadi cukup
+# dihitung sekali per (versi katalog, versi model) untuk seluruh katalog.
+_SCORE_CACHE_LOCK = threading.Lock()
+_SCORE_CACHE = {}
+_SCORE_CACHE_MAX = 2
+
+
+RULE_BASED_VERSION = "rule-based"
+
+# Di atas batas ini predict library (Cython/C++) ~2x lebih cepat dari engine
+# array, jadi RF/XGB di-unpickle (sekali per versi) khusus untuk batch besar.
+# Katalog (~1.1k baris, skornya di-cache per versi) tetap lewat engine agar
+# worker serving tidak perlu memuat sklearn/xgboost.
+LIBRARY_BATCH_ROWS = int(os.environ.get("DIETREC_LIBRARY_BATCH_ROWS", 4096))
+
+
+def _predict_ensemble(df, bundle):
+    if bundle is None:
+        # Fallback: model belum siap (sedang dilatih di latar belakang)
+        return rule_based_scores(df)
+
+    engine = bundle.get("engine")
+    features = (engine or {}).get("features") or FEATURE_COLS
+    X_input = df.reindex(columns=features, fill_value=0).fillna(0)
+
+    # Engine array (tanpa sklearn/xgboost) untuk serving. Untuk batch besar,
+    # predict library lebih cepat: dipakai jika objeknya sudah dimuat, atau
+    # dimuat belakangan jika batch melewati LIBRARY_BATCH_ROWS.
+    n = len(X_input)
+    models = None
+    if engine is None or n > SMALL_BATCH_ROWS and ("rf" in bundle or n > LIBRARY_BATCH_ROWS):
+        models = library_models(bundle)
+    if models is None:
+        return predict_ensemble(engine, X_input.to_numpy(dtype=float))
+
+    # Prediksi RF dan XGB
+    pred_rf = models["rf"].predict(X_input)
+    pred_xgb = models["xgb"].predict(X_input)
+
+    # Ensemble score
+    return 0.5 * pred_rf + 0.5 * pred_xgb
+
+
+def catalog_scores(df, catalog_version, bundle):
+    """
+    Skor ensemble untuk seluruh katalog (pd.Series, index = index katalog).
+
+    Hasil di-cache per (versi katalog, versi model); begitu salah satu berubah,
+    key berubah dan skor dihitung ulang otomatis. Bundle tanpa versi
+    tidak di-cache. `bundle=None` berarti skor rule-based.
+    """
+    bundle_version = RULE_BASED_VERSION if bundle is None else bundle.get("version")
+    key = (catalog_version, bundle_version, len(df))
+    if key[0] is None or key[1] is None:
+        return pd.Series(_predict_ensemble(df, bundle), index=df.index)
+
+    cached = _SCORE_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    with _SCORE_CACHE_LOCK:
+        cached = _SCORE_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        scores = pd.Series(_predict_ensemble(df, bundle), index=df.index)
+        scores.values.flags.writeable = False
+
+        while len(_SCORE_CACHE) >= _SCORE_CACHE_MAX:
+            _SCORE_CACHE.pop(next(iter(_SCORE_CACHE)))
+        _SCORE_CACHE[key] = scores
+        return scores
+
+
+def calculate_scores(df_filtered, bundle, precomputed=None):
     """
     Menghitung skor akhir rekomendasi menggunakan Ensemble Learning (RF + XGB).
+
+    Jika `precomputed` (hasil `catalog_scores`) diberikan, skor cukup diambil
+    untuk baris yang lolos filter tanpa inferensi ulang. `bundle=None`
+    memakai skor rule-based (`rule_based_scores`).
     """
     if df_filtered.empty:
         return df_filtered
 
-    feature_cols = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
-
     df_ml = df_filtered.copy()
 
-    for col in feature_cols:
+    for col in FEATURE_COLS:
         if col not in df_ml.columns:
             df_ml[col] = 0
 
-    X_input = df_ml[feature_cols].fillna(0)
-
-    # Prediksi RF dan XGB
-    pred_rf = bundle["rf"].predict(X_input)
-    pred_xgb = bundle["xgb"].predict(X_input)
-
-    # Ensemble score
-    df_ml["S_FINAL"] = 0.5 * pred_rf + 0.5 * pred_xgb
+    if precomputed is not None:
+        df_ml["S_FINAL"] = precomputed.loc[df_ml.index].to_numpy()
+    else:
+        df_ml["S_FINAL"] = _predict_ensemble(df_ml, bundle)
 
     # Ranking final
     return df_ml.sort_values("S_FINAL", ascending=False)
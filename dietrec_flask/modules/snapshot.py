@@ -0,0 +1,147 @@
+# FILE: modules/snapshot.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Tuple, Dict, Any
+import json
+import os
+import threading
+import pandas as pd
+import numpy as np
+
+# ==============================================================================
+# SNAPSHOT KATALOG (COLUMNAR, MEMORY-MAPPABLE)
+# Hasil `load_tkpi` disimpan sebagai kumpulan file .npy di samping dataset:
+#   - kolom numerik (ENERGI/PROTEIN/LEMAK/KARBO) apa adanya,
+#   - kolom teks (NAMA, CLASS_45, HALAL, ALERGI, PENYAKIT, ...) sebagai kode
+#     int32 ke satu tabel string bersama (-1 = NaN).
+# Header `meta.json` menyimpan versi format, SHA-1 file sumber dan versi
+# parser (hash kode parsing/klasifikasi dari io_utils), sehingga loader tahu
+# kapan snapshot basi dan harus dibangun ulang: perubahan data maupun kode
+# parsing otomatis memicu parsing ulang tanpa menaikkan versi manual. Setiap file
+# ditulis ke nama sementara lalu os.replace, sehingga proses lain yang sedang
+# membaca / memory-map file lama tidak pernah melihat file terpotong.
+# ==============================================================================
+SNAPSHOT_VERSION = 1
+NUMERIC_COLS = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+def _file_prefix(source_sha1: str) -> str:
+    return source_sha1[:12]
+
+def _save_atomic(path: Path, arr: np.ndarray) -> None:
+    """np.save ke file sementara unik lalu os.replace (inode lama tetap utuh bagi pembaca)."""
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        with open(tmp, "wb") as f:
+            np.save(f, arr, allow_pickle=False)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+def write_snapshot(df: pd.DataFrame, mapping: Dict[str, str], snap_dir: Path,
+                   source_name: str, source_sha1: str, parser_version: str = "") -> Path:
+    """
+    Menulis snapshot katalog ke `snap_dir`. `parser_version` = versi kode
+    yang menghasilkan `df` (dicek ulang oleh read_snapshot).
+
+    File array diberi prefix hash sumber dan `meta.json` ditulis paling akhir
+    (os.replace), sehingga pembaca tidak pernah melihat snapshot setengah jadi.
+    """
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    prefix = _file_prefix(source_sha1)
+
+    strings: Dict[str, int] = {}
+    columns = []
+
+    for col in df.columns:
+        if col in NUMERIC_COLS:
+            arr = df[col].to_numpy()
+            _save_atomic(snap_dir / f"{prefix}.{col}.npy", arr)
+            columns.append({"name": col, "kind": "numeric", "dtype": str(arr.dtype)})
+            continue
+
+        values = df[col].to_numpy(dtype=object)
+        codes = np.full(len(values), -1, dtype=np.int32)
+        for i, v in enumerate(values):
+            if isinstance(v, float) and np.isnan(v):
+                continue
+            if v is None:
+                continue
+            codes[i] = strings.setdefault(str(v), len(strings))
+        _save_atomic(snap_dir / f"{prefix}.{col}.codes.npy", codes)
+        columns.append({"name": col, "kind": "text"})
+
+    table = np.array(list(strings.keys()) or [""], dtype=str)
+    _save_atomic(snap_dir / f"{prefix}.strings.npy", table)
+
+    meta = {
+        "format_version": SNAPSHOT_VERSION,
+        "source_name": source_name,
+        "source_sha1": source_sha1,
+        "parser_version": parser_version,
+        "prefix": prefix,
+        "rows": int(len(df)),
+        "columns": columns,
+        "mapping": mapping,
+    }
+    tmp_meta = snap_dir / f"meta.json.tmp-{os.getpid()}-{threading.get_ident()}"
+    tmp_meta.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp_meta, snap_dir / "meta.json")
+
+    # Bersihkan file dari snapshot lama (hash sumber berbeda)
+    for f in snap_dir.glob("*.npy"):
+        if not f.name.startswith(prefix + "."):
+            try:
+                f.unlink()
+            except OSError:
+                pass
+
+    return snap_dir
+
+def read_snapshot(snap_dir: Path, source_sha1: str,
+                  parser_version: str = "") -> Tuple[pd.DataFrame, Dict[str, str]] | None:
+    """
+    Membaca snapshot jika versi format, hash sumber dan versi parser cocok.
+
+    Kolom numerik tetap memory-mapped (read-only, tanpa salinan): halamannya
+    berasal dari page cache dan dibagi semua proses yang membaca snapshot
+    yang sama. Kolom teks di-decode menjadi array object (salinan per proses).
+
+    Mengembalikan None jika snapshot tidak ada, rusak, atau basi.
+    """
+    meta_path = snap_dir / "meta.json"
+    try:
+        meta: Dict[str, Any] = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if (meta.get("format_version") != SNAPSHOT_VERSION or meta.get("source_sha1") != source_sha1
+            or meta.get("parser_version") != parser_version):
+        return None
+
+    prefix = meta["prefix"]
+    try:
+        table = np.load(snap_dir / f"{prefix}.strings.npy", mmap_mode="r").astype(object)
+        data = {}
+        for col in meta["columns"]:
+            name = col["name"]
+            if col["kind"] == "numeric":
+                # ndarray biasa (bukan subclass np.memmap) di atas buffer mmap
+                data[name] = np.asarray(np.load(snap_dir / f"{prefix}.{name}.npy", mmap_mode="r"))
+            else:
+                codes = np.load(snap_dir / f"{prefix}.{name}.codes.npy", mmap_mode="r")
+                values = table[np.maximum(codes, 0)]
+                values[codes < 0] = np.nan
+                data[name] = values
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # copy=False: setiap kolom numerik menjadi blok sendiri di atas array mmap
+    # (konstruktor default menggabungkan kolom ke satu blok 2D = salinan)
+    df = pd.DataFrame(data, copy=False)
+    if len(df) != meta["rows"]:
+        return None
+    return df, meta["mapping"]
@@ -0,0 +1,130 @@
+# FILE: modules/training.py
+import os
+import numpy as np
+import joblib
+
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from modules.registry import MODEL_DIR, ENGINE_FILE, model_checksums, new_version, versioned_name, publish_manifest
+from modules.tree_engine import compile_ensemble, save_engine, check_parity
+from modules.features import macro_arrays, pseudo_scores
+from modules.cv import run_cv
+
+# ==============================================================================
+# TRAINING + 5-FOLD CROSS VALIDATION
+# Dipisah dari modules.scoring agar dependensi pelatihan (sklearn, xgboost,
+# joblib) hanya dimuat oleh train.py / pelatihan latar belakang, bukan saat
+# worker serving boot. Akses lewat `scoring.train_models` (import lazy).
+# ==============================================================================
+def train_models(df, cv_jobs=1):
+    """
+    Melatih model Random Forest dan XGBoost.
+
+    Evaluasi dilakukan dengan:
+    - Train-test split (80:20)
+    - 5-Fold Cross Validation (modules.cv, `cv_jobs` proses paralel)
+
+    Target regresi: pseudo-label deviasi nutrisi.
+    """
+    df = df.copy()
+
+    # Generate pseudo-label
+    e, p, l, _ = macro_arrays(df)
+    df["pseudo_score"] = pseudo_scores(e, p, l, 2000)
+
+    # Input features hanya 4 makronutrien utama
+    feature_cols = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+    for col in feature_cols:
+        if col not in df.columns:
+            df[col] = 0
+
+    X = df[feature_cols].fillna(0)
+    y = df["pseudo_score"]
+
+    # ============================
+    # Train-Test Split (80:20)
+    # ============================
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    # ============================
+    # Model Definitions
+    # ============================
+    rf = RandomForestRegressor(
+        n_estimators=100,
+        random_state=42
+    )
+
+    xgb = XGBRegressor(
+        n_estimators=100,
+        learning_rate=0.1,
+        random_state=42
+    )
+
+    # ============================
+    # Training
+    # ============================
+    rf.fit(X_train, y_train)
+    xgb.fit(X_train, y_train)
+
+    # ============================
+    # Test Evaluation
+    # ============================
+    pred_rf = rf.predict(X_test)
+    pred_xgb = xgb.predict(X_test)
+
+    # Ensemble output
+    pred_ensemble = 0.5 * pred_rf + 0.5 * pred_xgb
+
+    mae = mean_absolute_error(y_test, pred_ensemble)
+    rmse = np.sqrt(mean_squared_error(y_test, pred_ensemble))
+    r2 = r2_score(y_test, pred_ensemble)
+
+    print("\n=== TEST SET PERFORMANCE ===")
+    print("MAE  :", round(mae, 5))
+    print("RMSE :", round(rmse, 5))
+    print("R²   :", round(r2, 5))
+
+    # ============================
+    # 5-Fold Cross Validation
+    # ============================
+    print("\n=== 5-FOLD CROSS VALIDATION ===")
+
+    # Satu kali fit per fold per model; RF, XGB dan Ensemble dari prediksi yang sama
+    cv = run_cv({"rf": rf, "xgb": xgb}, X, y, n_splits=5, n_jobs=cv_jobs, random_state=42)
+
+    for name, label in (("rf", "RF"), ("xgb", "XGB"), ("ensemble", "Ensemble")):
+        print(f"{label} Mean R²  :", round(cv["mean"][name]["r2"], 5))
+        print(f"{label} Mean RMSE:", round(cv["mean"][name]["rmse"], 5))
+    print(f"CV wall time: {cv['wall_s']:.2f}s (n_jobs={cv_jobs})")
+
+    # ============================
+    # Save Models
+    # ============================
+    # Artefak ditulis dengan nama berversi (tidak pernah menimpa file yang
+    # sedang dipakai), engine dikompilasi, lalu manifest ditulis paling akhir:
+    # registry di semua proses berpindah ke pasangan RF+XGB baru sekaligus
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    version = new_version()
+    files = {}
+    for key, model in (("rf", rf), ("xgb", xgb)):
+        files[key] = versioned_name(key, version)
+        path = os.path.join(MODEL_DIR, files[key])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+
+    # Kompilasi engine array untuk serving + cek paritas terhadap predict library
+    engine = compile_ensemble(rf, xgb, source=model_checksums(files))
+    save_engine(engine, os.path.join(MODEL_DIR, ENGINE_FILE))
+    publish_manifest(files)
+    print("Paritas engine array (max |selisih|):", check_parity(engine, rf, xgb, X_test))
+
+    print("\nModel berhasil dilatih dan disimpan.")
+    return rf, xgb
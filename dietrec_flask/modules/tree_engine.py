@@ -0,0 +1,283 @@
+# FILE: modules/tree_engine.py
+from __future__ import annotations
+from typing import Dict, Any, List
+import json
+import os
+import uuid
+import zipfile
+import numpy as np
+
+# ==============================================================================
+# TREE ENGINE (INFERENSI ENSEMBLE BERBASIS ARRAY)
+# Pohon RandomForestRegressor dan XGBRegressor diratakan menjadi array node
+# kontigu (feature, threshold, left, right, value). Seluruh batch dievaluasi
+# sekaligus dengan numpy: satu langkah per level kedalaman untuk semua pohon.
+# Serving hanya butuh numpy; sklearn/xgboost hanya dipakai saat kompilasi.
+# ==============================================================================
+ENGINE_FORMAT = 2  # 2: cabang NaN RF mengikuti missing_go_to_left
+# Batas jumlah baris untuk traversal "semua pasangan (baris, pohon) sekaligus".
+SMALL_BATCH_ROWS = 256
+# Batch menengah diproses per potongan SMALL_BATCH_ROWS baris dengan traversal
+# pasangan; di atas batas ini traversal per pohon lebih cepat. Untuk batch
+# sebesar ini library (sklearn/xgboost) tetap ~2x lebih cepat, lihat
+# scoring.LIBRARY_BATCH_ROWS.
+CHUNKED_BATCH_ROWS = 2048
+
+
+def _finalize(nodes: Dict[str, List], roots: List[int], depth: int) -> Dict[str, np.ndarray]:
+    return {
+        "feature": np.asarray(nodes["feature"], dtype=np.int32),
+        "threshold": np.asarray(nodes["threshold"], dtype=np.float32),
+        "left": np.asarray(nodes["left"], dtype=np.int32),
+        "right": np.asarray(nodes["right"], dtype=np.int32),
+        "missing": np.asarray(nodes["missing"], dtype=np.int32),
+        # Anak kiri/kanan diselang-seling: anak = children[2*node + go_right]
+        "children": np.stack([nodes["left"], nodes["right"]], axis=1).ravel().astype(np.int32),
+        "value": np.asarray(nodes["value"], dtype=np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "depth": np.int32(depth),
+    }
+
+
+def _float32_floor(thr: np.ndarray) -> np.ndarray:
+    """
+    float32 terbesar yang <= threshold float64.
+
+    Untuk input float32: x <= thr64  <=>  x <= floor32(thr64), sehingga
+    traversal RF bisa berjalan penuh di float32 tanpa mengubah hasil.
+    """
+    t32 = thr.astype(np.float32)
+    over = t32.astype(np.float64) > thr
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def compile_random_forest(rf) -> Dict[str, np.ndarray]:
+    """Meratakan `RandomForestRegressor.estimators_` (go-left jika x <= threshold)."""
+    # NaN mengikuti `tree_.missing_go_to_left` (sklearn >= 1.3); versi lama
+    # menolak NaN saat predict, jadi cabang "missing" cukup placeholder (kanan).
+    nodes = {k: [] for k in ("feature", "threshold", "left", "right", "missing", "value")}
+    roots, depth = [], 0
+
+    for est in rf.estimators_:
+        t = est.tree_
+        offset = len(nodes["feature"])
+        ids = np.arange(t.node_count) + offset
+        is_leaf = t.children_left < 0
+
+        # Daun menunjuk ke dirinya sendiri agar traversal berhenti di sana
+        nodes["feature"].extend(np.where(is_leaf, 0, t.feature))
+        nodes["threshold"].extend(np.where(is_leaf, 0.0, _float32_floor(t.threshold)))
+        nodes["left"].extend(np.where(is_leaf, ids, t.children_left + offset))
+        nodes["right"].extend(np.where(is_leaf, ids, t.children_right + offset))
+        go_left = getattr(t, "missing_go_to_left", None)
+        miss = t.children_right if go_left is None else np.where(go_left, t.children_left, t.children_right)
+        nodes["missing"].extend(np.where(is_leaf, ids, miss + offset))
+        nodes["value"].extend(t.value[:, 0, 0])
+        roots.append(offset)
+        depth = max(depth, int(t.max_depth))
+
+    return _finalize(nodes, roots, depth)
+
+
+def _xgb_base_score(booster) -> float:
+    raw = json.loads(booster.save_config())["learner"]["learner_model_param"]["base_score"]
+    return float(np.float32(str(raw).strip("[]").split(",")[0]))
+
+
+def compile_xgboost(xgb) -> Dict[str, np.ndarray]:
+    """Meratakan pohon XGBRegressor (go-left jika x < split_condition, float32)."""
+    booster = xgb.get_booster()
+    names = booster.feature_names or []
+    feat_idx = {name: i for i, name in enumerate(names)}
+
+    nodes = {k: [] for k in ("feature", "threshold", "left", "right", "missing", "value")}
+    roots, depth = [], 0
+
+    for dump in booster.get_dump(dump_format="json"):
+        tree = json.loads(dump)
+        offset = len(nodes["feature"])
+
+        # nodeid XGBoost lokal per pohon; kumpulkan dulu lalu tulis berurutan
+        flat = {}
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            flat[node["nodeid"]] = node
+            stack.extend(node.get("children", []))
+            depth = max(depth, int(node.get("depth", 0)))
+
+        for nid in range(len(flat)):
+            node = flat[nid]
+            me = offset + nid
+            if "leaf" in node:
+                nodes["feature"].append(0)
+                nodes["threshold"].append(0.0)
+                nodes["left"].append(me)
+                nodes["right"].append(me)
+                nodes["missing"].append(me)
+                nodes["value"].append(float(np.float32(node["leaf"])))
+            else:
+                split = node["split"]
+                nodes["feature"].append(feat_idx[split] if split in feat_idx else int(split.lstrip("f")))
+                nodes["threshold"].append(float(np.float32(node["split_condition"])))
+                nodes["left"].append(offset + node["yes"])
+                nodes["right"].append(offset + node["no"])
+                nodes["missing"].append(offset + node["missing"])
+                nodes["value"].append(0.0)
+        roots.append(offset)
+
+    out = _finalize(nodes, roots, depth + 1)
+    out["base_score"] = np.float64(_xgb_base_score(booster))
+    return out
+
+
+def compile_ensemble(rf, xgb, source: Dict[str, str] | None = None) -> Dict[str, Any]:
+    """Engine lengkap RF + XGB. `source` = checksum artefak asal (untuk validasi cache)."""
+    features = list(getattr(rf, "feature_names_in_", []))
+    return {
+        "format": ENGINE_FORMAT,
+        "source": dict(source or {}),
+        "features": [str(f) for f in features],
+        "rf": compile_random_forest(rf),
+        "xgb": compile_xgboost(xgb),
+    }
+
+
+def _traverse_pairs(trees: Dict[str, np.ndarray], X32: np.ndarray, strict: bool, has_nan: bool) -> np.ndarray:
+    """Batch kecil: semua pasangan (baris, pohon) sekaligus, pasangan yang sudah di daun dikeluarkan."""
+    n, n_feat = X32.shape
+    n_trees = len(trees["roots"])
+    feature, threshold, value = trees["feature"], trees["threshold"], trees["value"]
+    children, missing = trees["children"], trees["missing"]
+
+    node = np.tile(trees["roots"], n)                       # urutan (baris, pohon)
+    base = np.repeat(np.arange(n, dtype=np.int32) * n_feat, n_trees)
+    X_flat = X32.ravel()
+    active = np.arange(node.size)
+
+    for _ in range(int(trees["depth"])):
+        cur = node[active]
+        x = X_flat.take(base.take(active) + feature.take(cur))
+        thr = threshold.take(cur)
+        go_right = (x >= thr) if strict else (x > thr)
+        nxt = children.take(2 * cur + go_right)
+        if has_nan:
+            nxt = np.where(np.isnan(x), missing.take(cur), nxt)
+        node[active] = nxt
+        active = active[nxt != cur]
+        if not active.size:
+            break
+
+    return value.take(node).reshape(n, n_trees).sum(axis=1)
+
+
+def _traverse_trees(trees: Dict[str, np.ndarray], X32: np.ndarray, strict: bool, has_nan: bool) -> np.ndarray:
+    """Batch besar: satu pohon per iterasi untuk semua baris (array pohon tetap di cache)."""
+    n = X32.shape[0]
+    feature, threshold, value = trees["feature"], trees["threshold"], trees["value"]
+    children, missing = trees["children"], trees["missing"]
+
+    cols = np.ascontiguousarray(X32.T).ravel()               # urutan (fitur, baris)
+    rowid = np.arange(n, dtype=np.int32)
+    total = np.zeros(n, dtype=np.float64)
+
+    for root in trees["roots"]:
+        node = np.full(n, root, dtype=np.int32)
+        for _ in range(int(trees["depth"])):
+            x = cols.take(feature.take(node) * n + rowid)
+            thr = threshold.take(node)
+            go_right = (x >= thr) if strict else (x > thr)
+            nxt = children.take(2 * node + go_right)
+            if has_nan:
+                nxt = np.where(np.isnan(x), missing.take(node), nxt)
+            node = nxt
+        total += value.take(node)
+
+    return total
+
+
+def _tree_sum(trees: Dict[str, np.ndarray], X32: np.ndarray, strict: bool) -> np.ndarray:
+    """Jumlah nilai daun semua pohon per baris."""
+    has_nan = bool(np.isnan(X32).any())
+    n = X32.shape[0]
+    if n <= SMALL_BATCH_ROWS:
+        return _traverse_pairs(trees, X32, strict, has_nan)
+    if n <= CHUNKED_BATCH_ROWS:
+        return np.concatenate([_traverse_pairs(trees, X32[i:i + SMALL_BATCH_ROWS], strict, has_nan)
+                               for i in range(0, n, SMALL_BATCH_ROWS)])
+    return _traverse_trees(trees, X32, strict, has_nan)
+
+
+def predict_ensemble(engine: Dict[str, Any], X) -> np.ndarray:
+    """
+    Skor ensemble 0.5·RF + 0.5·XGB untuk batch `X` (n_rows, n_features).
+
+    Input dibulatkan ke float32 seperti yang dilakukan sklearn & xgboost.
+    """
+    X32 = np.ascontiguousarray(X, dtype=np.float32)
+    if X32.ndim == 1:
+        X32 = X32.reshape(1, -1)
+
+    rf, xgb = engine["rf"], engine["xgb"]
+    # RF: kiri jika x <= threshold, rata-rata antar pohon
+    pred_rf = _tree_sum(rf, X32, strict=False) / len(rf["roots"])
+    # XGB: kiri jika x < split_condition, base_score + jumlah daun
+    pred_xgb = xgb["base_score"] + _tree_sum(xgb, X32, strict=True)
+
+    return 0.5 * pred_rf + 0.5 * pred_xgb
+
+
+# ==============================================================================
+# SIMPAN / MUAT (.npz)
+# ==============================================================================
+def save_engine(engine: Dict[str, Any], path: str) -> None:
+    arrays = {
+        "format": np.int32(engine["format"]),
+        "source": np.array(json.dumps(engine["source"])),
+        "features": np.array(json.dumps(engine["features"])),
+    }
+    for group in ("rf", "xgb"):
+        for key, arr in engine[group].items():
+            arrays[f"{group}__{key}"] = np.asarray(arr)
+
+    # Nama sementara unik: pelatihan dan cold load di proses lain bisa menulis bersamaan
+    tmp = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp.npz"
+    try:
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_engine(path: str) -> Dict[str, Any] | None:
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != ENGINE_FORMAT:
+                return None
+            engine = {
+                "format": ENGINE_FORMAT,
+                "source": json.loads(str(data["source"])),
+                "features": json.loads(str(data["features"])),
+                "rf": {}, "xgb": {},
+            }
+            for key in data.files:
+                if "__" in key:
+                    group, name = key.split("__", 1)
+                    arr = data[key]
+                    arr.flags.writeable = False
+                    engine[group][name] = arr
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # File rusak / terpotong: registry mengompilasi ulang dari model
+        return None
+    return engine
+
+
+def check_parity(engine: Dict[str, Any], rf, xgb, X) -> float:
+    """Selisih absolut maksimum antara engine array dan `predict` library."""
+    expected = 0.5 * rf.predict(X) + 0.5 * xgb.predict(X)
+    return float(np.max(np.abs(predict_ensemble(engine, np.asarray(X)) - expected))) if len(expected) else 0.0
@@ -0,0 +1,163 @@
+# FILE: modules/workers.py
+from __future__ import annotations
+from typing import Dict, Any, List, Tuple, Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing as mp
+import os
+import threading
+
+from modules import engine, pdf_export
+from modules.metrics import collect, merge, span
+from modules.preload import preload
+
+# ==============================================================================
+# POOL PROSES UNTUK PEKERJAAN CPU (MODE SERVING ASINKRON)
+# Setelah `start()`, compute_engine (filter -> skor -> plan) dan render PDF
+# dijalankan di pool proses yang sudah hangat (katalog + model dimuat lewat
+# modules.preload, diwarisi via fork jika tersedia). Thread request hanya
+# menunggu Future (GIL dilepas), sehingga satu node memakai semua core dan
+# render PDF yang lambat tidak menahan request ringan. Cache hasil engine
+# tetap di proses induk: cache hit dilayani langsung tanpa lewat pool.
+# Tanpa `start()`, `compute_engine` di sini identik dengan engine.compute_engine.
+# ==============================================================================
+POOL_WORKERS = int(os.environ.get("DIETREC_POOL_WORKERS", 0)) or (os.cpu_count() or 1)
+
+_POOL_LOCK = threading.Lock()
+_POOL: ProcessPoolExecutor | None = None
+_POOL_SIZE = 0
+
+
+def _init_worker() -> None:
+    # fork: state induk sudah terisi (cek murah); spawn: katalog/model dimuat di sini
+    preload()
+
+
+def _ping(_: int) -> int:
+    return os.getpid()
+
+
+def _collect_call(fn: Callable, *args: Any) -> Tuple[Any, List[Tuple[str, float]], Dict[str, Any]]:
+    """Di proses pool: jalankan `fn` dan kirim balik span/atribut metriknya."""
+    with collect() as record:
+        result = fn(*args)
+    return result, record["spans"], record["attrs"]
+
+
+def _compute(form_data: dict):
+    res, meta, errs = engine.compute_engine(form_data)
+    if res is not None:
+        # "ranked" (DataFrame kandidat) tidak dipakai route; tidak perlu dikirim antar proses
+        res = {"plan": res["plan"], "key": res["key"]}
+    return res, meta, errs
+
+
+class PoolExecutor(Executor):
+    """
+    Adapter Executor (untuk pdf_export) di atas pool proses; span digabung ke
+    histogram induk. Jika pool rusak (proses mati), job dijalankan di thread
+    pool lokal, seperti fallback compute_engine.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor):
+        self._pool = pool
+        self._local_lock = threading.Lock()
+        self._local: ThreadPoolExecutor | None = None
+
+    def _submit_local(self, outer: Future, fn: Callable, args: tuple, error: BaseException) -> None:
+        print(f"[WARN] Pool proses tidak tersedia ({error}); job dijalankan di thread proses ini.")
+        with self._local_lock:
+            if self._local is None:
+                self._local = ThreadPoolExecutor(max_workers=max(pdf_export.PDF_WORKERS, 1),
+                                                 thread_name_prefix="pdf")
+            local = self._local
+
+        def _run() -> None:
+            try:
+                outer.set_result(fn(*args))
+            except BaseException as e:
+                outer.set_exception(e)
+
+        local.submit(_run)
+
+    def submit(self, fn: Callable, /, *args: Any) -> Future:
+        outer: Future = Future()
+
+        def _done(inner: Future) -> None:
+            try:
+                result, spans, attrs = inner.result()
+            except BrokenProcessPool as e:
+                self._submit_local(outer, fn, args, e)
+                return
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            merge(spans, attrs)
+            outer.set_result(result)
+
+        try:
+            inner = self._pool.submit(_collect_call, fn, *args)
+        except BrokenProcessPool as e:
+            self._submit_local(outer, fn, args, e)
+            return outer
+        inner.add_done_callback(_done)
+        return outer
+
+
+def start(workers: int | None = None) -> int:
+    """
+    Buat pool proses (idempoten) dan arahkan render PDF ke pool tersebut.
+    Panggil setelah modules.preload.preload() dan sebelum thread server
+    berjalan, agar fork mewarisi state yang sudah dimuat. -> jumlah proses.
+    """
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        if _POOL is not None:
+            return _POOL_SIZE
+        n = max(int(workers or POOL_WORKERS), 1)
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        pool = ProcessPoolExecutor(max_workers=n, mp_context=ctx, initializer=_init_worker)
+        # Paksa semua proses dibuat dan diinisialisasi sekarang (pool hangat)
+        list(pool.map(_ping, range(n)))
+        _POOL, _POOL_SIZE = pool, n
+        pdf_export.set_executor(PoolExecutor(pool))
+        return n
+
+
+def stop() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pdf_export.set_executor(None)
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def compute_engine(form_data: dict) -> Tuple[Dict[str, Any] | None, Dict[str, Any], List[str]]:
+    """
+    Sama dengan engine.compute_engine (res tanpa "ranked" jika lewat pool).
+    Cache hit dijawab di proses ini; miss dihitung di pool lalu disimpan
+    ke cache induk. Jika pool rusak (proses mati), dihitung di proses ini.
+    """
+    pool = _POOL
+    if pool is None:
+        return engine.compute_engine(form_data)
+
+    try:
+        key, cached = engine.lookup_cached(form_data)
+    except Exception:
+        key, cached = None, None  # input tidak valid: pesan error dari compute_engine di pool
+    if cached is not None:
+        res, meta = cached
+        return res, meta, []
+
+    try:
+        with span("offload_engine"):
+            (res, meta, errs), spans, attrs = pool.submit(_collect_call, _compute, form_data).result()
+    except BrokenProcessPool as e:
+        print(f"[WARN] Pool proses tidak tersedia ({e}); compute_engine dijalankan di proses ini.")
+        return engine.compute_engine(form_data)
+    merge(spans, attrs)
+    if res is not None and res["key"] == key:
+        engine.store_cached(key, res, meta)
+    return res, meta, errs
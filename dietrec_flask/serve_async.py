@@ -0,0 +1,51 @@
+import sys
+import os
+import argparse
+import signal
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from werkzeug.serving import make_server
+    from app import app
+    from modules.preload import preload
+    from modules import workers
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# MODE SERVING ASINKRON (SATU NODE, SEMUA CORE)
+# Route dan API sama persis dengan app.py. Request dilayani server
+# WSGI ber-thread; pekerjaan CPU (compute_engine, render PDF) dikirim ke
+# pool proses hangat (modules.workers) sehingga thread request hanya
+# menunggu hasil tanpa memegang GIL. Urutan start: preload di proses ini
+# -> fork pool (mewarisi katalog/model) -> baru thread server berjalan.
+# ============================================================
+def main(host="127.0.0.1", port=8000, pool_workers=None):
+    info = preload(app)
+    print(f"[1/2] Preload: {info['rows']} menu, scoring {info['scoring']} ({info['seconds']} s)")
+    n = workers.start(pool_workers)
+    print(f"[2/2] Pool proses: {n} worker")
+
+    server = make_server(host, port, app, threaded=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # berhenti rapi (pool ikut ditutup)
+    print(f"Melayani di http://{host}:{port} (Ctrl+C untuk berhenti)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        workers.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jalankan app dengan server ber-thread + pool proses untuk komputasi")
+    parser.add_argument("--host", default="127.0.0.1", help="Alamat bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses pool (default: DIETREC_POOL_WORKERS / jumlah core)")
+    args = parser.parse_args()
+    main(host=args.host, port=args.port, pool_workers=args.workers)
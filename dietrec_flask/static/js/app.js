@@ -17,27 +17,31 @@ function initResultPage() {
     }
 
     // 2. HITUNG RATA-RATA NUTRISI (REAL TIME DARI MENU UNTUK DONUT CHART)
-    let avgCarb = 50, avgProt = 20, avgFat = 30; // Fallback ideal sesuai Bab 3.3.3
-    if (appData.radar && appData.radar.length > 0) {
-        let sumP = 0, sumL = 0, sumK = 0;
-        appData.radar.forEach(d => {
-            sumP += d[0]; sumL += d[1]; sumK += d[2];
-        });
-        const n = appData.radar.length;
-        avgProt = Math.round(sumP/n);
-        avgFat = Math.round(sumL/n);
-        avgCarb = Math.round(sumK/n);
+    function macroAverages(radar) {
+        let avgCarb = 50, avgProt = 20, avgFat = 30; // Fallback ideal sesuai Bab 3.3.3
+        if (radar && radar.length > 0) {
+            let sumP = 0, sumL = 0, sumK = 0;
+            radar.forEach(d => {
+                sumP += d[0]; sumL += d[1]; sumK += d[2];
+            });
+            const n = radar.length;
+            avgProt = Math.round(sumP/n);
+            avgFat = Math.round(sumL/n);
+            avgCarb = Math.round(sumK/n);
+        }
+        return [avgCarb, avgProt, avgFat];
     }
 
     // 3. CHART DONUT (PROPORSI MAKRONUTRIEN)
+    let donutChart = null, barChart = null;
     const donutEl = document.getElementById('donutTarget');
     if (donutEl && typeof Chart !== 'undefined') {
-        new Chart(donutEl.getContext('2d'), {
+        donutChart = new Chart(donutEl.getContext('2d'), {
             type: 'doughnut',
             data: {
                 labels: ['Karbo (%)', 'Protein (%)', 'Lemak (%)'],
                 datasets: [{ 
-                    data: [avgCarb, avgProt, avgFat], 
+                    data: macroAverages(appData.radar), 
                     backgroundColor: ['#3b82f6', '#10b981', '#f59e0b'], 
                     borderWidth: 0 
                 }]
@@ -58,12 +62,11 @@ function initResultPage() {
     }
 
     // 4. CHART BAR (EVALUASI KALORI / CALORIE GAP)
+    // Variasi warna hijau untuk estetika visual antar hari
+    const barColors = ['#10b981', '#059669', '#34d399', '#065f46', '#6ee7b7', '#064e3b', '#10b981'];
     const barEl = document.getElementById('barKcal');
     if (barEl && typeof Chart !== 'undefined') {
-        // Variasi warna hijau untuk estetika visual antar hari
-        const barColors = ['#10b981', '#059669', '#34d399', '#065f46', '#6ee7b7', '#064e3b', '#10b981'];
-
-        new Chart(barEl.getContext('2d'), {
+        barChart = new Chart(barEl.getContext('2d'), {
             type: 'bar',
             data: {
                 labels: appData.days,
@@ -110,7 +113,96 @@ function initResultPage() {
         });
     }
 
-    // 5. MEKANISME RECALC (AJAX / FETCH API)
+    // 5. RENDER ULANG DI TEMPAT (TANPA RELOAD HALAMAN)
+    function updateCharts(data) {
+        if (donutChart) {
+            donutChart.data.datasets[0].data = macroAverages(data.radar);
+            donutChart.update();
+        }
+        if (barChart) {
+            barChart.data.labels = data.days;
+            barChart.data.datasets[0].data = data.totals;
+            barChart.data.datasets[0].backgroundColor = barColors.slice(0, data.days.length);
+            barChart.data.datasets[1].data = Array(data.days.length).fill(data.target);
+            barChart.options.scales.y.suggestedMin = Math.max(0, data.target - 500);
+            barChart.update();
+        }
+    }
+
+    const esc = (v) => String(v ?? '').replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    }[c]));
+    const capitalize = (v) => { const t = String(v ?? ''); return t.charAt(0).toUpperCase() + t.slice(1).toLowerCase(); };
+    const sumInt = (meals, key) => Math.trunc(meals.reduce((acc, m) => acc + m.total[key], 0));
+
+    const MEAL_BADGE = {
+        'Sarapan': 'bg-orange-50 text-orange-700 border border-orange-100',
+        'Makan Siang': 'bg-sky-50 text-sky-700 border border-sky-100'
+    };
+
+    // Markup kartu mengikuti templates/result.html
+    function renderDay(day) {
+        const meals = day.meals.map(meal => `
+            <div class="p-6 transition hover:bg-brand-50/10">
+              <div class="flex flex-col sm:flex-row sm:items-center gap-4 mb-4">
+                <span class="inline-flex items-center px-3 py-1 rounded-lg text-xs font-bold uppercase tracking-wide w-fit shadow-sm ${MEAL_BADGE[meal.name] || 'bg-indigo-50 text-indigo-700 border border-indigo-100'}">
+                  ${esc(meal.name)}
+                </span>
+                <div class="h-px bg-slate-100 flex-grow hidden sm:block"></div>
+                <span class="text-xs font-bold text-slate-400 bg-slate-50 px-2 py-1 rounded border border-slate-100">
+                  ± ${Math.trunc(meal.total.kcal)} kkal
+                </span>
+              </div>
+              <div class="overflow-hidden rounded-xl border border-slate-200/60">
+                <table class="w-full text-sm text-left">
+                  <thead class="bg-slate-50/80 text-[10px] uppercase font-bold text-slate-500">
+                    <tr>
+                      <th class="px-4 py-2.5 w-32">Kategori</th>
+                      <th class="px-4 py-2.5">Menu Pilihan</th>
+                      <th class="px-4 py-2.5 text-right w-24">Porsi</th>
+                    </tr>
+                  </thead>
+                  <tbody class="divide-y divide-slate-50 bg-white">
+                    ${meal.items.map(item => `
+                    <tr class="group hover:bg-slate-50 transition">
+                      <td class="px-4 py-3 text-slate-400 text-xs font-medium group-hover:text-slate-600">${esc(capitalize(item.class))}</td>
+                      <td class="px-4 py-3 font-semibold text-slate-700 group-hover:text-brand-700">${esc(item.name)}</td>
+                      <td class="px-4 py-3 text-right text-slate-600 font-mono text-xs">${esc(item.portion_g)}g</td>
+                    </tr>`).join('')}
+                  </tbody>
+                </table>
+              </div>
+            </div>`).join('');
+
+        return `
+        <div class="bg-white rounded-2xl shadow-card border border-slate-200 overflow-hidden transition hover:shadow-lg duration-300">
+          <div class="bg-slate-50/50 px-6 py-4 border-b border-slate-100 flex flex-col sm:flex-row sm:items-center justify-between gap-3">
+            <div class="flex items-center gap-3">
+              <span class="flex h-9 w-9 items-center justify-center bg-slate-800 text-white rounded-lg font-bold text-sm shadow-md">${day.day}</span>
+              <div>
+                <h3 class="font-bold text-base text-slate-800">Hari ke-${day.day}</h3>
+                <p class="text-xs text-slate-500">Total Energi: <span class="font-bold text-brand-600">${sumInt(day.meals, 'kcal')} kkal</span></p>
+              </div>
+            </div>
+            <div class="flex gap-2">
+              <span class="px-2 py-1 bg-white border border-slate-200 rounded-md text-[10px] font-bold text-slate-500 uppercase">P: ${sumInt(day.meals, 'protein_g')}g</span>
+              <span class="px-2 py-1 bg-white border border-slate-200 rounded-md text-[10px] font-bold text-slate-500 uppercase">L: ${sumInt(day.meals, 'fat_g')}g</span>
+              <span class="px-2 py-1 bg-white border border-slate-200 rounded-md text-[10px] font-bold text-slate-500 uppercase">K: ${sumInt(day.meals, 'carb_g')}g</span>
+            </div>
+          </div>
+          <div class="divide-y divide-slate-100">${meals}</div>
+        </div>`;
+    }
+
+    function renderPlan(data) {
+        const container = document.getElementById('planDays');
+        if (container) container.innerHTML = data.plan.map(renderDay).join('');
+
+        const title = document.getElementById('planTitle');
+        if (title) title.textContent = `Jadwal Menu ${data.meta.days} Hari`;
+    }
+
+    // 6. MEKANISME RECALC (AJAX / FETCH API)
     async function recalc() {
         const btn = document.getElementById('btnApply');
         if (!btn) return;
@@ -142,7 +234,9 @@ function initResultPage() {
             });
             const j = await r.json();
             if (j.ok) {
-                window.location.reload();
+                appData = { days: j.days, totals: j.totals, radar: j.radar, target: j.target };
+                updateCharts(appData);
+                renderPlan(j);
             } else {
                 alert("Gagal memperbarui rencana: " + j.error);
             }
@@ -154,6 +248,47 @@ function initResultPage() {
         }
     }
 
+    // 7. EKSPOR PDF ASINKRON (RENDER DI SERVER, POLLING SAMPAI SIAP)
+    async function exportPdf(link) {
+        const originalText = link.innerHTML;
+        link.classList.add('pointer-events-none', 'opacity-70');
+        link.innerHTML = `<span class="animate-pulse">Menyiapkan PDF...</span>`;
+
+        try {
+            let r = await fetch(link.href, { headers: { 'Accept': 'application/json' } });
+            while (r.status === 202) {
+                const j = await r.json();
+                const wait = 1000 * (parseFloat(r.headers.get('Retry-After')) || 1);
+                await new Promise(res => setTimeout(res, wait));
+                r = await fetch(j.poll, { headers: { 'Accept': 'application/json' } });
+            }
+            if (!r.ok || !(r.headers.get('Content-Type') || '').includes('application/pdf')) {
+                const j = await r.json().catch(() => ({}));
+                throw new Error(j.error || `HTTP ${r.status}`);
+            }
+
+            const blob = await r.blob();
+            const match = /filename="?([^";]+)"?/.exec(r.headers.get('Content-Disposition') || '');
+            const a = document.createElement('a');
+            a.href = URL.createObjectURL(blob);
+            a.download = match ? match[1] : 'NutriPlan.pdf';
+            document.body.appendChild(a);
+            a.click();
+            a.remove();
+            setTimeout(() => URL.revokeObjectURL(a.href), 1000);
+        } catch (e) {
+            alert("Gagal membuat PDF: " + e.message);
+        } finally {
+            link.classList.remove('pointer-events-none', 'opacity-70');
+            link.innerHTML = originalText;
+        }
+    }
+
+    document.getElementById('btnPdf')?.addEventListener('click', (e) => {
+        e.preventDefault();
+        exportPdf(e.currentTarget);
+    });
+
     // Event Listener untuk tombol "Terapkan" atau "Update"
     document.getElementById('btnApply')?.addEventListener('click', (e) => {
         e.preventDefault();
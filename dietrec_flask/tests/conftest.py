@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul aplikasi di-import sebagai `modules.*` (sama seperti app.py / skrip CLI)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Jangan memicu pelatihan model latar belakang dari test
+    monkeypatch.setattr("modules.engine.start_background_training", lambda *a, **k: False)
+    return app_module.app.test_client()
+
+
+# ============================================================
+# /api/plans/batch: BATAS PER REQUEST
+# ============================================================
+def test_batch_total_days_cap(client, monkeypatch):
+    monkeypatch.setattr(app_module, "BATCH_MAX_DAYS", 10)
+    resp = client.post("/api/plans/batch", json=[{"days": 7}, {"days": 7}])
+    assert resp.status_code == 413
+    assert "hari" in resp.get_json()["error"]
+
+
+def test_batch_days_out_of_range_row(client):
+    if app_module.load_tkpi()[0] is None:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    resp = client.post("/api/plans/batch", json={"profiles": [{"days": 1}, {"days": 1000}]})
+    assert resp.status_code == 200
+    rows = {r["index"]: r for r in map(json.loads, resp.get_data(as_text=True).splitlines())}
+    assert rows[0]["ok"]
+    assert not rows[1]["ok"] and "jumlah hari" in rows[1]["error"]
+
+
+# ============================================================
+# /metrics: TIPE METRIK
+# ============================================================
+def test_metrics_cache_counters(client):
+    text = client.get("/metrics").get_data(as_text=True)
+    for name in ("dietrec_engine_cache_hits_total", "dietrec_engine_cache_misses_total"):
+        assert f"# TYPE {name} counter" in text
+        assert any(line.startswith(f"{name} ") for line in text.splitlines())
+    assert "# TYPE dietrec_engine_cache_size gauge" in text
+    assert "dietrec_engine_cache_hits " not in text
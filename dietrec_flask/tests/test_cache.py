@@ -0,0 +1,84 @@
+import threading
+
+from modules import cache
+from modules.cache import ByteLRUCache, LRUCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _live_bytes(c):
+    return sum(len(v) for _, v in c._data.values())
+
+
+# ============================================================
+# LRU + TTL
+# ============================================================
+def test_lru_eviction_and_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock.monotonic)
+    c = LRUCache(maxsize=2, ttl=10)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)                                   # "b" paling lama tidak dipakai
+    assert c.get("b") is None and c.get("a") == 1
+    clock.now += 11
+    assert c.get("a") is None and len(c) == 1       # "c" kedaluwarsa tapi belum diakses
+    assert c.stats()["hits"] == 2
+
+
+# ============================================================
+# BYTE LRU: AKUNTANSI BYTE TETAP KONSISTEN
+# ============================================================
+def test_byte_cache_expiry_updates_bytes(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock.monotonic)
+    c = ByteLRUCache(max_bytes=100, ttl=5)
+    c.put("a", b"x" * 40)
+    c.put("b", b"y" * 40)
+    clock.now += 6
+    assert c.get("a") is None
+    assert c.total_bytes == 40 == _live_bytes(c)
+    assert c.stats()["misses"] == 1
+
+
+def test_byte_cache_eviction_and_replace():
+    c = ByteLRUCache(max_bytes=100)
+    c.put("a", b"x" * 60)
+    c.put("a", b"x" * 30)
+    c.put("b", b"y" * 50)
+    c.put("c", b"z" * 30)                           # buang "a"
+    assert c.get("a") is None and c.get("b") is not None
+    assert c.total_bytes == 80 == _live_bytes(c)
+    c.put("big", b"!" * 101)                        # lebih besar dari batas: tidak disimpan
+    assert c.get("big") is None and c.stats()["bytes"] == 80
+
+
+def test_byte_cache_concurrent_access():
+    c = ByteLRUCache(max_bytes=500, ttl=0.001)
+    errors = []
+
+    def worker(seed):
+        try:
+            for i in range(2000):
+                key = (seed * 7 + i) % 13
+                if i % 3:
+                    c.get(key)
+                else:
+                    c.put(key, b"v" * (10 + key * 5))
+        except Exception as e:                      # pragma: no cover - hanya jika gagal
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert c.total_bytes == _live_bytes(c) <= c.max_bytes
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from modules.calc_utils import (bmi_and_category, bmi_and_category_array, mifflin_st_jeor,
+                                mifflin_st_jeor_array, round1, tdee_with_goal, tdee_with_goal_array)
+
+SEXES = ["Laki-laki", "Perempuan", " laki-laki ", "LAKI-LAKI", "l", "Pria", "PRIA", "pria ", "male", "Male",
+         "Wanita", "female", "", None, "  "]
+ACTIVITIES = ["sangat_ringan", "Sangat Ringan", "ringan", "SEDANG", "sedang", "berat", "berat ", "Sangat Berat",
+              "sangat berat", "santai", "", None]
+GOALS = ["maintain", "cut", "CUT", "Turun BB", "bulk", "Naik", "naik berat", "", None, "lainnya"]
+
+
+# ============================================================
+# round1 vs round(x, 1) PYTHON
+# ============================================================
+def test_round1_matches_python_round():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.random(50000) * 400, np.arange(0, 100, 0.05), np.arange(0, 20, 0.01),
+                        -rng.random(1000) * 5, [0.05, 0.15, 0.25, 2.675, 18.45, 22.95, 24.95, 1e-9]])
+    assert round1(x).tolist() == [round(v, 1) for v in x.tolist()]
+
+
+def test_round1_shapes_and_non_finite():
+    x = np.array([[0.15, 1.25], [2.35, 3.45]])
+    assert round1(x).tolist() == [[round(v, 1) for v in row] for row in x.tolist()]
+    assert float(round1(2.675)) == round(2.675, 1)
+    out = round1([np.nan, np.inf, -np.inf])
+    assert np.isnan(out[0]) and out[1] == np.inf and out[2] == -np.inf
+
+
+# ============================================================
+# PARITAS VERSI ARRAY vs SKALAR
+# ============================================================
+def test_mifflin_st_jeor_array_parity():
+    rng = np.random.default_rng(1)
+    n = len(SEXES) * 20
+    sex = SEXES * 20
+    w, h, a = rng.uniform(30, 150, n), rng.uniform(120, 210, n), rng.integers(10, 90, n)
+    got = mifflin_st_jeor_array(sex, w, h, a)
+    expected = [mifflin_st_jeor(s, wi, hi, int(ai)) for s, wi, hi, ai in zip(sex, w, h, a)]
+    assert got.tolist() == expected
+
+
+def test_tdee_with_goal_array_parity():
+    combos = [(act, goal) for act in ACTIVITIES for goal in GOALS]
+    bmr = np.linspace(900, 2400, len(combos))
+    got = tdee_with_goal_array(bmr, [c[0] for c in combos], [c[1] for c in combos])
+    expected = [tdee_with_goal(b, act, goal) for b, (act, goal) in zip(bmr.tolist(), combos)]
+    assert got.tolist() == expected
+
+
+@pytest.mark.parametrize("height", [100.0, 150.0, 155.5, 168.0, 170.0, 183.0])
+def test_bmi_and_category_array_parity(height):
+    # Grid berat rapat di sekitar batas kategori (18.5 / 22.9 / 24.9) dan seri .x5
+    h2 = (height / 100.0) ** 2
+    targets = np.concatenate([np.arange(14.0, 30.0, 0.05), [18.45, 18.5, 22.9, 22.95, 24.9, 24.95, 25.0]])
+    weights = np.concatenate([targets * h2, np.nextafter(targets * h2, 0), np.nextafter(targets * h2, 1e9)])
+    bmi, cat = bmi_and_category_array(weights, np.full(len(weights), height))
+    expected = [bmi_and_category(wi, height) for wi in weights.tolist()]
+    assert bmi.tolist() == [e[0] for e in expected]
+    assert cat.tolist() == [e[1] for e in expected]
+    assert {"Underweight", "Normal", "Overweight", "Obese"} <= set(cat.tolist())
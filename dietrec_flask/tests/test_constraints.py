@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.constraints import MAX_LABELS, build_constraint_index, filter_indices
+from modules.io_utils import ALLERGY_MAP, DISEASE_MAP, get_catalog
+from modules.scoring import apply_filters
+
+
+def _reference_filter(df, mapping, halal_pref, allergies, diseases):
+    """Filter row-wise asli (sebelum indeks bitset) sebagai acuan paritas."""
+    out = df.copy()
+
+    def _row_has_label(cell_val, keywords):
+        val_lower = str(cell_val).lower()
+        return any(k.lower() in val_lower for k in keywords)
+
+    if halal_pref and mapping.get("halal"):
+        out = out[out[mapping["halal"]].astype(str).str.contains("halal", case=False, na=False)]
+    if allergies and mapping.get("allergy"):
+        for allergy in allergies:
+            out = out[~out[mapping["allergy"]].astype(str).apply(lambda x: _row_has_label(x, [allergy]))]
+    if diseases and mapping.get("penyakit"):
+        for d in diseases:
+            out = out[~out[mapping["penyakit"]].astype(str).apply(lambda x: _row_has_label(x, [d]))]
+    return out
+
+
+MAPPING = {"halal": "HALAL", "allergy": "ALERGI", "penyakit": "PENYAKIT"}
+ALLERGIES = sorted(set(ALLERGY_MAP.values()))
+DISEASES = sorted(set(DISEASE_MAP.values()))
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    n = 400
+    words_a = ALLERGIES + ["udang", "kacang tanah", "SUSU sapi", "-", ""]
+    words_p = DISEASES + ["Tinggi gula", "asam urat", "purin", "GERD"]
+    pick = lambda words: ["; ".join(rng.choice(words, size=rng.integers(0, 3), replace=False)) for _ in range(n)]
+    df = pd.DataFrame({
+        "NAMA": [f"menu {i}" for i in range(n)],
+        "HALAL": rng.choice(["Halal", "HALAL", "Tidak Halal", "non", None], size=n),
+        "ALERGI": pick(words_a),
+        "PENYAKIT": pick(words_p),
+    })
+    df.loc[rng.random(n) < 0.1, "ALERGI"] = np.nan
+    return df
+
+
+def _cases():
+    rng = np.random.default_rng(1)
+    unknown_a = ["udang", "Kacang Tanah", "nan", "zzz"]
+    unknown_p = ["gula", "PURIN", "gerd"]
+    for _ in range(60):
+        allergies = list(rng.choice(ALLERGIES + unknown_a, size=rng.integers(0, 4), replace=False))
+        diseases = list(rng.choice(DISEASES + unknown_p, size=rng.integers(0, 4), replace=False))
+        yield bool(rng.integers(0, 2)), allergies, diseases
+
+
+# ============================================================
+# PARITAS INDEKS BITSET vs FILTER ROW-WISE
+# ============================================================
+def test_apply_filters_parity(frame):
+    index = build_constraint_index(frame, MAPPING, ALLERGY_MAP.values(), DISEASE_MAP.values(), version="v1")
+    for halal, allergies, diseases in _cases():
+        got = apply_filters(frame, MAPPING, halal, allergies, diseases, index=index, version="v1")
+        expected = _reference_filter(frame, MAPPING, halal, allergies, diseases)
+        assert got.index.tolist() == expected.index.tolist(), (halal, allergies, diseases)
+
+
+def test_parity_beyond_max_labels(frame):
+    """Label di luar MAX_LABELS bit tidak masuk bitset dan ditangani jalur fallback."""
+    labels = [f"label{i:03d}" for i in range(MAX_LABELS + 10)] + ALLERGIES
+    df = frame.copy()
+    rng = np.random.default_rng(2)
+    df["ALERGI"] = [" ".join(rng.choice(labels, size=3)) for _ in range(len(df))]
+    index = build_constraint_index(df, MAPPING, labels, DISEASES)
+    assert len(index["label_bits"]["allergy"]) + len(index["label_bits"]["penyakit"]) <= MAX_LABELS
+    for selected in (labels[:3], labels[-12:], labels[MAX_LABELS - 2:MAX_LABELS + 5], ALLERGIES):
+        got = df.index[filter_indices(index, False, selected, [])].tolist()
+        assert got == _reference_filter(df, MAPPING, False, selected, []).index.tolist()
+
+
+def test_missing_columns(frame):
+    mapping = {"halal": None, "allergy": None, "penyakit": "PENYAKIT"}
+    got = apply_filters(frame, mapping, True, ["Seafood"], ["Hipertensi"], version=None)
+    assert got.index.tolist() == _reference_filter(frame, mapping, True, ["Seafood"], ["Hipertensi"]).index.tolist()
+
+
+def test_catalog_parity():
+    catalog = get_catalog()
+    if catalog["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    df, mapping = catalog["df"], catalog["mapping"]
+    for halal, allergies, diseases in list(_cases())[:15]:
+        got = apply_filters(df, mapping, halal, allergies, diseases, index=catalog["index"], version=catalog["sha1"])
+        assert got.index.tolist() == _reference_filter(df, mapping, halal, allergies, diseases).index.tolist()
+
+
+# ============================================================
+# INDEKS BASI: VERSI KATALOG BERBEDA
+# ============================================================
+def test_stale_index_same_length_is_rebuilt(frame):
+    index = build_constraint_index(frame, MAPPING, ALLERGY_MAP.values(), DISEASE_MAP.values(), version="v1")
+    other = frame.iloc[::-1].reset_index(drop=True)          # panjang sama, isi berbeda
+    expected = _reference_filter(other, MAPPING, True, ["Seafood"], ["Hipertensi"]).index.tolist()
+    for version in ("v2", None):
+        got = apply_filters(other, MAPPING, True, ["Seafood"], ["Hipertensi"], index=index, version=version)
+        assert got.index.tolist() == expected
@@ -0,0 +1,88 @@
+import pytest
+
+from modules import engine
+from modules.engine import MAX_DAYS, MIN_DAYS, parse_profile, plan_batch, requested_days
+from modules.io_utils import get_catalog
+
+
+# ============================================================
+# VALIDASI PROFIL
+# ============================================================
+@pytest.mark.parametrize("days", [MIN_DAYS, 7, MAX_DAYS, "30"])
+def test_days_in_range(days):
+    assert parse_profile({"days": days})["days"] == int(days)
+
+
+@pytest.mark.parametrize("days", [0, -1, MAX_DAYS + 1, 100000])
+def test_days_out_of_range(days):
+    with pytest.raises(ValueError, match="jumlah hari"):
+        parse_profile({"days": days})
+
+
+# ============================================================
+# BATCH: VALIDASI PER BARIS DAN TOTAL HARI
+# ============================================================
+def test_requested_days_skips_invalid_rows():
+    forms = [{"days": 3}, {"days": "7"}, {"days": 0}, {"days": "x"}, "bukan profil", {}]
+    assert requested_days(forms) == 3 + 7 + 3
+
+
+def test_plan_batch_rejects_days_per_row():
+    if get_catalog()["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    forms = [{"days": 2}, {"days": MAX_DAYS + 1}, {"days": 0}, {"days": 1}]
+    rows = {r["index"]: r for r in plan_batch(forms, train_if_missing=False)}
+    assert sorted(rows) == [0, 1, 2, 3]
+    assert rows[0]["ok"] and len(rows[0]["plan"]) == 2
+    assert rows[3]["ok"] and len(rows[3]["plan"]) == 1
+    for i in (1, 2):
+        assert not rows[i]["ok"] and "jumlah hari" in rows[i]["error"]
+
+
+# ============================================================
+# KEY CACHE & RNG DETERMINISTIK
+# ============================================================
+BASE_FORM = {"age": "30", "weight": "65", "height": "168", "sex": "Perempuan", "activity": "sedang",
+             "goal": "maintain", "days": "3", "halal": "ya"}
+
+
+@pytest.fixture
+def catalog_ready(monkeypatch):
+    if get_catalog()["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    # Jangan memicu pelatihan model latar belakang dari test
+    monkeypatch.setattr(engine, "start_background_training", lambda *a, **k: False)
+
+
+def _key(form):
+    return engine._resolve(form)[-1]
+
+
+def test_key_independent_of_list_order(catalog_ready):
+    a = dict(BASE_FORM, allergies=["Seafood", "Kacang", "Telur"], diseases=["Hipertensi", "Diabetes Melitus"])
+    b = dict(BASE_FORM, allergies=["Telur", "Seafood", "Kacang", "Seafood"], diseases=["Diabetes Melitus", "Hipertensi"])
+    c = dict(BASE_FORM, allergies="Kacang, Telur,Seafood", diseases=" Hipertensi,Diabetes Melitus ")
+    assert _key(a) == _key(b) == _key(c)
+
+
+@pytest.mark.parametrize("change", [{"weight": "66"}, {"days": "4"}, {"halal": "tidak"}, {"sex": "Laki-laki"},
+                                    {"allergies": ["Seafood"]}, {"diseases": ["Hipertensi"]}, {"goal": "cut"}])
+def test_different_profiles_different_keys(catalog_ready, change):
+    assert _key(BASE_FORM) != _key(dict(BASE_FORM, **change))
+
+
+def test_recompute_after_clear_gives_same_plan(catalog_ready):
+    form = dict(BASE_FORM, allergies=["Seafood"], days="5")
+    res1, meta1, errs = engine.compute_engine(form)
+    assert not errs
+    engine._ENGINE_CACHE.clear()
+    shuffled = dict(form, allergies="Seafood")
+    res2, meta2, errs = engine.compute_engine(shuffled)
+    assert not errs
+    assert res2 is not res1                    # benar-benar dihitung ulang, bukan dari cache
+    assert res2["key"] == res1["key"]
+    assert res2["plan"] == res1["plan"]
+    assert meta2 == meta1
+    # Permintaan berikutnya dilayani dari cache dengan plan yang sama
+    res3, _, _ = engine.compute_engine(form)
+    assert res3 is res2
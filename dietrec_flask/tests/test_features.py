@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.features import macro_arrays, pseudo_scores
+from modules.io_utils import get_catalog
+from modules.scoring import _calculate_pseudo_label, rule_based_scores
+
+
+def _reference(df, target_kcal):
+    """Pseudo-label row-wise asli (df.apply) sebagai acuan paritas."""
+    return df.apply(lambda r: _calculate_pseudo_label(r, target_kcal), axis=1).to_numpy(dtype=float)
+
+
+@pytest.fixture(scope="module")
+def catalog_df():
+    cat = get_catalog()
+    if cat["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    return cat["df"]
+
+
+# ============================================================
+# PARITAS pseudo_scores vs _calculate_pseudo_label
+# ============================================================
+@pytest.mark.parametrize("target_kcal", [1200, 2000, 2750, 4000])
+def test_pseudo_scores_match_rowwise_on_catalog(catalog_df, target_kcal):
+    e, p, l, _ = macro_arrays(catalog_df)
+    np.testing.assert_array_equal(pseudo_scores(e, p, l, target_kcal), _reference(catalog_df, target_kcal))
+
+
+def test_rule_based_scores_match_rowwise_on_catalog(catalog_df):
+    np.testing.assert_array_equal(rule_based_scores(catalog_df), _reference(catalog_df, 2000))
+
+
+def test_per_row_target_matches_rowwise(catalog_df):
+    targets = np.random.default_rng(0).uniform(1200, 3500, len(catalog_df))
+    e, p, l, _ = macro_arrays(catalog_df)
+    expected = [_calculate_pseudo_label(row, t) for (_, row), t in zip(catalog_df.iterrows(), targets)]
+    np.testing.assert_array_equal(pseudo_scores(e, p, l, targets), expected)
+
+
+def test_pseudo_scores_bonus_boundaries():
+    # Tepat di batas bonus (protein > 10, lemak < 20) dan energi = target per meal
+    df = pd.DataFrame({"ENERGI": [660.0, 660.0, 0.0, 5000.0, 660.0],
+                       "PROTEIN": [10.0, np.nextafter(10.0, 11), 50.0, 0.0, 10.0],
+                       "LEMAK": [20.0, np.nextafter(20.0, 19), 0.0, 90.0, 19.999]})
+    e, p, l, _ = macro_arrays(df)
+    np.testing.assert_array_equal(pseudo_scores(e, p, l, 2000), _reference(df, 2000))
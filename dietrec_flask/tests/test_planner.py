@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import planner
+from modules.planner import build_candidate_pools, optimize_meal_plan
+
+
+# ============================================================
+# STRUKTUR PLAN HASIL _format_plan
+# ============================================================
+def _ranked(n=60):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "NAMA": [f"menu {i}" for i in range(n)],
+        "CLASS_45": np.array(["staple", "protein", "vegetable", "fruit", "other"])[np.arange(n) % 5],
+        "ENERGI": rng.uniform(20, 400, n), "PROTEIN": rng.uniform(0, 30, n),
+        "LEMAK": rng.uniform(0, 20, n), "KARBO": rng.uniform(0, 60, n),
+    })
+
+
+@pytest.mark.parametrize("method", sorted(planner.PORTION_METHODS))
+def test_plan_structure(method):
+    df = _ranked()
+    pools = build_candidate_pools(df)
+    plan = optimize_meal_plan(df, 2000, 5, np.random.default_rng(2), pools, method)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    for day in plan:
+        assert [m["name"] for m in day["meals"]] == list(planner.MEAL_RATIOS)
+        for meal in day["meals"]:
+            classes = [it["class"] for it in meal["items"]]
+            assert ("fruit" in classes) == (meal["name"] in planner.FRUIT_MEALS)
+            for it in meal["items"]:
+                assert isinstance(it["portion_g"], int) and isinstance(it["kcal"], int)
+        expected = [sum(m["total"][k] for m in day["meals"]) for k in ("kcal", "protein_g", "fat_g", "carb_g")]
+        np.testing.assert_allclose(list(day["daily_total"].values()), expected, atol=0.051)
+
+
+def test_plan_missing_class():
+    """Kelas tanpa kandidat dilewati; hari/meal tetap lengkap."""
+    df = _ranked()
+    df = df[df["CLASS_45"] != "vegetable"]
+    plan = optimize_meal_plan(df, 1800, 2, np.random.default_rng(3), build_candidate_pools(df))
+    assert all("vegetable" not in [it["class"] for it in m["items"]] for d in plan for m in d["meals"])
+    assert all(len(m["items"]) for d in plan for m in d["meals"])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from modules import portions
+from modules.portions import PORTION_MAX, PORTION_MIN, solve_portions, uniform_portions
+
+
+def _meals(n, seed=0, n_slots=4):
+    rng = np.random.default_rng(seed)
+    macros = rng.gamma(2.0, [80.0, 6.0, 5.0, 15.0], size=(n, 3, n_slots, 4))
+    valid = rng.random((n, 3, n_slots)) > 0.15
+    targets = rng.uniform(300, 1200, size=(n, 3))
+    return macros, targets, valid
+
+
+# ============================================================
+# ACTIVE-SET BERBATCH vs ENUMERASI SEMUA POLA
+# ============================================================
+@pytest.mark.parametrize("seed", range(5))
+def test_active_set_matches_enumeration(monkeypatch, seed):
+    macros, targets, valid = _meals(200, seed)
+    got = solve_portions(macros, targets, valid)
+    monkeypatch.setattr(portions, "ACTIVE_SET_ITERS", 0)      # semua meal lewat enumerasi
+    np.testing.assert_allclose(got, solve_portions(macros, targets, valid), rtol=0, atol=1e-9)
+
+
+def test_enumeration_chunks(monkeypatch):
+    macros, targets, valid = _meals(50, 7)
+    monkeypatch.setattr(portions, "ACTIVE_SET_ITERS", 0)
+    full = solve_portions(macros, targets, valid)
+    monkeypatch.setattr(portions, "SOLVE_CHUNK_MEALS", 7)
+    np.testing.assert_array_equal(full, solve_portions(macros, targets, valid))
+
+
+def test_bounds_and_empty_slots():
+    macros, targets, valid = _meals(100, 3)
+    x = solve_portions(macros, targets, valid)
+    assert x.shape == valid.shape
+    assert (x[~valid] == 0).all()
+    assert ((x[valid] >= PORTION_MIN - 1e-6) & (x[valid] <= PORTION_MAX + 1e-6)).all()
+
+
+def test_zero_target_falls_back_to_uniform():
+    macros, targets, valid = _meals(4, 5)
+    targets[1, 2] = 0
+    x = solve_portions(macros, targets, valid)
+    np.testing.assert_allclose(x[1, 2], uniform_portions(macros, targets, valid)[1, 2])
+
+
+def test_empty_batch():
+    assert solve_portions(np.zeros((0, 3, 4, 4)), np.zeros((0, 3)), np.zeros((0, 3, 4), bool)).shape == (0, 3, 4)
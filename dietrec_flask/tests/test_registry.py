@@ -0,0 +1,155 @@
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import registry
+from modules.tree_engine import predict_ensemble
+
+FEATURES = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """Registry diarahkan ke folder model sementara dengan state proses bersih."""
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(registry, "TRAIN_LOCK_FILE", str(tmp_path / ".training.lock"))
+    monkeypatch.setattr(registry, "TRAIN_FAILED_FILE", str(tmp_path / ".training.failed"))
+    monkeypatch.setattr(registry, "_TRAIN_THREAD", None)
+    monkeypatch.setattr(registry, "_BUNDLE", None)
+    yield tmp_path
+    thread = registry._TRAIN_THREAD
+    if thread is not None:
+        thread.join(timeout=10)
+
+
+# ============================================================
+# BACKGROUND TRAINER: SINGLE-FLIGHT DAN BACKOFF
+# ============================================================
+def test_second_call_while_running_does_not_start(model_dir):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def train():
+        calls.append(1)
+        started.set()
+        release.wait(10)
+
+    assert registry.start_background_training(train)
+    assert started.wait(10)
+    assert registry.training_in_progress()
+    assert not registry.start_background_training(train)
+    release.set()
+    registry._TRAIN_THREAD.join(10)
+    assert calls == [1]
+    assert not registry.training_in_progress()
+
+
+def test_lock_held_by_other_process(model_dir):
+    (model_dir / ".training.lock").write_text("12345")
+    calls = []
+    assert not registry.start_background_training(lambda: calls.append(1))
+    assert registry._TRAIN_THREAD is None and not calls
+
+
+def test_failure_backs_off(model_dir, monkeypatch):
+    calls = []
+
+    def train():
+        calls.append(1)
+        raise RuntimeError("data rusak")
+
+    assert registry.start_background_training(train)
+    registry._TRAIN_THREAD.join(10)
+    assert registry.last_training_failure() is not None
+    assert not (model_dir / ".training.lock").exists()
+
+    # Dalam masa backoff: tidak dimulai lagi
+    assert not registry.start_background_training(train)
+    assert calls == [1]
+
+    # Setelah backoff habis: dicoba lagi; sukses menghapus penanda kegagalan
+    monkeypatch.setattr(registry, "TRAIN_FAILURE_BACKOFF_SEC", 0)
+    assert registry.start_background_training(lambda: calls.append(2))
+    registry._TRAIN_THREAD.join(10)
+    assert calls == [1, 2]
+    assert registry.last_training_failure() is None
+
+
+# ============================================================
+# HOT-SWAP BUNDLE LEWAT MANIFEST
+# ============================================================
+@pytest.fixture(scope="module")
+def fitted():
+    pytest.importorskip("sklearn")
+    pytest.importorskip("xgboost")
+    from sklearn.ensemble import RandomForestRegressor
+    from xgboost import XGBRegressor
+
+    out = []
+    for seed in (0, 1):
+        rng = np.random.default_rng(seed)
+        X = pd.DataFrame(rng.gamma(2.0, [80.0, 6.0, 5.0, 15.0], size=(300, 4)), columns=FEATURES)
+        y = 0.01 * X.ENERGI + 0.3 * X.PROTEIN - 0.2 * X.LEMAK + rng.normal(0, 0.1, len(X))
+        out.append({"rf": RandomForestRegressor(n_estimators=5, max_depth=6, random_state=seed).fit(X, y),
+                    "xgb": XGBRegressor(n_estimators=10, max_depth=3, random_state=seed).fit(X, y)})
+    return out
+
+
+def _write_version(model_dir, models, version):
+    """Tulis artefak berversi (seperti modules.training) tanpa mengaktifkannya."""
+    files = {key: registry.versioned_name(key, version) for key in registry.MODEL_FILES}
+    for key, name in files.items():
+        joblib.dump(models[key], model_dir / name)
+    return files
+
+
+def _predict(bundle, X):
+    return predict_ensemble(bundle["engine"], X.to_numpy(dtype=float))
+
+
+def test_unpublished_artifacts_not_loaded(model_dir, fitted):
+    files = _write_version(model_dir, fitted[0], "v1")
+    # Artefak sudah ada tapi manifest belum ditulis: belum ada model aktif
+    assert registry.get_bundle() is None
+
+    registry.publish_manifest(files)
+    bundle = registry.get_bundle()
+    assert bundle is not None and bundle["files"] == files
+    assert registry.get_bundle() is bundle
+
+
+def test_new_manifest_replaces_bundle(model_dir, fitted):
+    X = pd.DataFrame(np.random.default_rng(9).gamma(2.0, [80.0, 6.0, 5.0, 15.0], size=(50, 4)), columns=FEATURES)
+    v1 = _write_version(model_dir, fitted[0], "v1")
+    registry.publish_manifest(v1)
+    first = registry.get_bundle()
+
+    # Versi baru sedang ditulis: bundle lama tetap dilayani
+    v2 = _write_version(model_dir, fitted[1], "v2")
+    assert registry.get_bundle() is first
+
+    registry.publish_manifest(v2)
+    second = registry.get_bundle()
+    assert second is not first
+    assert second["files"] == v2 and second["version"] != first["version"]
+    expected = 0.5 * fitted[1]["rf"].predict(X) + 0.5 * fitted[1]["xgb"].predict(X)
+    np.testing.assert_allclose(_predict(second, X), expected, rtol=0, atol=1e-4)
+
+    # Versi sebelumnya disimpan satu generasi, lalu dibersihkan
+    assert all((model_dir / name).exists() for name in v1.values())
+    registry.publish_manifest(_write_version(model_dir, fitted[0], "v3"))
+    assert not any((model_dir / name).exists() for name in v1.values())
+    assert all((model_dir / name).exists() for name in v2.values())
+
+
+def test_broken_artifact_keeps_previous_bundle(model_dir, fitted):
+    registry.publish_manifest(_write_version(model_dir, fitted[0], "v1"))
+    first = registry.get_bundle()
+
+    files = _write_version(model_dir, fitted[1], "v2")
+    (model_dir / files["xgb"]).write_bytes(b"terpotong")
+    registry.publish_manifest(files)
+    assert registry.get_bundle() is first
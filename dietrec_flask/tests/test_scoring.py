@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from modules import scoring
+from modules.io_utils import get_catalog
+from modules.scoring import apply_filters, calculate_scores, catalog_scores, rule_based_scores
+from modules.tree_engine import compile_ensemble, predict_ensemble
+
+FEATURES = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+
+
+def _frame(rng, n):
+    return pd.DataFrame(rng.gamma(2.0, [80.0, 6.0, 5.0, 15.0], size=(n, 4)), columns=FEATURES)
+
+
+def _bundle(seed, version):
+    X = _frame(np.random.default_rng(seed), 600)
+    y = rule_based_scores(X) + np.random.default_rng(seed).normal(0, 2, len(X))
+    rf = RandomForestRegressor(n_estimators=8, max_depth=8, random_state=seed).fit(X, y)
+    xgb = XGBRegressor(n_estimators=20, max_depth=4, learning_rate=0.3, random_state=seed).fit(X, y)
+    return {"engine": compile_ensemble(rf, xgb), "version": version}
+
+
+@pytest.fixture(scope="module")
+def bundles():
+    return _bundle(0, "v1"), _bundle(1, "v2")
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(scoring, "_SCORE_CACHE", {})
+
+
+def _uncached(df, bundle):
+    if bundle is None:
+        return rule_based_scores(df)
+    return predict_ensemble(bundle["engine"], df[FEATURES].fillna(0).to_numpy(dtype=float))
+
+
+# ============================================================
+# CACHE SKOR KATALOG: INVALIDASI PER VERSI
+# ============================================================
+def test_same_version_served_from_cache(bundles):
+    df = _frame(np.random.default_rng(5), 300)
+    first = catalog_scores(df, "sha-a", bundles[0])
+    assert catalog_scores(df, "sha-a", bundles[0]) is first
+    np.testing.assert_allclose(first.to_numpy(), _uncached(df, bundles[0]), rtol=0, atol=1e-9)
+
+
+def test_catalog_sha1_change_recomputes(bundles):
+    df = _frame(np.random.default_rng(5), 300)
+    old = catalog_scores(df, "sha-a", bundles[0])
+
+    # Isi katalog berubah (panjang sama) -> sha1 baru -> skor dihitung ulang
+    df2 = df.copy()
+    df2["ENERGI"] = df2["ENERGI"][::-1].to_numpy()
+    new = catalog_scores(df2, "sha-b", bundles[0])
+    assert new is not old
+    np.testing.assert_allclose(new.to_numpy(), _uncached(df2, bundles[0]), rtol=0, atol=1e-9)
+    assert not np.allclose(new.to_numpy(), old.to_numpy())
+
+
+def test_bundle_version_change_recomputes(bundles):
+    df = _frame(np.random.default_rng(6), 300)
+    v1 = catalog_scores(df, "sha-a", bundles[0])
+    v2 = catalog_scores(df, "sha-a", bundles[1])
+    rule = catalog_scores(df, "sha-a", None)
+    assert v2 is not v1
+    np.testing.assert_allclose(v2.to_numpy(), _uncached(df, bundles[1]), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(rule.to_numpy(), _uncached(df, None), rtol=0, atol=1e-9)
+    assert not np.allclose(v1.to_numpy(), v2.to_numpy())
+    assert len(scoring._SCORE_CACHE) <= scoring._SCORE_CACHE_MAX
+
+
+def test_unversioned_not_cached(bundles):
+    df = _frame(np.random.default_rng(7), 50)
+    catalog_scores(df, None, bundles[0])
+    catalog_scores(df, "sha-a", dict(bundles[0], version=None))
+    assert scoring._SCORE_CACHE == {}
+
+
+def test_cached_scores_read_only(bundles):
+    df = _frame(np.random.default_rng(8), 50)
+    scores = catalog_scores(df, "sha-a", bundles[0])
+    with pytest.raises(ValueError):
+        scores.values[0] = 0.0
+
+
+# ============================================================
+# PARITAS calculate_scores(precomputed=...) vs TANPA CACHE
+# ============================================================
+FILTERS = [(False, [], []), (True, [], []), (True, ["Seafood", "Telur"], ["Hipertensi"]),
+           (False, ["Kacang"], ["Diabetes Melitus", "Asam Urat (Gout)"])]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    cat = get_catalog()
+    if cat["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    return cat
+
+
+@pytest.mark.parametrize("which", [0, 1, None])
+@pytest.mark.parametrize("halal,allergies,diseases", FILTERS)
+def test_precomputed_matches_uncached(catalog, bundles, which, halal, allergies, diseases):
+    bundle = None if which is None else bundles[which]
+    df = catalog["df"]
+    filtered = apply_filters(df, catalog["mapping"], halal, allergies, diseases,
+                             index=catalog["index"], version=catalog["sha1"])
+    pre = catalog_scores(df, catalog["sha1"], bundle)
+
+    cached = calculate_scores(filtered, bundle, precomputed=pre)
+    direct = calculate_scores(filtered, bundle)
+    assert len(cached) == len(filtered)
+    assert sorted(cached.index) == sorted(direct.index)
+    np.testing.assert_allclose(cached["S_FINAL"].sort_index().to_numpy(),
+                               direct["S_FINAL"].sort_index().to_numpy(), rtol=0, atol=1e-9)
+    assert cached["S_FINAL"].is_monotonic_decreasing
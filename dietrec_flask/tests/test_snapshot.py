@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import io_utils
+from modules.snapshot import SNAPSHOT_VERSION, read_snapshot, write_snapshot
+
+
+@pytest.fixture
+def source():
+    path = io_utils._find_source()
+    if path is None:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    return path
+
+
+@pytest.fixture
+def snap_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(io_utils, "SNAPSHOT_DIR", tmp_path / "snap")
+    return tmp_path / "snap"
+
+
+def _meta(snap_dir):
+    return json.loads((snap_dir / "meta.json").read_text(encoding="utf-8"))
+
+
+# ============================================================
+# ROUND-TRIP: build_snapshot -> baca == parsing sumber
+# ============================================================
+def test_build_snapshot_roundtrip(source, snap_dir):
+    out, errs = io_utils.build_snapshot()
+    assert not errs and out == snap_dir
+    expected, mapping, _ = io_utils._parse_tkpi(source)
+
+    sha1 = io_utils._file_sha1(source)
+    df, snap_mapping = read_snapshot(snap_dir, sha1, io_utils.PARSER_VERSION)
+    pd.testing.assert_frame_equal(df, expected)
+    assert snap_mapping == mapping
+
+    # Jalur load biasa memakai snapshot yang sama
+    df2, mapping2, errs2 = io_utils._load_from_snapshot_or_source(source, sha1)
+    assert not errs2 and mapping2 == mapping
+    pd.testing.assert_frame_equal(df2, expected)
+
+    # Kolom numerik tidak disalin dari mmap
+    assert not df["ENERGI"].to_numpy().flags.owndata
+
+
+def test_changed_source_sha1_forces_rebuild(source, snap_dir):
+    sha1 = io_utils._file_sha1(source)
+    io_utils._load_from_snapshot_or_source(source, sha1)
+    assert _meta(snap_dir)["source_sha1"] == sha1
+
+    changed = "0" * 40
+    assert read_snapshot(snap_dir, changed, io_utils.PARSER_VERSION) is None
+    df, _, errs = io_utils._load_from_snapshot_or_source(source, changed)
+    assert not errs and len(df)
+    meta = _meta(snap_dir)
+    assert meta["source_sha1"] == changed
+    # File array snapshot lama ikut dibersihkan
+    assert all(f.name.startswith(meta["prefix"] + ".") for f in snap_dir.glob("*.npy"))
+
+
+def test_changed_parser_version_forces_rebuild(source, snap_dir, monkeypatch):
+    sha1 = io_utils._file_sha1(source)
+    io_utils._load_from_snapshot_or_source(source, sha1)
+    assert read_snapshot(snap_dir, sha1, io_utils.PARSER_VERSION) is not None
+
+    monkeypatch.setattr(io_utils, "PARSER_VERSION", "kode-parser-baru")
+    assert read_snapshot(snap_dir, sha1, "kode-parser-baru") is None
+    io_utils._load_from_snapshot_or_source(source, sha1)
+    assert _meta(snap_dir)["parser_version"] == "kode-parser-baru"
+    assert read_snapshot(snap_dir, sha1, "kode-parser-baru") is not None
+
+
+# ============================================================
+# FORMAT: teks, NaN, snapshot rusak
+# ============================================================
+def test_roundtrip_text_nan_and_corrupt(tmp_path):
+    df = pd.DataFrame({"NAMA": ["a", None, "c"], "ENERGI": np.array([1.5, 0.0, 3.25]),
+                       "ALERGI": [np.nan, "udang", "udang"]})
+    write_snapshot(df, {"allergy": "ALERGI"}, tmp_path, "src.csv", "f" * 40, "p1")
+    got, mapping = read_snapshot(tmp_path, "f" * 40, "p1")
+    assert mapping == {"allergy": "ALERGI"}
+    assert got["NAMA"].tolist()[0] == "a" and pd.isna(got["NAMA"][1])
+    assert got["ENERGI"].tolist() == [1.5, 0.0, 3.25]
+    assert _meta(tmp_path)["format_version"] == SNAPSHOT_VERSION
+
+    (tmp_path / f"{'f' * 12}.ENERGI.npy").write_bytes(b"rusak")
+    assert read_snapshot(tmp_path, "f" * 40, "p1") is None
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+from modules import tree_engine
+from modules.tree_engine import (CHUNKED_BATCH_ROWS, SMALL_BATCH_ROWS, compile_ensemble, load_engine,
+                                 predict_ensemble, save_engine)
+
+FEATURES = ["ENERGI", "PROTEIN", "LEMAK", "KARBO"]
+TOL = 1e-4
+
+
+def _frame(rng, n, nan_frac=0.0):
+    X = pd.DataFrame(rng.gamma(2.0, [80.0, 6.0, 5.0, 15.0], size=(n, 4)), columns=FEATURES)
+    if nan_frac:
+        for col in ("PROTEIN", "KARBO"):
+            X.loc[rng.random(n) < nan_frac, col] = np.nan
+    return X
+
+
+def _target(X):
+    Xf = X.fillna(0)
+    return 0.01 * Xf.ENERGI + 0.3 * Xf.PROTEIN - 0.2 * Xf.LEMAK + np.sin(Xf.KARBO / 10)
+
+
+def _fit(X):
+    y = _target(X)
+    rf = RandomForestRegressor(n_estimators=12, max_depth=10, random_state=0).fit(X, y)
+    xgb = XGBRegressor(n_estimators=25, max_depth=4, learning_rate=0.3, random_state=0).fit(X, y)
+    return rf, xgb, compile_ensemble(rf, xgb)
+
+
+def _max_diff(engine, rf, xgb, X):
+    expected = 0.5 * rf.predict(X) + 0.5 * xgb.predict(X)
+    return np.abs(predict_ensemble(engine, X.to_numpy(dtype=float)) - expected).max()
+
+
+@pytest.fixture(scope="module")
+def models():
+    return _fit(_frame(np.random.default_rng(0), 800))
+
+
+@pytest.fixture(scope="module")
+def models_nan():
+    """Model yang melihat NaN saat pelatihan (cabang missing dipelajari)."""
+    return _fit(_frame(np.random.default_rng(1), 800, nan_frac=0.15))
+
+
+# ============================================================
+# PARITAS ENGINE ARRAY vs 0.5·rf.predict + 0.5·xgb.predict
+# ============================================================
+# Ukuran batch: jalur _traverse_pairs, pairs per potongan, dan _traverse_trees
+SIZES = [1, 37, SMALL_BATCH_ROWS, SMALL_BATCH_ROWS + 1, CHUNKED_BATCH_ROWS + 100]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_parity(models, n):
+    rf, xgb, engine = models
+    assert _max_diff(engine, rf, xgb, _frame(np.random.default_rng(n), n)) < TOL
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_parity_nan_features(models, n):
+    rf, xgb, engine = models
+    assert _max_diff(engine, rf, xgb, _frame(np.random.default_rng(n), n, nan_frac=0.3)) < TOL
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_parity_nan_trained(models_nan, n):
+    rf, xgb, engine = models_nan
+    assert _max_diff(engine, rf, xgb, _frame(np.random.default_rng(n), n, nan_frac=0.3)) < TOL
+
+
+def test_traversal_paths_agree(models):
+    """Kedua jalur traversal memberi hasil identik pada batch yang sama."""
+    _, _, engine = models
+    X32 = _frame(np.random.default_rng(7), 300, nan_frac=0.2).to_numpy(dtype=np.float32)
+    for trees, strict in ((engine["rf"], False), (engine["xgb"], True)):
+        pairs = tree_engine._traverse_pairs(trees, X32, strict, True)
+        per_tree = tree_engine._traverse_trees(trees, X32, strict, True)
+        np.testing.assert_allclose(pairs, per_tree, rtol=0, atol=1e-9)
+
+
+def test_split_threshold_boundary(models):
+    """Nilai tepat di threshold: RF ke kiri (x <= thr), XGB ke kanan (x < thr)."""
+    rf, xgb, engine = models
+    t = rf.estimators_[0].tree_
+    split = np.flatnonzero(t.children_left >= 0)
+    X = _frame(np.random.default_rng(3), len(split))
+    X.iloc[np.arange(len(split)), t.feature[split]] = t.threshold[split].astype(np.float32)
+    assert _max_diff(engine, rf, xgb, X) < TOL
+
+
+def test_save_load_roundtrip(models, tmp_path):
+    rf, xgb, engine = models
+    path = str(tmp_path / "engine.npz")
+    save_engine(engine, path)
+    loaded = load_engine(path)
+    assert loaded is not None
+    assert _max_diff(loaded, rf, xgb, _frame(np.random.default_rng(5), 50, nan_frac=0.2)) < TOL
+
+
+def test_load_corrupt_engine(tmp_path):
+    path = tmp_path / "engine.npz"
+    path.write_bytes(b"PK\x03\x04 bukan zip")
+    assert load_engine(str(path)) is None
@@ -0,0 +1,72 @@
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from modules import engine, pdf_export
+from modules.io_utils import get_catalog
+from modules.workers import PoolExecutor
+
+PARENT_PID = os.getpid()
+
+
+def _die_in_worker(value):
+    """Mematikan proses pool; di proses induk (fallback) mengembalikan nilai."""
+    if os.getpid() != PARENT_PID:
+        os._exit(1)
+    return value
+
+
+@pytest.fixture
+def pool():
+    if "fork" not in mp.get_all_start_methods():
+        pytest.skip("Butuh start method fork")
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("fork"))
+    yield pool
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ============================================================
+# FALLBACK THREAD SAAT POOL PROSES RUSAK
+# ============================================================
+def test_worker_crash_falls_back_to_thread(pool):
+    # Job yang sedang berjalan saat proses mati dijalankan ulang di proses ini
+    assert PoolExecutor(pool).submit(_die_in_worker, "lokal").result(timeout=30) == "lokal"
+
+
+def test_submit_on_broken_pool_falls_back(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(_die_in_worker, 0).result(timeout=30)
+    assert PoolExecutor(pool).submit(_die_in_worker, 42).result(timeout=30) == 42
+
+
+def test_errors_still_reach_caller(pool):
+    fut = PoolExecutor(pool).submit(int, "bukan angka")
+    with pytest.raises(ValueError):
+        fut.result(timeout=30)
+
+
+def test_pdf_export_after_worker_crash(pool, monkeypatch):
+    pytest.importorskip("reportlab")
+    if get_catalog()["errors"]:
+        pytest.skip("Dataset TKPI tidak tersedia")
+    monkeypatch.setattr(engine, "start_background_training", lambda *a, **k: False)
+    res, meta, errs = engine.compute_engine({"age": "30", "weight": "65", "height": "168", "sex": "Perempuan",
+                                             "activity": "sedang", "goal": "maintain", "days": "2"})
+    assert not errs
+
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(_die_in_worker, 0).result(timeout=30)
+    monkeypatch.setattr(pdf_export, "_EXECUTOR", PoolExecutor(pool))
+
+    key = f"{res['key']}-{time.time_ns()}"
+    status, data = pdf_export.submit_pdf(key, res["plan"], meta)
+    deadline = time.monotonic() + 30
+    while status == "pending" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        status, data = pdf_export.get_pdf(key)
+    assert status == "ready"
+    assert data.startswith(b"%PDF")
@@ -0,0 +1,38 @@
+import sys
+import os
+import argparse
+
+# --- 1. SETUP IMPORT MODUL ---
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from modules.io_utils import load_tkpi
+    from modules.scoring import train_models
+    from modules.registry import bundle_info
+except ImportError as e:
+    print(f"Error Import: {e}")
+    exit(1)
+
+
+# ============================================================
+# MAIN PROGRAM
+# Melatih RF + XGB di luar jalur request (job terjadwal / deploy).
+# Server akan memuat artefak baru otomatis lewat model registry.
+# ============================================================
+def main(cv_jobs=-1):
+    print("[1/2] Memuat Dataset...")
+    df, mapping, err = load_tkpi()
+    if err:
+        print(f"Gagal: {err}")
+        return
+
+    print("[2/2] Melatih Model...")
+    train_models(df, cv_jobs=cv_jobs)
+    print(f"Bundle aktif: {bundle_info()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latih model RF + XGB")
+    parser.add_argument("--jobs", type=int, default=-1, help="Jumlah proses paralel untuk CV (-1 = semua core)")
+    args = parser.parse_args()
+    main(cv_jobs=args.jobs)